@@ -2,7 +2,7 @@
 API v1 router.
 """
 from fastapi import APIRouter
-from .endpoints import chat, weather, schemes, tips, mandi  # <-- FIX 1: Added 'mandi' here
+from .endpoints import chat, weather, schemes, tips, mandi, advisories, admin  # <-- FIX 1: Added 'mandi' here
 
 api_router = APIRouter()
 
@@ -11,6 +11,8 @@ api_router.include_router(chat.router, prefix="/chat", tags=["Chat"])
 api_router.include_router(weather.router, prefix="/weather", tags=["Weather"])
 api_router.include_router(schemes.router, prefix="/schemes", tags=["Schemes"])
 api_router.include_router(tips.router, prefix="/tips", tags=["Tips"])
+api_router.include_router(advisories.router, prefix="/advisories", tags=["Advisories"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 # --- FIX 2: Changed 'mandi_router.router' to 'mandi.router' ---
 api_router.include_router(mandi.router, prefix="/mandi", tags=["Mandi"])
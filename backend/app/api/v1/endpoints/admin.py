@@ -0,0 +1,71 @@
+"""
+Admin API endpoints.
+
+Every route needs an X-Admin-Token header signed with SECRET_KEY
+(``python profile_token.py admin``).
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Optional
+
+from ....core.config import settings
+from ....core.logging import log
+from ....core.profiling import ADMIN_SCOPE, profile_store, verify_token
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not verify_token(x_admin_token, ADMIN_SCOPE):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid X-Admin-Token header is required"
+        )
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles", response_model=Dict)
+async def list_profiles():
+    """
+    Recently captured requests, newest first.
+    
+    Holds requests slower than PROFILING_SLOW_MS and requests profiled via
+    X-Profile or sampling, for this worker process only.
+    """
+    try:
+        profiles = profile_store.recent()
+        
+        return {
+            "slow_ms": settings.PROFILING_SLOW_MS,
+            "count": len(profiles),
+            "profiles": [profile.summary() for profile in profiles]
+        }
+        
+    except Exception as e:
+        log.error(f"Error listing request profiles: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list request profiles"
+        )
+
+
+@router.get("/profiles/{request_id}")
+async def get_profile(
+    request_id: str,
+    format: str = Query("json", pattern="^(json|folded)$", description="json, or folded stacks for flame graph tools"),
+    max_stacks: int = Query(50, ge=1, le=1000, description="Stacks to include in the JSON output")
+):
+    """
+    One captured request: SQL statements and upstream calls with their
+    timings, and its sampled call stacks if it was profiled.
+    """
+    profile = profile_store.get(request_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found (it may have been evicted or captured by another worker)"
+        )
+    
+    if format == "folded":
+        return PlainTextResponse(profile.folded())
+    return profile.to_dict(max_stacks)
@@ -0,0 +1,53 @@
+"""
+Crop-weather advisory API endpoints.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict
+
+from ....db.base import get_read_db
+from ....services.advisory_service import advisory_service
+from ....core.logging import log
+
+router = APIRouter()
+
+
+@router.get("/{district}", response_model=Dict)
+async def get_advisory(
+    district: str,
+    language: str = Query(default="en", pattern="^(en|hi|gu)$", description="Language code (en, hi, gu)"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the precomputed crop-weather advisory for a district.
+    
+    Advisories are rebuilt once per forecast cycle by a batch job; this
+    endpoint is a key lookup and makes no upstream calls.
+    """
+    try:
+        advisory = await advisory_service.get(db, district, language)
+        
+        if not advisory:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No advisory available for this district"
+            )
+        
+        return {
+            'district': advisory.district,
+            'language': advisory.language,
+            'location': advisory.location,
+            'season': advisory.season,
+            'cards': advisory.cards,
+            'forecast_cycle': advisory.forecast_cycle.isoformat(),
+            'generated_at': advisory.generated_at.isoformat(),
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error fetching advisory: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch advisory: {str(e)}"
+        )
@@ -15,13 +15,15 @@ from ....schemas.conversation import (
     ConversationCreate,
     ConversationResponse,
 )
-from ....services.ai_service import ai_service
+from ....services.ai_service import AIUnavailableError, get_ai_service
+from ....services.rate_limiter import CHAT, limit_class
 from ....core.logging import log
 
 router = APIRouter()
 
 
 @router.post("/chat", response_model=ChatResponse, status_code=status.HTTP_200_OK)
+@limit_class(CHAT)
 async def chat(
     request: ChatRequest,
     db: AsyncSession = Depends(get_db)
@@ -34,6 +36,7 @@ async def chat(
     - Returns AI-generated farming advice
     """
     try:
+        ai_service = get_ai_service()
         conversation_id = request.conversation_id
         
         # Create or get conversation
@@ -105,6 +108,12 @@ async def chat(
             created_at=assistant_message.created_at
         )
         
+    except AIUnavailableError as e:
+        log.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI chat is unavailable: {e}"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -145,7 +154,7 @@ async def create_conversation(
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db)  # Primary: read right after the chat turn that wrote it
 ):
     """Get a conversation with its messages."""
     try:
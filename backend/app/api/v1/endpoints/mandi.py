@@ -3,132 +3,77 @@ Mandi (Market) Prices API endpoints.
 Fetches live data from official data.gov.in AGMARKNET API.
 """
 import httpx
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Dict
-from ....core.config import settings
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Literal, Optional
+from ....db.base import get_db, get_read_db
 from ....core.logging import log
+from ....services.mandi_service import (
+    mandi_service,
+    resolve_regions,
+    MandiUnavailableError,
+    InvalidCursorError,
+)
+from ....services.mandi_ingest import agmarknet_ingestor
+from ....services.mandi_names import commodity_index
+from ....services.mandi_rollups import mandi_rollups
+from ....services.mandi_geo import mandi_geo
+from ....services.price_alerts import price_alerts
+from ....services.rate_limiter import UPSTREAM, limit_class
+from ....schemas.price_alert import PriceAlertCreate
+from ....services.resilience import agmarknet_upstream, CircuitOpenError, QuotaExhaustedError
 
 router = APIRouter()
 
-# Official data.gov.in AGMARKNET endpoint
-AGMARKNET_BASE_URL = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+# Upper bound on commodities per batch request
+MAX_BATCH_COMMODITIES = 10
+
 
 @router.get("/", response_model=List[Dict])
+@limit_class(UPSTREAM)
 async def get_mandi_prices(
-    commodity: str = Query("Wheat", description="Commodity to fetch prices for")
+    commodity: str = Query("Wheat", description="Commodity to fetch prices for"),
+    region: Optional[str] = Query(
+        None,
+        description="Regions in priority order, e.g. Maharashtra,India (India = all states)"
+    ),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get live Mandi prices for a specific commodity, prioritizing Gujarat.
-    Uses official AGMARKNET data from data.gov.in.
+    Get live Mandi prices for a specific commodity from the first region in
+    the preference list that has data (MANDI_REGION_PREFERENCE unless the
+    region parameter overrides it). Uses official AGMARKNET data from data.gov.in.
+    
+    Prices are served from the local cache while fresh (MANDI_CACHE_TTL_MINUTES);
+    stale entries are refreshed from upstream, with concurrent refreshes
+    for the same commodity sharing one upstream fetch.
     """
-    if not settings.DATA_GOV_IN_API_KEY:
-        log.error("DATA_GOV_IN_API_KEY is not set in .env file.")
+    try:
+        result = await mandi_service.get_prices(db, commodity, resolve_regions(region))
+        log.info(f"Returning {len(result)} Mandi prices for {commodity}")
+        return result
+    
+    except MandiUnavailableError as e:
+        log.error(str(e))
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Add DATA_GOV_IN_API_KEY to .env"
         )
-
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            all_prices = []
-            
-            # Strategy 1: Try Gujarat + commodity
-            params_gujarat = {
-                "api-key": settings.DATA_GOV_IN_API_KEY,
-                "format": "json",
-                "limit": 50,
-                "offset": 0,
-                "filters[state]": "Gujarat",
-                "filters[commodity]": commodity
-            }
-            
-            log.info(f"Fetching Mandi data for {commodity} in Gujarat...")
-            response = await client.get(AGMARKNET_BASE_URL, params=params_gujarat)
-            response.raise_for_status()
-            data = response.json()
-            
-            gujarat_records = data.get("records", [])
-            log.info(f"Found {len(gujarat_records)} Gujarat records for {commodity}")
-            
-            # Strategy 2: If no Gujarat data, try all India
-            if not gujarat_records:
-                log.info(f"No Gujarat data, trying all India for {commodity}...")
-                params_all = {
-                    "api-key": settings.DATA_GOV_IN_API_KEY,
-                    "format": "json",
-                    "limit": 30,
-                    "offset": 0,
-                    "filters[commodity]": commodity
-                }
-                
-                response = await client.get(AGMARKNET_BASE_URL, params=params_all)
-                response.raise_for_status()
-                data = response.json()
-                gujarat_records = data.get("records", [])
-                log.info(f"Found {len(gujarat_records)} all-India records for {commodity}")
-            
-            if not gujarat_records:
-                log.warning(f"No Mandi data found for commodity: {commodity}")
-                return []
-            
-            # Process records
-            seen_markets = set()
-            for i, record in enumerate(gujarat_records):
-                try:
-                    # Extract and clean price data
-                    modal_str = str(record.get("modal_price", "0")).replace(",", "").strip()
-                    min_str = str(record.get("min_price", "0")).replace(",", "").strip()
-                    max_str = str(record.get("max_price", "0")).replace(",", "").strip()
-                    
-                    # Convert to integers
-                    modal = int(float(modal_str)) if modal_str and modal_str != "0" else 0
-                    min_price = int(float(min_str)) if min_str and min_str != "0" else modal
-                    max_price = int(float(max_str)) if max_str and max_str != "0" else modal
-                    
-                    # Skip invalid prices
-                    if modal == 0 or modal > 100000:
-                        continue
-                    
-                    # Extract market and commodity info
-                    market_name = str(record.get("market", "Unknown")).strip()
-                    commodity_name = str(record.get("commodity", commodity)).strip()
-                    state_name = str(record.get("state", "")).strip()
-                    district_name = str(record.get("district", "")).strip()
-                    
-                    # Create unique market identifier
-                    market_key = f"{state_name}-{market_name}-{commodity_name}"
-                    if market_key in seen_markets:
-                        continue
-                    seen_markets.add(market_key)
-                    
-                    # Build clean record
-                    display_market = market_name
-                    if district_name and district_name.lower() not in market_name.lower():
-                        display_market = f"{market_name}, {district_name}"
-                    
-                    clean_record = {
-                        "id": f"{market_name}-{commodity_name}-{i}",
-                        "market": display_market,
-                        "commodity": commodity_name,
-                        "min_price": min_price,
-                        "max_price": max_price,
-                        "modal_price": modal,
-                        "date": str(record.get("arrival_date", "N/A")).strip(),
-                    }
-                    all_prices.append(clean_record)
-                    
-                except Exception as parse_err:
-                    log.warning(f"Error parsing record {i}: {parse_err}")
-                    continue
-            
-            # Sort by modal price (highest first)
-            all_prices.sort(key=lambda x: x["modal_price"], reverse=True)
-            
-            # Return top 20
-            result = all_prices[:20]
-            log.info(f"Returning {len(result)} Mandi prices for {commodity}")
-            return result
-
+    except QuotaExhaustedError as e:
+        log.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Mandi price lookups are over quota. Please try again later.",
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
+    except CircuitOpenError as e:
+        log.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Mandi price service is temporarily unavailable. Please try again later.",
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
     except httpx.HTTPStatusError as e:
         log.error(f"HTTP error: {e.response.status_code} - {e.response.text[:300]}")
         raise HTTPException(
@@ -147,3 +92,328 @@ async def get_mandi_prices(
             status_code=500,
             detail=f"Processing error: {str(e)}"
         )
+
+
+@router.get("/commodities", response_model=List[Dict])
+async def suggest_commodities(
+    q: str = Query("", description="Partial or misspelled commodity name, in English, Hindi or Gujarati"),
+    language: str = Query(default="en", pattern="^(en|hi|gu)$", description="Language for labels (en, hi, gu)"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Suggest commodities for a search box.
+    
+    Returns canonical AGMARKNET names (usable as the commodity parameter)
+    with a label in the requested language, the alias that matched and a
+    match score. An empty query lists all known commodities.
+    """
+    return commodity_index.suggest(q, limit=limit, language=language)
+
+
+@router.get("/batch", response_model=Dict)
+@limit_class(UPSTREAM)
+async def get_mandi_prices_batch(
+    commodities: str = Query(
+        ...,
+        description="Comma-separated commodities, e.g. Wheat,Cotton,Groundnut,Cumin,Onion"
+    ),
+    region: Optional[str] = Query(
+        None,
+        description="Regions in priority order, e.g. Maharashtra,India (India = all states)"
+    ),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get Mandi prices for several commodities in one request.
+    
+    Cached commodities are served directly and the rest are fetched from
+    upstream concurrently. Results are grouped by commodity; a commodity
+    that fails gets status "error" (or "stale" with older prices) without
+    failing the others.
+    """
+    names = [name.strip() for name in commodities.split(",") if name.strip()]
+    if not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide at least one commodity"
+        )
+    if len(names) > MAX_BATCH_COMMODITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_COMMODITIES} commodities per request"
+        )
+    
+    try:
+        results = await mandi_service.get_prices_batch(db, names, resolve_regions(region))
+        log.info(f"Returning Mandi prices for {len(results)} commodities")
+        return {"commodities": results}
+    
+    except Exception as e:
+        log.error(f"Error fetching Mandi batch: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch Mandi prices: {str(e)}"
+        )
+
+
+@router.get("/search", response_model=Dict)
+async def search_mandi_prices(
+    state: Optional[str] = Query(None, description="State, e.g. Gujarat"),
+    district: Optional[str] = Query(None, description="District, e.g. Rajkot"),
+    market: Optional[str] = Query(None, description="Market (APMC) name"),
+    commodity: Optional[List[str]] = Query(None, description="Commodity; repeat for several"),
+    date_from: Optional[date] = Query(None, description="Earliest arrival date (inclusive)"),
+    date_to: Optional[date] = Query(None, description="Latest arrival date (inclusive)"),
+    sort_by: Literal["arrival_date", "modal_price", "min_price", "max_price"] = Query("arrival_date"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Query locally stored Mandi prices.
+    
+    Commodity and market names may be aliases (e.g. Gehun, ઘઉં); they are
+    resolved to the AGMARKNET spelling. Results are
+    keyset-paginated: pass the returned next_cursor to get the following page.
+    Only data already synced or cached is searched; upstream is not called.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to"
+        )
+    
+    try:
+        result = await mandi_service.query_prices(
+            db,
+            state=state,
+            district=district,
+            market=market,
+            commodities=commodity,
+            date_from=date_from,
+            date_to=date_to,
+            sort_by=sort_by,
+            descending=order == "desc",
+            limit=limit,
+            cursor=cursor
+        )
+        log.info(f"Mandi search returned {len(result['items'])} rows")
+        return result
+    
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        log.error(f"Error searching Mandi prices: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search Mandi prices: {str(e)}"
+        )
+
+
+@router.get("/trends", response_model=Dict)
+async def get_mandi_trends(
+    commodity: str = Query(..., description="Commodity, e.g. Wheat"),
+    state: Optional[str] = Query(None, description="State; required unless market is given"),
+    market: Optional[str] = Query(None, description="Market (APMC) name, e.g. Rajkot"),
+    days: int = Query(30, ge=7, le=365, description="Days of history to return"),
+    window: int = Query(7, ge=2, le=60, description="Moving-average window in days"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Daily price trend for a commodity at a market or across a state.
+    
+    Each point carries the day's price, its trailing moving average and the
+    percent change against the price reported about a week earlier. The
+    overall direction (up, down, flat) is taken from the latest point.
+    """
+    if not state and not market:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a state or a market"
+        )
+    
+    try:
+        trend = await mandi_rollups.get_trend(
+            db,
+            commodity=commodity,
+            state=state,
+            market=market,
+            days=days,
+            window=window
+        )
+        log.info(f"Mandi trend for {commodity} at {market or state}: {trend['direction']}")
+        return trend
+    
+    except Exception as e:
+        log.error(f"Error computing Mandi trend: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute Mandi trend: {str(e)}"
+        )
+
+
+@router.get("/nearest", response_model=Dict)
+async def get_nearest_best_markets(
+    lat: float = Query(..., ge=-90, le=90, description="Farmer's latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Farmer's longitude"),
+    commodity: str = Query(..., description="Commodity, e.g. Cotton"),
+    cost_per_km: float = Query(0.0, ge=0, description="Transport cost in Rs per quintal per km"),
+    k: int = Query(10, ge=1, le=50, description="Number of markets to return"),
+    max_km: Optional[float] = Query(None, gt=0, description="Ignore markets further than this"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Recommend markets by net realizable price.
+    
+    Markets are ranked by modal price minus transport cost
+    (cost_per_km x straight-line distance) using prices from the last two
+    weeks. Markets without their own coordinates are placed at their
+    district headquarters (location_precision "district").
+    """
+    try:
+        result = await mandi_geo.nearest_best(
+            db,
+            latitude=lat,
+            longitude=lon,
+            commodity=commodity,
+            cost_per_km=cost_per_km,
+            k=k,
+            max_km=max_km
+        )
+        log.info(f"Recommended {len(result['markets'])} markets for {commodity} near {lat},{lon}")
+        return result
+    
+    except Exception as e:
+        log.error(f"Error recommending Mandi markets: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to recommend markets: {str(e)}"
+        )
+
+
+@router.post("/alerts", response_model=Dict, status_code=status.HTTP_201_CREATED)
+async def create_price_alert(
+    alert: PriceAlertCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Subscribe to a price alert for a commodity at a market.
+    
+    The alert fires each time the market's modal price crosses the
+    threshold in the given direction, as new prices are synced or fetched.
+    Commodity and market may be aliases; they are stored under their
+    AGMARKNET spelling.
+    """
+    try:
+        subscription = await price_alerts.subscribe(
+            db,
+            user_id=alert.user_id,
+            commodity=alert.commodity,
+            market=alert.market,
+            direction=alert.direction,
+            threshold=alert.threshold
+        )
+        log.info(f"Created price alert {subscription['id']} for {alert.user_id}")
+        return subscription
+    
+    except Exception as e:
+        log.error(f"Error creating price alert: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create price alert: {str(e)}"
+        )
+
+
+@router.get("/alerts", response_model=List[Dict])
+async def list_price_alerts(
+    user_id: str = Query(..., description="User identifier"),
+    db: AsyncSession = Depends(get_db)  # Primary: must list an alert created just before
+):
+    """List a user's active price alerts."""
+    try:
+        return await price_alerts.list_subscriptions(db, user_id)
+    
+    except Exception as e:
+        log.error(f"Error listing price alerts: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list price alerts: {str(e)}"
+        )
+
+
+@router.get("/alerts/events", response_model=Dict)
+async def list_price_alert_events(
+    user_id: str = Query(..., description="User identifier"),
+    after_id: int = Query(0, ge=0, description="last_id from the previous poll"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)  # Primary: polled for events written moments before
+):
+    """
+    Poll a user's fired price alerts, oldest first.
+    
+    Pass the returned last_id as after_id to receive only newer alerts.
+    """
+    try:
+        return await price_alerts.list_events(db, user_id, after_id=after_id, limit=limit)
+    
+    except Exception as e:
+        log.error(f"Error listing price alert events: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list price alert events: {str(e)}"
+        )
+
+
+@router.delete("/alerts/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_price_alert(
+    alert_id: int,
+    user_id: str = Query(..., description="User identifier"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel a price alert. Alerts it already fired are kept."""
+    try:
+        if not await price_alerts.unsubscribe(db, user_id, alert_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Price alert not found"
+            )
+        
+        log.info(f"Cancelled price alert {alert_id}")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error cancelling price alert: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to cancel price alert: {str(e)}"
+        )
+
+
+@router.get("/quota", response_model=Dict)
+async def get_mandi_quota():
+    """
+    data.gov.in quota use.
+    
+    Shows today's usage against AGMARKNET_DAILY_QUOTA, shared by all
+    workers and the sync CLI, and this worker's available tokens, callers
+    waiting and calls granted or rejected per priority (interactive
+    requests vs. background sync).
+    """
+    return await agmarknet_upstream.quota.snapshot()
+
+
+@router.get("/sync/status", response_model=Dict)
+async def get_mandi_sync_status():
+    """Progress of the latest AGMARKNET full sync."""
+    status_info = await agmarknet_ingestor.status()
+    if status_info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No Mandi sync has run yet"
+        )
+    return status_info
@@ -7,19 +7,42 @@ from sqlalchemy import select
 from typing import List, Optional, Dict
 from uuid import UUID
 
-from ....db.base import get_db
+from ....db.base import get_db, get_read_db
 from ....models.scheme import Scheme
 from ....core.logging import log
 
 router = APIRouter()
 
+# Translated columns, stored as <field>_en / <field>_hi / <field>_gu
+SCHEME_TEXT_FIELDS = ("name", "description", "eligibility", "benefits")
+LANGUAGES = ("en", "hi", "gu")
+
+
+def localize_scheme(scheme: Scheme, language: str) -> Dict:
+    """Scheme as a response dict in ``language``, falling back to English per field."""
+    if language not in LANGUAGES:
+        language = "en"
+    mapped = {'id': str(scheme.id)}
+    for field in SCHEME_TEXT_FIELDS:
+        mapped[field] = getattr(scheme, f"{field}_{language}") or getattr(scheme, f"{field}_en")
+    mapped.update({
+        'application_url': scheme.application_url,
+        'category': scheme.category,
+        'is_active': scheme.is_active,
+        'priority': scheme.priority,
+        'scheme_metadata': scheme.scheme_metadata,
+        'created_at': scheme.created_at.isoformat(),
+        'updated_at': scheme.updated_at.isoformat(),
+    })
+    return mapped
+
 
 @router.get("/", response_model=List[Dict])
 async def get_schemes(
     language: str = Query(default="en", description="Language code (en, hi, gu)"),
     category: Optional[str] = Query(None, description="Filter by category"),
     active_only: bool = Query(True, description="Show only active schemes"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all government schemes.
@@ -43,30 +66,7 @@ async def get_schemes(
         schemes = result.scalars().all()
         
         # Multilingual mapping with fallback
-        lang_map = {
-            'en': {'name': 'name_en', 'description': 'description_en', 'eligibility': 'eligibility_en', 'benefits': 'benefits_en'},
-            'hi': {'name': 'name_hi', 'description': 'description_hi', 'eligibility': 'eligibility_hi', 'benefits': 'benefits_hi'},
-            'gu': {'name': 'name_gu', 'description': 'description_gu', 'eligibility': 'eligibility_gu', 'benefits': 'benefits_gu'},
-        }
-        map_fields = lang_map.get(language, lang_map['en'])
-        
-        mapped_schemes = []
-        for s in schemes:
-            mapped = {
-                'id': str(s.id),
-                'name': getattr(s, map_fields['name']) or s.name_en,
-                'description': getattr(s, map_fields['description']) or s.description_en,
-                'eligibility': getattr(s, map_fields['eligibility']) or s.eligibility_en,
-                'benefits': getattr(s, map_fields['benefits']) or s.benefits_en,
-                'application_url': s.application_url,
-                'category': s.category,
-                'is_active': s.is_active,
-                'priority': s.priority,
-                'scheme_metadata': s.scheme_metadata,
-                'created_at': s.created_at.isoformat(),
-                'updated_at': s.updated_at.isoformat(),
-            }
-            mapped_schemes.append(mapped)
+        mapped_schemes = [localize_scheme(s, language) for s in schemes]
         
         log.info(f"Fetched {len(mapped_schemes)} schemes for language={language}")
         return mapped_schemes
@@ -83,7 +83,7 @@ async def get_schemes(
 async def get_scheme(
     scheme_id: UUID,
     language: str = Query(default="en", description="Language code (en, hi, gu)"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific scheme by ID."""
     try:
@@ -99,29 +99,7 @@ async def get_scheme(
             )
         
         # Multilingual mapping
-        lang_map = {
-            'en': {'name': 'name_en', 'description': 'description_en', 'eligibility': 'eligibility_en', 'benefits': 'benefits_en'},
-            'hi': {'name': 'name_hi', 'description': 'description_hi', 'eligibility': 'eligibility_hi', 'benefits': 'benefits_hi'},
-            'gu': {'name': 'name_gu', 'description': 'description_gu', 'eligibility': 'eligibility_gu', 'benefits': 'benefits_gu'},
-        }
-        map_fields = lang_map.get(language, lang_map['en'])
-        
-        mapped = {
-            'id': str(scheme.id),
-            'name': getattr(scheme, map_fields['name']) or scheme.name_en,
-            'description': getattr(scheme, map_fields['description']) or scheme.description_en,
-            'eligibility': getattr(scheme, map_fields['eligibility']) or scheme.eligibility_en,
-            'benefits': getattr(scheme, map_fields['benefits']) or scheme.benefits_en,
-            'application_url': scheme.application_url,
-            'category': scheme.category,
-            'is_active': scheme.is_active,
-            'priority': scheme.priority,
-            'scheme_metadata': scheme.scheme_metadata,
-            'created_at': scheme.created_at.isoformat(),
-            'updated_at': scheme.updated_at.isoformat(),
-        }
-        
-        return mapped
+        return localize_scheme(scheme, language)
         
     except HTTPException:
         raise
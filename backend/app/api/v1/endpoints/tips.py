@@ -7,12 +7,36 @@ from sqlalchemy import select, or_
 from typing import List, Optional, Dict
 from uuid import UUID
 
-from ....db.base import get_db
+from ....db.base import get_db, get_read_db
 from ....models.tip import Tip
 from ....core.logging import log
 
 router = APIRouter()
 
+# Translated columns, stored as <field>_en / <field>_hi / <field>_gu
+TIP_TEXT_FIELDS = ("title", "description", "content")
+LANGUAGES = ("en", "hi", "gu")
+
+
+def localize_tip(tip: Tip, language: str) -> Dict:
+    """Tip as a response dict in ``language``, falling back to English per field."""
+    if language not in LANGUAGES:
+        language = "en"
+    mapped = {'id': str(tip.id)}
+    for field in TIP_TEXT_FIELDS:
+        mapped[field] = getattr(tip, f"{field}_{language}") or getattr(tip, f"{field}_en")
+    mapped.update({
+        'category': tip.category,
+        'icon': tip.icon,
+        'season': tip.season,
+        'is_active': tip.is_active,
+        'priority': tip.priority,
+        'tip_metadata': tip.tip_metadata,
+        'created_at': tip.created_at.isoformat(),
+        'updated_at': tip.updated_at.isoformat(),
+    })
+    return mapped
+
 
 @router.get("/", response_model=List[Dict])  # Dict to avoid serialization issues
 async def get_tips(
@@ -20,7 +44,7 @@ async def get_tips(
     category: Optional[str] = Query(None, description="Filter by category"),
     season: Optional[str] = Query(None, description="Filter by season"),
     active_only: bool = Query(True, description="Show only active tips"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all farming tips.
@@ -51,30 +75,7 @@ async def get_tips(
         tips = result.scalars().all()
         
         # Multilingual mapping (select language-specific fields, fallback to 'en')
-        lang_map = {
-            'en': {'title': 'title_en', 'description': 'description_en', 'content': 'content_en'},
-            'hi': {'title': 'title_hi', 'description': 'description_hi', 'content': 'content_hi'},
-            'gu': {'title': 'title_gu', 'description': 'description_gu', 'content': 'content_gu'},
-        }
-        map_fields = lang_map.get(language, lang_map['en'])
-        
-        mapped_tips = []
-        for t in tips:
-            mapped = {
-                'id': str(t.id),
-                'title': getattr(t, map_fields['title']) or t.title_en,
-                'description': getattr(t, map_fields['description']) or t.description_en,
-                'content': getattr(t, map_fields['content']) or t.content_en,
-                'category': t.category,
-                'icon': t.icon,
-                'season': t.season,
-                'is_active': t.is_active,
-                'priority': t.priority,
-                'tip_metadata': t.tip_metadata,
-                'created_at': t.created_at.isoformat(),
-                'updated_at': t.updated_at.isoformat(),
-            }
-            mapped_tips.append(mapped)
+        mapped_tips = [localize_tip(t, language) for t in tips]
         
         log.info(f"Fetched {len(mapped_tips)} tips for language={language}")
         return mapped_tips
@@ -91,7 +92,7 @@ async def get_tips(
 async def get_tip(
     tip_id: UUID,
     language: str = Query(default="en", description="Language code (en, hi, gu)"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific tip by ID."""
     try:
@@ -107,29 +108,7 @@ async def get_tip(
             )
         
         # Multilingual mapping
-        lang_map = {
-            'en': {'title': 'title_en', 'description': 'description_en', 'content': 'content_en'},
-            'hi': {'title': 'title_hi', 'description': 'description_hi', 'content': 'content_hi'},
-            'gu': {'title': 'title_gu', 'description': 'description_gu', 'content': 'content_gu'},
-        }
-        map_fields = lang_map.get(language, lang_map['en'])
-        
-        mapped = {
-            'id': str(tip.id),
-            'title': getattr(tip, map_fields['title']) or tip.title_en,
-            'description': getattr(tip, map_fields['description']) or tip.description_en,
-            'content': getattr(tip, map_fields['content']) or tip.content_en,
-            'category': tip.category,
-            'icon': tip.icon,
-            'season': tip.season,
-            'is_active': tip.is_active,
-            'priority': tip.priority,
-            'tip_metadata': tip.tip_metadata,
-            'created_at': tip.created_at.isoformat(),
-            'updated_at': tip.updated_at.isoformat(),
-        }
-        
-        return mapped
+        return localize_tip(tip, language)
         
     except HTTPException:
         raise
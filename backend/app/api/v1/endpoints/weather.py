@@ -2,16 +2,22 @@
 Weather API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 
+from ....db.base import get_read_db
 from ....schemas.weather import WeatherAlertResponse, WeatherRequest
 from ....services.weather_service import weather_service
+from ....services.weather_store import weather_store
+from ....services.rate_limiter import UPSTREAM, limit_class
 from ....core.logging import log
 
 router = APIRouter()
 
 
 @router.post("/alerts", response_model=List[WeatherAlertResponse])
+@limit_class(UPSTREAM)
 async def get_weather_alerts(request: WeatherRequest):
     """
     Get weather alerts for a location.
@@ -38,6 +44,7 @@ async def get_weather_alerts(request: WeatherRequest):
 
 
 @router.get("/current")
+@limit_class(UPSTREAM)
 async def get_current_weather(
     location: str = Query(default="Delhi,IN", description="Location (city,country_code)")
 ):
@@ -60,19 +67,44 @@ async def get_current_weather(
 
 
 @router.get("/forecast")
+@limit_class(UPSTREAM)
 async def get_weather_forecast(
     location: str = Query(default="Delhi,IN", description="Location (city,country_code)"),
-    days: int = Query(default=5, ge=1, le=7, description="Number of days to forecast")
+    days: int = Query(default=5, ge=1, le=7, description="Number of days to forecast"),
+    resolution: str = Query(
+        default="3h",
+        pattern="^(3h|daily)$",
+        description="3h for three-hourly points, daily for per-day rollups"
+    ),
+    format: str = Query(
+        default="records",
+        pattern="^(records|columnar)$",
+        description="records for a list of objects, columnar for parallel arrays"
+    )
 ):
     """
     Get weather forecast for a location.
     
     Returns forecast for specified number of days (1-7).
+    
+    - `resolution=daily` returns per-day min/max temperature, total rain,
+      max wind and the dominant description, computed server-side
+    - `format=columnar` returns `{field: [values...]}` instead of a list
+      of objects, which is several times smaller on the wire
     """
     try:
         forecast = await weather_service.get_weather_forecast(location, days)
-        log.info(f"Fetched {days}-day forecast for {location}")
-        return {"location": location, "forecast": forecast}
+        if resolution == "daily":
+            forecast = weather_service.summarize_daily(forecast)
+        if format == "columnar":
+            forecast = weather_service.to_columnar(forecast)
+        log.info(f"Fetched {days}-day forecast for {location} ({resolution}, {format})")
+        return {
+            "location": location,
+            "resolution": resolution,
+            "format": format,
+            "forecast": forecast
+        }
         
     except Exception as e:
         log.error(f"Error getting forecast: {e}", exc_info=True)
@@ -80,3 +112,49 @@ async def get_weather_forecast(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch weather forecast: {str(e)}"
         )
+
+
+@router.get("/history")
+async def get_weather_history(
+    location: str = Query(default="Delhi,IN", description="Location (city,country_code)"),
+    start: Optional[datetime] = Query(None, description="Range start (default: 7 days before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    kind: str = Query(default="current", pattern="^(current|forecast)$", description="Observations or forecast points"),
+    resolution: str = Query(
+        default="auto",
+        pattern="^(auto|raw|hour|day)$",
+        description="raw points, hour/day aggregates, or auto from the range span"
+    ),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get stored weather history for a location.
+    
+    Served from the local observation store, not the upstream API. Older
+    data is only available as hourly or daily aggregates.
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=7)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    
+    try:
+        history = await weather_store.query(db, location, start, end, kind, resolution)
+        log.info(
+            f"Fetched {len(history['points'])} {history['resolution']} history points for {location}"
+        )
+        return history
+        
+    except Exception as e:
+        log.error(f"Error getting weather history: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch weather history: {str(e)}"
+        )
@@ -1,7 +1,7 @@
 """
 Core configuration settings for the application.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
 import os
@@ -28,6 +28,12 @@ class Settings(BaseSettings):
     DB_ECHO: bool = False
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 40
+    DB_QUERY_BUDGET: int = 20  # Statements per request before a warning
+    DB_REPEATED_QUERY_THRESHOLD: int = 5  # Runs of one statement shape per request flagged as N+1
+    DATABASE_REPLICA_URLS: List[str] = []  # Streaming replicas for read-only endpoints (JSON list)
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0  # Replicas further behind the primary get no reads
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: int = 10
+    DB_REPLICA_CHECK_TIMEOUT_SECONDS: float = 2.0
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -54,6 +60,9 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: Optional[str] = None
     AI_PROVIDER: str = "gemini"  # openai or gemini
     
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint; None = api.openai.com
+    GEMINI_API_ENDPOINT: Optional[str] = None  # e.g. http://127.0.0.1:9100 (uses the REST transport)
+    
     OPENAI_MODEL: str = "gpt-4o-mini"
     GEMINI_MODEL: str = "gemini-2.0-flash-exp"
     MAX_TOKENS: int = 2000
@@ -63,14 +72,79 @@ class Settings(BaseSettings):
     WEATHER_API_KEY: Optional[str] = None
     WEATHER_API_URL: str = "https://api.openweathermap.org/data/2.5"
     DEFAULT_LOCATION: str = "Delhi,IN"
+    WEATHER_TIMEZONE: str = "Asia/Kolkata"  # local days for forecasts without a reported offset
+    
+    # Weather observation store
+    WEATHER_STORE_ENABLED: bool = True
+    WEATHER_RAW_RETENTION_DAYS: int = 14
+    WEATHER_HOURLY_RETENTION_DAYS: int = 90
+    WEATHER_DAILY_RETENTION_DAYS: int = 730
+    WEATHER_DOWNSAMPLE_INTERVAL_MINUTES: int = 60
+    
+    # Crop-weather advisories
+    ADVISORY_ENABLED: bool = True
+    ADVISORY_REFRESH_HOURS: int = 3
+    ADVISORY_CONCURRENCY: int = 4
+    ADVISORY_DISTRICTS: List[str] = [
+        "Ahmedabad,IN", "Amreli,IN", "Bhavnagar,IN", "Jamnagar,IN", "Junagadh,IN",
+        "Mehsana,IN", "Rajkot,IN", "Surat,IN", "Vadodara,IN", "Delhi,IN"
+    ]
+    ADVISORY_HEAVY_RAIN_MM: float = 10.0
+    ADVISORY_HEAT_CELSIUS: float = 38.0
+    ADVISORY_WIND_MPS: float = 10.0
+    
+    # Mandi API (data.gov.in AGMARKNET)
+    DATA_GOV_IN_API_KEY: Optional[str] = None
+    AGMARKNET_API_URL: str = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+    MANDI_CACHE_TTL_MINUTES: int = 60
+    MANDI_REGION_PREFERENCE: List[str] = ["Gujarat", "India"]  # Priority order; "India" = no state filter
+    MANDI_BATCH_CONCURRENCY: int = 4  # Upstream refreshes in flight per batch request
+    MANDI_NEAREST_CACHE_SECONDS: int = 300  # Price snapshot age for nearest-market recommendations
+    PRICE_ALERT_RELOAD_SECONDS: int = 60  # How often each worker reloads alert subscriptions
+    MANDI_SYNC_ENABLED: bool = False
+    MANDI_SYNC_INTERVAL_HOURS: int = 6
+    MANDI_SYNC_PAGE_SIZE: int = 1000
+    MANDI_SYNC_CONCURRENCY: int = 4
+    
+    # Upstream resilience
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_SLOW_CALL_SECONDS: float = 5.0
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0
+    UPSTREAM_MAX_RETRIES: int = 2
+    UPSTREAM_RETRY_BASE_DELAY: float = 0.2
+    UPSTREAM_MAX_RETRY_AFTER_SECONDS: float = 2.0  # Longest 429 Retry-After a call waits out; longer ones fail it
+    RETRY_BUDGET_RATIO: float = 0.2
+    NEGATIVE_CACHE_TTL_SECONDS: float = 300.0
+    
+    # data.gov.in quota (per worker process)
+    AGMARKNET_RATE_PER_SECOND: float = 2.0
+    AGMARKNET_BURST: int = 10
+    AGMARKNET_DAILY_QUOTA: int = 0  # 0 = no daily cap
+    AGMARKNET_BACKGROUND_RESERVE: float = 0.2  # Share of the daily quota background sync may not use
+    AGMARKNET_QUOTA_MAX_WAIT_SECONDS: float = 2.0  # Interactive wait before serving stored data instead
     
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 20
+    RATE_LIMIT_PER_MINUTE: int = 20  # Chat (LLM) requests per client
+    RATE_LIMIT_UPSTREAM_PER_MINUTE: int = 60  # Endpoints that may call data.gov.in / OpenWeather
+    RATE_LIMIT_CATALOG_PER_MINUTE: int = 300  # Everything else under the API prefix
+    RATE_LIMIT_BURST: int = 5  # Requests allowed above the steady rate
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # Key on X-Forwarded-For (only behind a trusted proxy)
     RATE_LIMIT_ENABLED: bool = True
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
+    LOG_FORMAT: str = "json"  # Console output: json or text (the file is always JSON)
+    LOG_ENQUEUE: bool = True  # Write from a background thread instead of the caller
+    LOG_QUEUE_MAX_LINES: int = 100000  # Lines beyond this are dropped while the writer catches up
+    LOG_SAMPLING: Dict[str, float] = {}  # Logger prefix -> share of sub-WARNING records kept
+    
+    # Profiling
+    PROFILING_ENABLED: bool = True  # Time SQL and upstream calls per request; keep slow requests
+    PROFILING_SLOW_MS: float = 500.0  # Requests at least this slow are captured
+    PROFILING_SAMPLE_RATE: float = 0.0  # Share of requests stack-profiled without an X-Profile token
+    PROFILING_INTERVAL_MS: float = 5.0  # Stack sampling interval
+    PROFILING_BUFFER_SIZE: int = 50  # Captured requests kept (per worker)
     
     # Security
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
@@ -1,10 +1,157 @@
 """
 Logging configuration using loguru.
+
+With LOG_ENQUEUE the calling thread only filters and formats a record and
+puts the line on an in-process queue; a background thread does the
+writes, file rotation and zip compression, so slow disks or a slow stdout
+consumer never stall the event loop. (loguru's own ``enqueue=True`` pickles
+every record through a multiprocessing pipe, which costs the caller more
+than a direct write.) Records are JSON lines carrying the current request id.
 """
+import atexit
+import copy
+import json
+import os
+import queue
+import random
 import sys
+import threading
+import traceback
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
 from loguru import logger
 from .config import settings
 
+# Set per request by the request-id middleware; "-" outside requests
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Levels at or above this are never sampled out (WARNING)
+SAMPLING_EXEMPT_LEVEL = 30
+
+# Logger name -> keep rate, resolved from LOG_SAMPLING by longest prefix
+_sample_rates: Dict[str, Optional[float]] = {}
+
+
+def _sample_rate(name: str) -> Optional[float]:
+    """Keep rate for a logger (module) name, or None if it isn't sampled."""
+    if name not in _sample_rates:
+        matches = [
+            prefix for prefix in settings.LOG_SAMPLING
+            if name == prefix or name.startswith(prefix + ".")
+        ]
+        _sample_rates[name] = settings.LOG_SAMPLING[max(matches, key=len)] if matches else None
+    return _sample_rates[name]
+
+
+def _sampled(record: Dict[str, Any]) -> bool:
+    """Keep all WARNING+ records, and a share of the rest from loggers listed in LOG_SAMPLING."""
+    if record["level"].no >= SAMPLING_EXEMPT_LEVEL:
+        return True
+    rate = _sample_rate(record["name"] or "")
+    return rate is None or random.random() < rate
+
+
+def _patch_record(record: Dict[str, Any]) -> None:
+    extra = record["extra"]
+    extra.setdefault("request_id", request_id_var.get())
+    # Decided once per record so every sink keeps the same lines
+    extra["_sampled"] = _sampled(record)
+
+
+def _sampling_filter(record: Dict[str, Any]) -> bool:
+    return record["extra"].get("_sampled", True)
+
+
+def _json_format(record: Dict[str, Any]) -> str:
+    """One JSON object per line; extra fields passed to ``log.bind`` are included."""
+    extra = record["extra"]
+    # Both sinks share the record, so the line is serialized once
+    if "_json" not in extra:
+        payload = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "logger": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "message": record["message"],
+        }
+        payload.update((key, value) for key, value in extra.items() if not key.startswith("_"))
+        if record["exception"] is not None:
+            payload["exception"] = "".join(traceback.format_exception(*record["exception"]))
+        extra["_json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+class LogWriter:
+    """
+    Background thread that writes queued log lines.
+
+    ``sink(write)`` wraps a write function as a loguru sink that only queues
+    the line. If the queue holds LOG_QUEUE_MAX_LINES lines (the writer can't
+    keep up) new lines are dropped and counted rather than growing memory.
+    Before ``start`` and after ``stop`` lines are written directly.
+    """
+
+    def __init__(self, max_lines: int):
+        self.max_lines = max_lines
+        self.dropped = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def sink(self, write: Callable[[str], None]) -> Callable[[str], None]:
+        def enqueue(message: str) -> None:
+            if self._thread is None:
+                write(message)
+            elif self._queue.qsize() < self.max_lines:
+                self._queue.put((write, str(message)))
+            else:
+                self.dropped += 1
+        return enqueue
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out queued lines and stop the thread."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        reported = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            write, line = item
+            try:
+                write(line)
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+            if self.dropped != reported and self._queue.empty():
+                sys.stderr.write(f"log queue full: dropped {self.dropped - reported} lines\n")
+                reported = self.dropped
+
+    def _after_fork(self) -> None:
+        # The thread doesn't survive a fork; the child starts its own
+        self._queue = queue.SimpleQueue()
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+
+log_writer = LogWriter(settings.LOG_QUEUE_MAX_LINES)
+atexit.register(log_writer.stop)
+
+
+def _write_stdout(line: str) -> None:
+    sys.stdout.write(line)
+    sys.stdout.flush()
+
 
 def setup_logging():
     """Configure logging for the application."""
@@ -12,24 +159,49 @@ def setup_logging():
     # Remove default logger
     logger.remove()
     
-    # Add console logger
-    logger.add(
-        sys.stdout,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level=settings.LOG_LEVEL,
-        colorize=True,
+    # Independent logger that owns the log file (rotation, retention,
+    # compression); it receives lines that are already formatted
+    file_logger = copy.deepcopy(logger)
+    file_logger.add(
+        settings.LOG_FILE,
+        format="{message}",
+        level=0,
+        rotation="10 MB",
+        retention="30 days",
+        compression="zip",
     )
+    write_file = file_logger.opt(raw=True).info
+    
+    logger.configure(patcher=_patch_record)
+    
+    # Add console logger
+    if settings.LOG_FORMAT == "json":
+        logger.add(
+            log_writer.sink(_write_stdout),
+            format=_json_format,
+            level=settings.LOG_LEVEL,
+            filter=_sampling_filter,
+        )
+    else:
+        logger.add(
+            log_writer.sink(_write_stdout),
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | {extra[request_id]} | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+            level=settings.LOG_LEVEL,
+            colorize=True,
+            filter=_sampling_filter,
+        )
     
     # Add file logger
     logger.add(
-        settings.LOG_FILE,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+        log_writer.sink(write_file),
+        format=_json_format,
         level=settings.LOG_LEVEL,
-        rotation="10 MB",
-        retention="30 days",
-        compression="zip",
+        filter=_sampling_filter,
     )
     
+    if settings.LOG_ENQUEUE:
+        log_writer.start()
+    
     return logger
 
 
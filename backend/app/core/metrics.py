@@ -0,0 +1,139 @@
+"""
+Prometheus metrics.
+
+Request, upstream and LLM metrics are recorded as they happen; connection
+pool gauges are read from the engine only when ``/metrics`` is scraped, so
+they cost nothing per request.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator, Iterable, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+from .profiling import record_upstream
+
+# Latency buckets (seconds) for our own endpoints and for upstream APIs
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+
+upstream_request_seconds = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to upstream APIs (one observation per attempt)",
+    ["upstream", "outcome"],  # outcome: ok, error, cancelled
+    buckets=UPSTREAM_BUCKETS,
+)
+
+upstream_errors = Counter(
+    "upstream_errors_total",
+    "Failed upstream calls by error type",
+    ["upstream", "error"],
+)
+
+db_query_seconds = Histogram(
+    "db_query_duration_seconds",
+    "Latency of single SQL statements",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+db_queries_per_request = Histogram(
+    "http_request_db_queries",
+    "SQL statements run per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+db_seconds_per_request = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["route"],
+    buckets=REQUEST_BUCKETS,
+)
+
+db_query_budget_exceeded = Counter(
+    "db_query_budget_exceeded_total",
+    "Requests that ran more SQL statements than DB_QUERY_BUDGET",
+    ["route"],
+)
+
+db_repeated_queries = Counter(
+    "db_repeated_queries_total",
+    "Requests that ran one statement shape DB_REPEATED_QUERY_THRESHOLD+ times (likely N+1)",
+    ["route"],
+)
+
+db_read_sessions = Counter(
+    "db_read_sessions_total",
+    "Sessions handed to read-only endpoints",
+    ["target"],  # target: replica, primary
+)
+
+llm_tokens = Counter(
+    "llm_tokens_total",
+    "LLM tokens used",
+    ["provider", "model", "kind"],  # kind: prompt, completion
+)
+
+
+@contextmanager
+def track_upstream(name: str) -> Iterator[None]:
+    """Time one call to an upstream that doesn't go through ``resilience.Upstream``."""
+    started = time.monotonic()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        outcome = "error"
+        upstream_errors.labels(name, type(e).__name__).inc()
+        raise
+    finally:
+        elapsed = time.monotonic() - started
+        upstream_request_seconds.labels(name, outcome).observe(elapsed)
+        record_upstream(name, elapsed, outcome)
+
+
+def count_tokens(provider: str, model: str, prompt: Optional[int], completion: Optional[int]) -> None:
+    """Add one LLM call's token usage; missing counts are skipped."""
+    if prompt:
+        llm_tokens.labels(provider, model, "prompt").inc(prompt)
+    if completion:
+        llm_tokens.labels(provider, model, "completion").inc(completion)
+
+
+class PoolCollector:
+    """Reads SQLAlchemy connection pool counters at scrape time."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        pool = self.engine.sync_engine.pool
+        for name, doc, value in (
+            ("db_pool_size", "Configured pool size", pool.size()),
+            ("db_pool_checked_out", "Connections currently checked out", pool.checkedout()),
+            ("db_pool_checked_in", "Idle connections in the pool", pool.checkedin()),
+            ("db_pool_overflow", "Connections open beyond the pool size", max(0, pool.overflow())),
+        ):
+            yield GaugeMetricFamily(name, doc, value=value)
+
+
+def register_pool_metrics(engine) -> None:
+    """Export pool gauges for ``engine``; call once at startup."""
+    REGISTRY.register(PoolCollector(engine))
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
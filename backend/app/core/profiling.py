@@ -0,0 +1,238 @@
+"""
+Per-request profiling and slow-request capture.
+
+Every request carries a ``RequestProfile`` in a context variable; the SQL
+hooks in ``app.db.query_stats`` and upstream calls append their timings to
+it, which costs a list append each. A profiled request additionally has its call stack sampled:
+while any profiled request is in flight, a SIGALRM interval timer fires
+every PROFILING_INTERVAL_MS and the handler, which runs on the event loop
+thread in the context of whichever task was executing, counts the
+interrupted stack in that task's profile. Idle time and other requests'
+work are not attributed to it.
+
+Requests are profiled when they carry a valid signed ``X-Profile`` token or
+are picked by PROFILING_SAMPLE_RATE. Profiled requests and any request
+slower than PROFILING_SLOW_MS are kept in a bounded ring buffer, shown by
+the admin endpoints.
+"""
+import hashlib
+import hmac
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+from .logging import log
+
+# Per-request caps, so one runaway request can't hold unbounded memory
+MAX_EVENTS = 500
+MAX_STATEMENT_CHARS = 1000
+MAX_STACK_DEPTH = 64
+
+# Token scopes
+PROFILE_SCOPE = "profile"
+ADMIN_SCOPE = "admin"
+
+
+class RequestProfile:
+    """Timings collected for one request; times are ms from the request start."""
+
+    def __init__(self, request_id: str, method: str, path: str, sample_stacks: bool):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.sample_stacks = sample_stacks
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.queries: List[Tuple[float, float, str]] = []  # (start, duration, statement)
+        self.upstreams: List[Tuple[float, float, str, str]] = []  # (start, duration, upstream, outcome)
+        self.stacks: Counter = Counter()  # Folded stack -> samples
+        self.dropped_events = 0
+        self._started = time.perf_counter()
+
+    def _offset_ms(self, seconds: float) -> float:
+        """Start of an event that just ended after ``seconds``."""
+        return (time.perf_counter() - seconds - self._started) * 1000
+
+    def add_query(self, statement: str, seconds: float) -> None:
+        if len(self.queries) >= MAX_EVENTS:
+            self.dropped_events += 1
+            return
+        self.queries.append((self._offset_ms(seconds), seconds * 1000, statement[:MAX_STATEMENT_CHARS]))
+
+    def add_upstream(self, name: str, seconds: float, outcome: str) -> None:
+        if len(self.upstreams) >= MAX_EVENTS:
+            self.dropped_events += 1
+            return
+        self.upstreams.append((self._offset_ms(seconds), seconds * 1000, name, outcome))
+
+    def finish(self, status_code: int) -> None:
+        self.status = status_code
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms or 0, 2),
+            "profiled": self.sample_stacks,
+            "queries": len(self.queries),
+            "db_ms": round(sum(duration for _, duration, _ in self.queries), 2),
+            "upstream_calls": len(self.upstreams),
+            "upstream_ms": round(sum(duration for _, duration, _, _ in self.upstreams), 2),
+            "samples": sum(self.stacks.values()),
+        }
+
+    def to_dict(self, max_stacks: int = 50) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "sample_interval_ms": settings.PROFILING_INTERVAL_MS,
+            "dropped_events": self.dropped_events,
+            "sql": [
+                {"start_ms": round(start, 2), "duration_ms": round(duration, 2), "statement": statement}
+                for start, duration, statement in self.queries
+            ],
+            "upstream": [
+                {"start_ms": round(start, 2), "duration_ms": round(duration, 2), "upstream": name, "outcome": outcome}
+                for start, duration, name, outcome in self.upstreams
+            ],
+            "stacks": [
+                {"stack": stack, "samples": samples}
+                for stack, samples in self.stacks.most_common(max_stacks)
+            ],
+        }
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {samples}\n" for stack, samples in self.stacks.most_common())
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def record_query(statement: str, seconds: float) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_query(statement, seconds)
+
+
+def record_upstream(name: str, seconds: float, outcome: str) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_upstream(name, seconds, outcome)
+
+
+def sign_token(scope: str, ttl_seconds: int) -> str:
+    """Token for the X-Profile (scope "profile") or X-Admin-Token (scope "admin") header."""
+    payload = f"{scope}.{int(time.time()) + ttl_seconds}"
+    return f"{payload}.{_signature(payload)}"
+
+
+def verify_token(token: Optional[str], scope: str) -> bool:
+    """Whether ``token`` was signed with SECRET_KEY for ``scope`` and hasn't expired."""
+    try:
+        token_scope, expires, signature = (token or "").split(".")
+        if token_scope != scope or int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(signature, _signature(f"{token_scope}.{expires}"))
+
+
+def _signature(payload: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+class StackSampler:
+    """
+    SIGALRM sampling profiler, running only while profiled requests are active.
+
+    Needs the event loop on the main thread (as under uvicorn) and a Unix
+    ``setitimer``; elsewhere profiles have SQL and upstream timings only.
+    """
+
+    def __init__(self):
+        self._active = 0
+        self._installed = False
+        self._available: Optional[bool] = None
+        self._labels: Dict[Any, str] = {}
+
+    def start(self) -> bool:
+        if not self._install():
+            return False
+        self._active += 1
+        if self._active == 1:
+            interval = settings.PROFILING_INTERVAL_MS / 1000
+            signal.setitimer(signal.ITIMER_REAL, interval, interval)
+        return True
+
+    def stop(self) -> None:
+        self._active -= 1
+        if self._active == 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    def _install(self) -> bool:
+        if self._available is None:
+            self._available = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+            if not self._available:
+                log.warning("Stack sampling needs the main thread on a Unix system; profiles will have no stacks")
+        if self._available and not self._installed:
+            signal.signal(signal.SIGALRM, self._on_signal)
+            # Restart interrupted system calls instead of failing them with EINTR
+            signal.siginterrupt(signal.SIGALRM, False)
+            self._installed = True
+        return self._available
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in sys.path:
+                if prefix and filename.startswith(prefix):
+                    filename = filename[len(prefix):].lstrip("/")
+                    break
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+        return label
+
+    def _on_signal(self, signum, frame) -> None:
+        profile = current_profile.get()
+        if profile is None or not profile.sample_stacks:
+            return
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        profile.stacks[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """Ring buffer of the most recent profiled or slow requests."""
+
+    def __init__(self, size: int):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles.append(profile)
+
+    def recent(self) -> List[RequestProfile]:
+        """Newest first."""
+        return list(reversed(self._profiles))
+
+    def get(self, request_id: str) -> Optional[RequestProfile]:
+        for profile in reversed(self._profiles):
+            if profile.request_id == request_id:
+                return profile
+        return None
+
+
+stack_sampler = StackSampler()
+profile_store = ProfileStore(settings.PROFILING_BUFFER_SIZE)
@@ -1,11 +1,14 @@
 """
 Database configuration and session management.
 """
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from typing import AsyncGenerator
 from ..core.config import settings
 from ..core.logging import log
+from ..core.metrics import db_read_sessions
+from .replicas import ReplicaPool
 
 # Create async engine
 engine = create_async_engine(
@@ -25,6 +28,13 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read replicas (optional); sessions bind to a replica engine per request
+replicas = ReplicaPool(
+    settings.DATABASE_REPLICA_URLS,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_timeout=settings.DB_REPLICA_CHECK_TIMEOUT_SECONDS,
+)
+
 # Create declarative base
 Base = declarative_base()
 
@@ -32,9 +42,15 @@ Base = declarative_base()
 from app.models.scheme import Scheme
 from app.models.tip import Tip
 from app.models.weather import WeatherAlert
+from app.models.weather_observation import WeatherObservation, WeatherObservationRollup
 from app.models.conversation import Conversation, Message
+from app.models.advisory import CropAdvisory
 # --- 1. THIS IS THE NEW LINE YOU MUST ADD ---
 from app.models.mandi_price import MandiPriceCache
+from app.models.mandi_rollup import MandiMarketDaily, MandiStateDaily
+from app.models.mandi_market_location import MandiMarketLocation
+from app.models.price_alert import PriceAlertSubscription, PriceAlertEvent
+from app.models.ingest_checkpoint import IngestCheckpoint
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -56,6 +72,37 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints: a session on a healthy replica.
+    
+    Falls back to the primary when no replica is configured or healthy, or
+    when the chosen replica can't be reached. Don't use it where a request
+    must see its own or the caller's recent writes (replicas lag); those
+    stay on ``get_db``.
+    """
+    replica = replicas.choose()
+    session = AsyncSessionLocal(bind=replica.engine) if replica else AsyncSessionLocal()
+    if replica is not None:
+        try:
+            # Connect up front so an unreachable replica falls back to the primary
+            await session.connection()
+        except (SQLAlchemyError, OSError) as e:
+            replica.mark_down(f"connect failed: {e!r}")
+            await session.close()
+            session = AsyncSessionLocal()
+            replica = None
+    db_read_sessions.labels("replica" if replica else "primary").inc()
+    
+    async with session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            log.error(f"Database session error: {e}")
+            raise
+
+
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
@@ -66,5 +113,6 @@ async def init_db():
 async def close_db():
     """Close database connections."""
     await engine.dispose()
+    await replicas.dispose()
     log.info("Database connections closed")
 
@@ -0,0 +1,86 @@
+"""
+SQL statement instrumentation.
+
+Engine cursor hooks time every statement and attribute it to the current
+request: query count, total DB time and how often each statement
+fingerprint (the SQL with literals and parameters replaced by ``?``) ran.
+The same fingerprint running many times in one request is the signature
+of an N+1 query, e.g. a lazy relationship loaded once per row.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+from ..core.metrics import db_query_seconds
+from ..core.profiling import record_query
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAMETER = re.compile(
+    r"\$\d+(?:::(?:TIMESTAMP WITH(?:OUT)? TIME ZONE|\w+(?:\(\d+(?:, ?\d+)?\))?)(?:\[\])?)?"  # asyncpg, with cast
+    r"|%\(\w+\)s|%s|(?<!:):\w+"
+)
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\?(?:, \?)*\)")
+_REPEATED_GROUP = re.compile(r"(\(\?\))(?:, \(\?\))+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals and bind parameters become ?, lists collapse to (?)."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _PARAMETER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(?)", shape)
+    return _REPEATED_GROUP.sub(r"\1", shape)
+
+
+class QueryStats:
+    """Statements run on behalf of one request."""
+
+    __slots__ = ("count", "seconds", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints run at least ``threshold`` times, most frequent first."""
+        return [(shape, count) for shape, count in self.fingerprints.most_common() if count >= threshold]
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Attribute every statement run on ``engine`` to the current request."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        db_query_seconds.observe(seconds)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.add(statement, seconds)
+        record_query(statement, seconds)
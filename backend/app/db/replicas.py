@@ -0,0 +1,129 @@
+"""
+Read replicas.
+
+Read-only requests can take their session from a streaming replica instead
+of the primary. Replicas are picked round-robin among those that passed
+the last health check: reachable, streaming WAL from the primary, and
+replaying within DB_REPLICA_MAX_LAG_SECONDS of it. Until the first check, and
+whenever no replica qualifies, reads go to the primary.
+"""
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from ..core.config import settings
+from ..core.logging import log
+
+# Whether the replica is streaming from the primary, and its replay lag in
+# seconds. Lag is 0 when the replica has replayed everything it received (an
+# idle primary would otherwise look like a lagging replica), which only means
+# it is current while WAL is still arriving: a replica whose WAL receiver has
+# disconnected replays everything it has and then falls behind unseen. Without
+# pg_read_all_stats (or pg_monitor) the receiver's status reads NULL, so a
+# running receiver counts as streaming. Lag is NULL on a replica that has
+# replayed nothing yet.
+_LAG_QUERY = text(
+    "SELECT NOT pg_is_in_recovery() OR EXISTS ("
+    "SELECT 1 FROM pg_stat_wal_receiver WHERE status IS NULL OR status = 'streaming'), "
+    "CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    """One replica engine and what its last health check found."""
+
+    def __init__(self, url: str, connect_timeout: float):
+        parsed = make_url(url)
+        host = parsed.host or parsed.query.get("host", "localhost")  # ?host= for Unix sockets
+        self.name = f"{host}:{parsed.port or 5432}/{parsed.database}"
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            # Give up quickly on a dead replica; the request falls back to the primary
+            connect_args={"timeout": connect_timeout},
+        )
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def mark_down(self, error: str) -> None:
+        if self.healthy:
+            log.warning(f"Read replica {self.name} taken out of rotation: {error}")
+        self.healthy = False
+        self.error = error
+
+
+class ReplicaPool:
+    """Health-checked, round-robin choice among the configured replicas."""
+
+    def __init__(self, urls: List[str], max_lag_seconds: float, check_timeout: float):
+        self.replicas = [Replica(url, check_timeout) for url in urls]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_timeout = check_timeout
+        self._counter = itertools.count()
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        return [replica.engine for replica in self.replicas]
+
+    def choose(self) -> Optional[Replica]:
+        """Next healthy replica in rotation, or None to use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check(self) -> None:
+        """Measure every replica's lag and update which ones take reads."""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as conn:
+                    streaming, lag = (await conn.execute(_LAG_QUERY)).one()
+        except Exception as e:
+            replica.mark_down(f"health check failed: {e!r}")
+            replica.lag_seconds = None
+        else:
+            lag = replica.lag_seconds = None if lag is None else float(lag)
+            if not streaming:
+                replica.mark_down("not streaming from the primary")
+            elif lag is None:
+                replica.mark_down("no WAL replayed yet")
+            elif lag > self.max_lag_seconds:
+                replica.mark_down(f"lagging {lag:.1f}s (limit {self.max_lag_seconds:.0f}s)")
+            else:
+                if not replica.healthy:
+                    log.info(f"Read replica {replica.name} in rotation (lag {lag:.1f}s)")
+                replica.healthy = True
+                replica.error = None
+        replica.checked_at = time.time()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Replica states for health reporting."""
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": None if replica.lag_seconds is None else round(replica.lag_seconds, 2),
+                "error": replica.error,
+                "checked_at": replica.checked_at,
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
@@ -1,22 +1,37 @@
 """
 Main FastAPI application.
 """
+import asyncio
 from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
 from .core.config import settings
-from .core.logging import log
-from .db.base import init_db, close_db
+from .core.logging import log, log_writer
+from .core import metrics
+from .db.base import engine, replicas, init_db, close_db
+from .db.query_stats import instrument_engine
 from .api.v1 import api_router
 from .api.v1.endpoints import mandi as mandi_router
+from .services.resilience import openweather_upstream, agmarknet_upstream
+from .services import scheduler
+from .services.ai_service import init_ai_service, close_ai_service
+from .services.weather_store import weather_store
+from .services.advisory_service import advisory_service
+from .services.mandi_ingest import agmarknet_ingestor
+from .services.rate_limiter import rate_limiter
 from .middleware import (
-    error_handler_middleware,
+    ErrorHandlerMiddleware,
     validation_exception_handler,
-    database_exception_handler
+    database_exception_handler,
+    RateLimitMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    QueryStatsMiddleware,
+    RequestIdMiddleware
 )
 
 
@@ -32,12 +47,52 @@ async def lifespan(app: FastAPI):
     await init_db()
     log.info("Database initialized")
     
+    # Provider SDKs load off the event loop so the first chat doesn't pay for them
+    ai_service = init_ai_service()
+    if ai_service:
+        scheduler.spawn_background(asyncio.to_thread(ai_service.warm_up), name="ai_warm_up")
+    
+    # Background maintenance jobs
+    if replicas.replicas:
+        scheduler.start_periodic(
+            "replica_health",
+            settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+            replicas.check
+        )
+    if settings.WEATHER_STORE_ENABLED:
+        scheduler.start_periodic(
+            "weather_downsample",
+            settings.WEATHER_DOWNSAMPLE_INTERVAL_MINUTES * 60,
+            weather_store.downsample,
+            initial_delay=60
+        )
+    if settings.ADVISORY_ENABLED:
+        scheduler.start_periodic(
+            "advisory_build",
+            settings.ADVISORY_REFRESH_HOURS * 3600,
+            advisory_service.build_all,
+            initial_delay=30
+        )
+    if settings.MANDI_SYNC_ENABLED:
+        scheduler.start_periodic(
+            "mandi_sync",
+            settings.MANDI_SYNC_INTERVAL_HOURS * 3600,
+            agmarknet_ingestor.run,
+            initial_delay=10
+        )
+    
     yield
     
     # Shutdown
     log.info("Shutting down application...")
+    await scheduler.stop_all()
+    await rate_limiter.close()
+    await agmarknet_upstream.quota.close()
+    await close_ai_service()
     await close_db()
     log.info("Application shutdown complete")
+    # Write out lines still queued for the background writer
+    log_writer.stop()
 
 
 # Create FastAPI app
@@ -66,17 +121,33 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Setup Native CORS (uses .env settings)
+# Add middleware (the last one added runs first). These are plain ASGI
+# middleware rather than @app.middleware("http") functions, which would run
+# each layer's downstream in its own task and re-stream every response body.
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(ErrorHandlerMiddleware)
+# Setup Native CORS (uses .env settings). Added after the rate limiter and
+# error handler so their 429 and 500 responses carry CORS headers too.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,  # ["http://localhost:5173", "http://localhost:8080"]
     allow_credentials=settings.ALLOWED_CREDENTIALS,
     allow_methods=settings.ALLOWED_METHODS,
     allow_headers=settings.ALLOWED_HEADERS,
+    # Let the browser UI read the rate-limit headers
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
-
-# Add middleware
-app.middleware("http")(error_handler_middleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+# Connection pool gauges, read at scrape time
+metrics.register_pool_metrics(engine)
+# Per-request SQL statistics and profile timings
+instrument_engine(engine)
+for replica_engine in replicas.engines:
+    instrument_engine(replica_engine)
 
 # Add exception handlers
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -109,6 +180,13 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/api/v1/health", tags=["Health"])
 async def api_health_check():
     """API health check endpoint."""
@@ -117,9 +195,17 @@ async def api_health_check():
         "api_version": "v1",
         "services": {
             "database": "connected",
+            "replicas": replicas.snapshot(),
             "ai": settings.AI_PROVIDER,
             "weather": "available" if settings.WEATHER_API_KEY else "mock",
-            "mandi": "available" if settings.DATA_GOV_API_KEY else "mock"
+            "mandi": "available" if settings.DATA_GOV_IN_API_KEY else "unconfigured"
+        },
+        "upstreams": {
+            "openweather": openweather_upstream.breaker.snapshot(),
+            "agmarknet": agmarknet_upstream.breaker.snapshot()
+        },
+        "quotas": {
+            "agmarknet": await agmarknet_upstream.quota.snapshot()
         }
     }
 
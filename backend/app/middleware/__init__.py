@@ -3,14 +3,24 @@ Middleware modules.
 """
 from .cors import setup_cors
 from .error_handler import (
-    error_handler_middleware,
+    ErrorHandlerMiddleware,
     validation_exception_handler,
     database_exception_handler
 )
+from .rate_limit import RateLimitMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .query_stats import QueryStatsMiddleware
+from .request_id import RequestIdMiddleware
 
 __all__ = [
     "setup_cors",
-    "error_handler_middleware",
+    "ErrorHandlerMiddleware",
     "validation_exception_handler",
-    "database_exception_handler"
+    "database_exception_handler",
+    "RateLimitMiddleware",
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "QueryStatsMiddleware",
+    "RequestIdMiddleware"
 ]
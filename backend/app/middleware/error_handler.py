@@ -5,24 +5,51 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from ..core.config import settings
 from ..core.logging import log
 
 
-async def error_handler_middleware(request: Request, call_next):
-    """Global error handler middleware."""
-    try:
-        response = await call_next(request)
-        return response
-    except Exception as exc:
-        log.error(f"Unhandled exception: {exc}", exc_info=True)
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "detail": "Internal server error",
-                "error": str(exc) if settings.DEBUG else "An unexpected error occurred"
-            }
-        )
+class ErrorHandlerMiddleware:
+    """
+    Global error handler middleware.
+    
+    Turns exceptions that escape the app into a 500 JSON response. If the
+    response has already started (e.g. a streaming body failed midway), the
+    status can't change anymore: the error is logged and re-raised so the
+    server drops the connection.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            log.error(f"Unhandled exception: {exc}", exc_info=True)
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={
+                    "detail": "Internal server error",
+                    "error": str(exc) if settings.DEBUG else "An unexpected error occurred"
+                }
+            )
+            await response(scope, receive, send)
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -0,0 +1,48 @@
+"""
+Request metrics middleware.
+"""
+import time
+from typing import Dict, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.metrics import http_request_seconds
+
+# Labelled histogram children; labels() takes a lock and builds a key on every call.
+# Bounded by methods x route templates x status codes.
+_children: Dict[Tuple[str, str, int], object] = {}
+
+
+class MetricsMiddleware:
+    """
+    Record request latency labelled by route template (e.g. /api/v1/tips/{tip_id}).
+
+    The clock stops when the app returns, i.e. after the last body chunk of a
+    streaming response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality
+            key = (scope["method"], route.path if route is not None else "unmatched", status_code)
+            child = _children.get(key)
+            if child is None:
+                child = _children[key] = http_request_seconds.labels(*key)
+            child.observe(time.perf_counter() - started)
@@ -0,0 +1,68 @@
+"""
+Request profiling middleware.
+"""
+import random
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.config import settings
+from ..core.logging import log, request_id_var
+from ..core.profiling import (
+    PROFILE_SCOPE,
+    RequestProfile,
+    current_profile,
+    profile_store,
+    stack_sampler,
+    verify_token,
+)
+
+
+class ProfilingMiddleware:
+    """
+    Collect SQL and upstream timings for every request, keeping slow ones.
+
+    Requests with a valid X-Profile token, or picked by PROFILING_SAMPLE_RATE,
+    also get a stack profile; their response carries X-Profile-Id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        sample_stacks = (
+            verify_token(Headers(scope=scope).get("x-profile"), PROFILE_SCOPE)
+            or random.random() < settings.PROFILING_SAMPLE_RATE
+        )
+        profile = RequestProfile(request_id_var.get(), scope["method"], scope["path"], sample_stacks)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if sample_stacks:
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile.request_id
+            await send(message)
+
+        token = current_profile.set(profile)
+        sampling = sample_stacks and stack_sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if sampling:
+                stack_sampler.stop()
+            current_profile.reset(token)
+            profile.finish(status_code)
+            slow = profile.duration_ms >= settings.PROFILING_SLOW_MS
+            if slow or sample_stacks:
+                profile_store.add(profile)
+            if slow:
+                summary = profile.summary()
+                log.warning(
+                    f"Slow request {profile.method} {profile.path}: {summary['duration_ms']:.0f}ms "
+                    f"({summary['queries']} queries, {summary['db_ms']:.0f}ms DB; "
+                    f"{summary['upstream_calls']} upstream calls, {summary['upstream_ms']:.0f}ms)"
+                )
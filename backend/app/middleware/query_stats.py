@@ -0,0 +1,81 @@
+"""
+Per-request SQL statistics middleware.
+"""
+from typing import Dict, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.config import settings
+from ..core.logging import log
+from ..core.metrics import (
+    db_queries_per_request,
+    db_query_budget_exceeded,
+    db_repeated_queries,
+    db_seconds_per_request,
+)
+from ..db.query_stats import QueryStats, current_query_stats
+
+# Histogram children per route template, as in the metrics middleware
+_children: Dict[str, Tuple[object, object]] = {}
+
+
+class QueryStatsMiddleware:
+    """
+    Count the SQL statements each request runs.
+    
+    Records per-route query count and DB time histograms, and warns when a
+    request runs more than DB_QUERY_BUDGET statements or repeats one
+    statement shape DB_REPEATED_QUERY_THRESHOLD+ times (likely N+1). In DEBUG
+    the counts are also returned as X-DB-* response headers; for a streaming
+    response they only cover the statements run before the body started.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = QueryStats()
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+                headers["X-DB-Repeated-Queries"] = str(len(stats.repeated(settings.DB_REPEATED_QUERY_THRESHOLD)))
+            await send(message)
+        
+        token = current_query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            _record(scope, stats)
+
+
+def _record(scope: Scope, stats: QueryStats) -> None:
+    route = scope.get("route")
+    label = route.path if route is not None else "unmatched"
+    children = _children.get(label)
+    if children is None:
+        children = _children[label] = (db_queries_per_request.labels(label), db_seconds_per_request.labels(label))
+    children[0].observe(stats.count)
+    children[1].observe(stats.seconds)
+    
+    method = scope["method"]
+    if stats.count > settings.DB_QUERY_BUDGET:
+        db_query_budget_exceeded.labels(label).inc()
+        log.warning(
+            f"{method} {label} ran {stats.count} SQL statements "
+            f"(budget {settings.DB_QUERY_BUDGET}, {stats.seconds * 1000:.0f}ms)"
+        )
+    repeated = stats.repeated(settings.DB_REPEATED_QUERY_THRESHOLD)
+    if repeated:
+        db_repeated_queries.labels(label).inc()
+        shape, count = repeated[0]
+        log.warning(
+            f"Possible N+1 in {method} {label}: {len(repeated)} statement shape(s) repeated, "
+            f"most often {count}x: {shape[:300]}"
+        )
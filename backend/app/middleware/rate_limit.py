@@ -0,0 +1,63 @@
+"""
+Rate limiting middleware.
+"""
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.config import settings
+from ..core.logging import log
+from ..services.rate_limiter import rate_limiter, route_class
+
+
+def client_identity(request: Request) -> str:
+    """
+    Client address used as the rate-limit key.
+
+    Behind a reverse proxy (RATE_LIMIT_TRUST_FORWARDED), the first
+    X-Forwarded-For entry is the real client.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Reject requests over their route class's limit with 429 and Retry-After."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        
+        client = client_identity(Request(scope))
+        result = await rate_limiter.check(name, client)
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(max(0, result.remaining)),
+        }
+        if not result.allowed:
+            log.warning(f"Rate limit exceeded for {client} on {name} routes")
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": f"Too many requests. Limit is {result.limit} per minute."},
+                headers={**headers, "Retry-After": str(max(1, round(result.retry_after + 0.5)))}
+            )
+            await response(scope, receive, send)
+            return
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
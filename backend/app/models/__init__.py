@@ -1,15 +1,23 @@
 """
 Database models.
 """
+from .advisory import CropAdvisory
 from .conversation import Conversation, Message
+from .price_alert import PriceAlertSubscription, PriceAlertEvent
 from .scheme import Scheme
 from .tip import Tip
 from .weather import WeatherAlert
+from .weather_observation import WeatherObservation, WeatherObservationRollup
 
 __all__ = [
+    "CropAdvisory",
     "Conversation",
     "Message", 
+    "PriceAlertSubscription",
+    "PriceAlertEvent",
     "Scheme",
     "Tip",
-    "WeatherAlert"
+    "WeatherAlert",
+    "WeatherObservation",
+    "WeatherObservationRollup"
 ]
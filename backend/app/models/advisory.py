@@ -0,0 +1,27 @@
+"""
+Database model for precomputed crop-weather advisories.
+"""
+from sqlalchemy import Column, String, DateTime, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+
+class CropAdvisory(Base):
+    """Advisory cards for one district in one language, rebuilt every forecast cycle."""
+    __tablename__ = "crop_advisories"
+    __table_args__ = (
+        PrimaryKeyConstraint("district", "language"),
+    )
+
+    district = Column(String(100), nullable=False)  # Canonical district key, e.g. "rajkot"
+    language = Column(String(10), nullable=False)  # en, hi, gu
+    location = Column(String(255), nullable=False)  # Location the forecast was fetched for
+    season = Column(String(50), nullable=True)
+    cards = Column(JSONB, nullable=False)  # List of per-day advisory cards
+
+    forecast_cycle = Column(DateTime(timezone=True), nullable=False)  # Start of the cycle it was built for
+    generated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<CropAdvisory {self.district} - {self.language}>"
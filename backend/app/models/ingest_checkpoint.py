@@ -0,0 +1,25 @@
+"""
+Database model for resumable ingestion job checkpoints.
+"""
+from sqlalchemy import Column, String, Integer, Date, DateTime
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+
+class IngestCheckpoint(Base):
+    """Progress of one ingestion job, updated after every committed chunk."""
+    __tablename__ = "ingest_checkpoints"
+
+    job = Column(String(100), primary_key=True)  # e.g. agmarknet_full
+    run_date = Column(Date, nullable=False)  # Dataset day being ingested
+    status = Column(String(20), nullable=False, default="running")  # running, completed, failed
+    next_offset = Column(Integer, nullable=False, default=0)  # First upstream offset not yet stored
+    total = Column(Integer, nullable=True)  # Upstream record count reported at start
+    records_ingested = Column(Integer, nullable=False, default=0)
+    error = Column(String(500), nullable=True)
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<IngestCheckpoint {self.job} {self.run_date} @{self.next_offset}/{self.total}>"
@@ -0,0 +1,27 @@
+"""
+Database model for Mandi market coordinates.
+"""
+from sqlalchemy import Column, String, Float, DateTime, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+
+class MandiMarketLocation(Base):
+    """Where a market (APMC yard) is, for distance-aware recommendations."""
+    __tablename__ = "mandi_market_locations"
+    __table_args__ = (
+        PrimaryKeyConstraint("state", "district", "market"),
+    )
+
+    state = Column(String, nullable=False)
+    district = Column(String, nullable=False)
+    market = Column(String, nullable=False)
+
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    precision = Column(String(20), nullable=False, default="market")  # market, district (centroid fallback)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<MandiMarketLocation {self.market}, {self.district}: {self.latitude},{self.longitude}>"
@@ -1,7 +1,7 @@
 """
 SQLAlchemy model for Mandi Price Cache.
 """
-from sqlalchemy import Column, String, Integer, DateTime, func
+from sqlalchemy import Column, String, Integer, Date, DateTime, Index, UniqueConstraint, func
 from ..db.base import Base  # <-- Imports Base from your new base.py
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
@@ -17,8 +17,19 @@ class MandiPriceCache(Base):
     min_price = Column(Integer)
     max_price = Column(Integer)
     modal_price = Column(Integer, nullable=False)
-    date = Column(String)
-    
+    date = Column(String)  # arrival_date as reported upstream (dd/mm/yyyy)
+    arrival_date = Column(Date, nullable=True)  # Parsed arrival date
+
     # This is the timestamp of when *we* fetched it
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        # One row per market report; upserts key on this
+        UniqueConstraint("state", "district", "market", "commodity", "date", name="uq_mandi_price_report"),
+        # Access paths for the filtered query API, latest reports first
+        Index("ix_mandi_commodity_state_arrival", commodity, state, arrival_date.desc()),
+        Index("ix_mandi_market_arrival", market, arrival_date.desc()),
+        Index("ix_mandi_state_district_arrival", state, district, arrival_date.desc()),
+    )
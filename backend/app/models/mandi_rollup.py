@@ -0,0 +1,51 @@
+"""
+Database models for daily Mandi price rollups.
+"""
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+
+class MandiMarketDaily(Base):
+    """Prices reported by one market for one commodity on one arrival date."""
+    __tablename__ = "mandi_market_daily"
+    __table_args__ = (
+        PrimaryKeyConstraint("commodity", "state", "market", "day"),
+    )
+
+    commodity = Column(String, nullable=False)
+    state = Column(String, nullable=False)
+    market = Column(String, nullable=False)
+    day = Column(Date, nullable=False)  # Arrival date
+
+    min_price = Column(Integer, nullable=True)  # Lowest min_price reported that day (Rs/quintal)
+    max_price = Column(Integer, nullable=True)  # Highest max_price reported that day
+    modal_price = Column(Float, nullable=False)  # Mean of the modal prices reported that day
+    reports = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<MandiMarketDaily {self.commodity} {self.market} {self.day}: {self.modal_price}>"
+
+
+class MandiStateDaily(Base):
+    """Average across a state's markets for one commodity on one arrival date."""
+    __tablename__ = "mandi_state_daily"
+    __table_args__ = (
+        PrimaryKeyConstraint("commodity", "state", "day"),
+    )
+
+    commodity = Column(String, nullable=False)
+    state = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+
+    avg_modal_price = Column(Float, nullable=False)  # Mean of the markets' daily modal prices
+    min_modal_price = Column(Float, nullable=True)
+    max_modal_price = Column(Float, nullable=True)
+    markets = Column(Integer, nullable=False, default=0)  # Markets reporting that day
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<MandiStateDaily {self.commodity} {self.state} {self.day}: {self.avg_modal_price}>"
@@ -0,0 +1,57 @@
+"""
+Database models for Mandi price-threshold alerts.
+"""
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Boolean, Date, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+
+class PriceAlertSubscription(Base):
+    """A user's request to hear when a commodity's modal price at a market crosses a threshold."""
+    __tablename__ = "price_alert_subscriptions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(255), nullable=False, index=True)
+    commodity = Column(String, nullable=False)  # Canonical AGMARKNET name
+    market = Column(String, nullable=False)  # Canonical AGMARKNET name
+    direction = Column(String(10), nullable=False)  # above, below
+    threshold = Column(Float, nullable=False)  # Modal price (Rs/quintal)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_price_alert_commodity_market", commodity, market),
+    )
+
+    def __repr__(self):
+        return f"<PriceAlertSubscription {self.id} {self.commodity}@{self.market} {self.direction} {self.threshold}>"
+
+
+class PriceAlertEvent(Base):
+    """One crossing of a subscription's threshold; clients poll for new ones by id."""
+    __tablename__ = "price_alert_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    subscription_id = Column(Integer, ForeignKey("price_alert_subscriptions.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(255), nullable=False)
+    commodity = Column(String, nullable=False)
+    market = Column(String, nullable=False)
+    state = Column(String, nullable=True)  # State of the report that crossed
+    direction = Column(String(10), nullable=False)
+    threshold = Column(Float, nullable=False)
+    previous_price = Column(Float, nullable=True)  # None when there was no earlier report
+    price = Column(Float, nullable=False)
+    arrival_date = Column(Date, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # One event per crossing, however many workers store the report
+        UniqueConstraint("subscription_id", "arrival_date", "direction", name="uq_price_alert_event_crossing"),
+        # Polling a user's events after the last one seen, oldest first
+        Index("ix_price_alert_event_user", user_id, id),
+    )
+
+    def __repr__(self):
+        return f"<PriceAlertEvent {self.id} sub={self.subscription_id} {self.price}>"
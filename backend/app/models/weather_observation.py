@@ -0,0 +1,61 @@
+"""
+Database models for the weather observation time-series store.
+"""
+from sqlalchemy import Column, String, DateTime, Float, Integer, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+
+class WeatherObservation(Base):
+    """
+    Raw weather point as fetched from OpenWeather.
+
+    Partitioned by month on ``observed_at``; partitions are created on demand
+    by the weather store and dropped once their rows have been downsampled.
+    """
+    __tablename__ = "weather_observations"
+    __table_args__ = (
+        PrimaryKeyConstraint("location", "kind", "observed_at"),
+        {"postgresql_partition_by": "RANGE (observed_at)"},
+    )
+
+    location = Column(String(255), nullable=False)  # Canonical location key, e.g. "delhi,in"
+    kind = Column(String(20), nullable=False)  # current or forecast
+    observed_at = Column(DateTime(timezone=True), nullable=False)  # Valid time of the point
+
+    temperature = Column(Float, nullable=True)
+    humidity = Column(Float, nullable=True)
+    wind_speed = Column(Float, nullable=True)
+    rain = Column(Float, nullable=True)  # mm over the point's interval (1h current, 3h forecast)
+    description = Column(String(100), nullable=True)
+
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<WeatherObservation {self.location} {self.kind} {self.observed_at}>"
+
+
+class WeatherObservationRollup(Base):
+    """Hourly or daily aggregate of weather observations."""
+    __tablename__ = "weather_observation_rollups"
+    __table_args__ = (
+        PrimaryKeyConstraint("location", "kind", "resolution", "bucket"),
+    )
+
+    location = Column(String(255), nullable=False)
+    kind = Column(String(20), nullable=False)
+    resolution = Column(String(10), nullable=False)  # hour or day
+    bucket = Column(DateTime(timezone=True), nullable=False)  # Start of the hour/day (UTC)
+
+    temp_min = Column(Float, nullable=True)
+    temp_max = Column(Float, nullable=True)
+    temp_avg = Column(Float, nullable=True)
+    humidity_avg = Column(Float, nullable=True)
+    wind_max = Column(Float, nullable=True)
+    rain_total = Column(Float, nullable=True)
+    samples = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<WeatherObservationRollup {self.location} {self.resolution} {self.bucket}>"
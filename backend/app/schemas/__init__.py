@@ -10,6 +10,7 @@ from .conversation import (
     ChatResponse,
 )
 from .scheme import SchemeCreate, SchemeUpdate, SchemeResponse
+from .price_alert import PriceAlertCreate
 from .tip import TipCreate, TipUpdate, TipResponse
 from .weather import WeatherAlertResponse, WeatherRequest
 
@@ -23,6 +24,7 @@ __all__ = [
     "SchemeCreate",
     "SchemeUpdate",
     "SchemeResponse",
+    "PriceAlertCreate",
     "TipCreate",
     "TipUpdate",
     "TipResponse",
@@ -0,0 +1,14 @@
+"""
+Pydantic schemas for Mandi price alerts.
+"""
+from pydantic import BaseModel, Field
+from typing import Literal
+
+
+class PriceAlertCreate(BaseModel):
+    """Schema for subscribing to a Mandi price alert."""
+    user_id: str = Field(..., description="User identifier")
+    commodity: str = Field(..., description="Commodity name or alias, e.g. Cotton, Kapas")
+    market: str = Field(..., description="Market (APMC) name or alias, e.g. Rajkot")
+    direction: Literal["above", "below"] = Field(..., description="Fire when the modal price rises above or falls below the threshold")
+    threshold: float = Field(..., gt=0, description="Modal price in Rs/quintal")
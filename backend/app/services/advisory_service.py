@@ -0,0 +1,251 @@
+"""
+Batch pipeline for precomputed crop-weather advisories.
+
+Once per forecast cycle, each configured district's forecast is rolled up
+per day, matched against active tips for the current season, and turned
+into localized advisory cards. Serving an advisory is then a primary-key
+lookup on (district, language). Districts whose forecast could not be
+fetched keep their previous advisory; mock forecasts are never stored.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.logging import log
+from ..db.base import AsyncSessionLocal, engine
+from ..models.advisory import CropAdvisory
+from ..models.tip import Tip
+from .weather_service import weather_service
+from .weather_store import canonical_location
+
+LANGUAGES = ("en", "hi", "gu")
+
+# Session-level advisory lock so only one worker builds at a time
+BUILD_LOCK_KEY = 72_029_001
+
+# Forecast cycles are three-hourly, aligned to 00:00 UTC
+FORECAST_CYCLE_HOURS = 3
+
+# Daily condition -> tip categories worth surfacing, in priority order
+CONDITION_CATEGORIES = {
+    "heavy_rain": ["pest_control", "crop_management"],
+    "heat": ["irrigation", "crop_management"],
+    "wind": ["crop_management"],
+    "normal": ["irrigation", "crop_management", "pest_control"],
+}
+
+CONDITION_HEADLINES = {
+    "heavy_rain": {
+        "en": "Heavy rain expected ({rain} mm). Postpone spraying and irrigation, clear field drainage.",
+        "hi": "भारी बारिश की संभावना ({rain} मिमी)। छिड़काव और सिंचाई टालें, खेत से पानी निकासी सुनिश्चित करें।",
+        "gu": "ભારે વરસાદની શક્યતા ({rain} મિમી). છંટકાવ અને સિંચાઈ મુલતવી રાખો, ખેતરમાં પાણીનો નિકાલ કરો.",
+    },
+    "heat": {
+        "en": "High temperature up to {temp_max}°C. Irrigate in the early morning or evening.",
+        "hi": "{temp_max}°C तक उच्च तापमान। सुबह जल्दी या शाम को सिंचाई करें।",
+        "gu": "{temp_max}°C સુધી ઊંચું તાપમાન. વહેલી સવારે અથવા સાંજે સિંચાઈ કરો.",
+    },
+    "wind": {
+        "en": "Strong winds up to {wind_max} m/s. Avoid spraying and support tall crops.",
+        "hi": "{wind_max} मी/से तक तेज हवाएं। छिड़काव से बचें और ऊंची फसलों को सहारा दें।",
+        "gu": "{wind_max} મી/સે સુધી તેજ પવન. છંટકાવ ટાળો અને ઊંચા પાકને ટેકો આપો.",
+    },
+    "normal": {
+        "en": "Favourable weather, {temp_min}-{temp_max}°C. Good day for routine field work.",
+        "hi": "अनुकूल मौसम, {temp_min}-{temp_max}°C। खेत के नियमित कार्यों के लिए अच्छा दिन।",
+        "gu": "અનુકૂળ હવામાન, {temp_min}-{temp_max}°C. ખેતરના નિયમિત કામ માટે સારો દિવસ.",
+    },
+}
+
+TIPS_PER_CARD = 2
+
+
+def current_season(moment: datetime) -> str:
+    """Map a date to the tip season used in the catalog."""
+    if 3 <= moment.month <= 5:
+        return "summer"
+    if 6 <= moment.month <= 9:
+        return "monsoon"
+    return "winter"
+
+
+def classify_day(day: Dict[str, Any]) -> str:
+    """Pick the dominant farming condition for one daily forecast summary."""
+    if day["rain_total"] >= settings.ADVISORY_HEAVY_RAIN_MM:
+        return "heavy_rain"
+    if day["temp_max"] >= settings.ADVISORY_HEAT_CELSIUS:
+        return "heat"
+    if day["wind_max"] >= settings.ADVISORY_WIND_MPS:
+        return "wind"
+    return "normal"
+
+
+def district_key(location: str) -> str:
+    """Canonical district key for a location string, e.g. "Rajkot,IN" -> "rajkot"."""
+    return canonical_location(location).split(",")[0]
+
+
+def _forecast_cycle(moment: datetime) -> datetime:
+    hour = moment.hour - moment.hour % FORECAST_CYCLE_HOURS
+    return moment.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def _localized_tip(tip: Tip, language: str) -> Dict[str, Any]:
+    return {
+        "id": str(tip.id),
+        "title": getattr(tip, f"title_{language}") or tip.title_en,
+        "description": getattr(tip, f"description_{language}") or tip.description_en,
+        "category": tip.category,
+        "icon": tip.icon,
+    }
+
+
+def build_cards(
+    daily: List[Dict[str, Any]],
+    tips_by_category: Dict[str, List[Tip]],
+    language: str
+) -> List[Dict[str, Any]]:
+    """
+    Build advisory cards for one district in one language.
+
+    Args:
+        daily: Per-day forecast summaries (see WeatherService.summarize_daily)
+        tips_by_category: Active in-season tips grouped by category, by priority
+        language: Language code
+
+    Returns:
+        One card per forecast day
+    """
+    cards = []
+    for day in daily:
+        condition = classify_day(day)
+        headline = CONDITION_HEADLINES[condition].get(language, CONDITION_HEADLINES[condition]["en"])
+
+        tips: List[Dict[str, Any]] = []
+        for category in CONDITION_CATEGORIES[condition]:
+            for tip in tips_by_category.get(category, []):
+                if len(tips) >= TIPS_PER_CARD:
+                    break
+                tips.append(_localized_tip(tip, language))
+
+        cards.append({
+            "date": day["date"],
+            "condition": condition,
+            "headline": headline.format(
+                rain=round(day["rain_total"]),
+                temp_min=round(day["temp_min"]),
+                temp_max=round(day["temp_max"]),
+                wind_max=round(day["wind_max"]),
+            ),
+            "temp_min": day["temp_min"],
+            "temp_max": day["temp_max"],
+            "rain_total": day["rain_total"],
+            "wind_max": day["wind_max"],
+            "description": day["description"],
+            "tips": tips,
+        })
+    return cards
+
+
+class AdvisoryService:
+    """Builds and serves precomputed crop-weather advisories."""
+
+    async def build_all(self, locations: Optional[List[str]] = None) -> int:
+        """
+        Rebuild advisories for every configured district.
+
+        Safe to run from every worker; a Postgres advisory lock lets one of
+        them do the work.
+
+        Args:
+            locations: Location strings to build; defaults to ADVISORY_DISTRICTS
+
+        Returns:
+            Number of (district, language) advisories written
+        """
+        if not weather_service.api_key:
+            log.warning("Weather API key not configured, skipping advisory build")
+            return 0
+
+        async with engine.connect() as lock_conn:
+            locked = await lock_conn.scalar(select(func.pg_try_advisory_lock(BUILD_LOCK_KEY)))
+            if not locked:
+                log.info("Advisory build already running in another worker")
+                return 0
+            try:
+                return await self._build_locked(locations or settings.ADVISORY_DISTRICTS)
+            finally:
+                await lock_conn.execute(select(func.pg_advisory_unlock(BUILD_LOCK_KEY)))
+
+    async def _build_locked(self, locations: List[str]) -> int:
+        now = datetime.now(timezone.utc)
+        season = current_season(now)
+        cycle = _forecast_cycle(now)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Tip)
+                .where(Tip.is_active == True, or_(Tip.season == season, Tip.season == "all"))
+                .order_by(Tip.priority.desc(), Tip.created_at.desc())
+            )
+            tips_by_category: Dict[str, List[Tip]] = {}
+            for tip in result.scalars().all():
+                tips_by_category.setdefault(tip.category, []).append(tip)
+
+        semaphore = asyncio.Semaphore(settings.ADVISORY_CONCURRENCY)
+
+        async def build_rows(location: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                forecast = await weather_service.fetch_forecast(location, days=5)
+            if not forecast:
+                log.warning(f"No forecast for {location}, keeping its previous advisory")
+                return []
+            daily = weather_service.summarize_daily(forecast)
+            return [
+                {
+                    "district": district_key(location),
+                    "language": language,
+                    "location": location,
+                    "season": season,
+                    "cards": build_cards(daily, tips_by_category, language),
+                    "forecast_cycle": cycle,
+                }
+                for language in LANGUAGES
+            ]
+
+        batches = await asyncio.gather(*(build_rows(location) for location in locations))
+        rows = [row for batch in batches for row in batch]
+        if not rows:
+            return 0
+
+        stmt = pg_insert(CropAdvisory).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["district", "language"],
+            set_={
+                "location": stmt.excluded.location,
+                "season": stmt.excluded.season,
+                "cards": stmt.excluded.cards,
+                "forecast_cycle": stmt.excluded.forecast_cycle,
+                "generated_at": func.now(),
+            }
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+        built = sum(1 for batch in batches if batch)
+        log.info(f"Built {len(rows)} advisories for {built}/{len(locations)} districts (cycle {cycle.isoformat()})")
+        return len(rows)
+
+    async def get(self, db: AsyncSession, district: str, language: str) -> Optional[CropAdvisory]:
+        """Look up the stored advisory for a district and language."""
+        return await db.get(CropAdvisory, (district_key(district), language))
+
+
+# Create singleton instance
+advisory_service = AdvisoryService()
@@ -1,11 +1,18 @@
 """
 AI service for chatbot functionality.
+
+The provider SDKs take most of a second to import, so they are imported
+on first use (or by ``warm_up`` in a background thread after startup),
+not when the app is imported. The service itself is built in the app's
+lifespan by ``init_ai_service``; a missing API key disables chat instead
+of stopping the app.
 """
-from typing import List, Dict
-import openai
-import google.generativeai as genai
+import asyncio
+import threading
+from typing import Any, List, Dict, Optional
 from ..core.config import settings
 from ..core.logging import log
+from ..core.metrics import count_tokens, track_upstream
 
 
 class AIService:
@@ -58,30 +65,69 @@ Be conversational, helpful, and deeply knowledgeable. Support farmers with confi
         if self.provider == "openai":
             if not settings.OPENAI_API_KEY:
                 raise ValueError("OpenAI API key is required when using OpenAI provider")
-            openai.api_key = settings.OPENAI_API_KEY
             self.model_name = settings.OPENAI_MODEL
-            log.info(f"Initialized OpenAI with model: {self.model_name}")
             
         elif self.provider == "gemini":
             if not settings.GOOGLE_API_KEY:
                 raise ValueError("Google API key is required when using Gemini provider")
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
-            
             # --- THIS IS THE FIX ---
             # Make sure your .env file has: GEMINI_MODEL=gemini-pro
             # --- END OF FIX ---
             self.model_name = settings.GEMINI_MODEL
-            self.model = genai.GenerativeModel(
-                self.model_name,
-                generation_config=genai.GenerationConfig(
-                    temperature=settings.TEMPERATURE,
-                    max_output_tokens=settings.MAX_TOKENS,
-                )
-            )
-            log.info(f"Initialized Gemini with model: {self.model_name}")
         
         else:
             raise ValueError(f"Unsupported AI provider: {self.provider}")
+        
+        # SDK client (OpenAI) or model (Gemini), built on first use
+        self._client: Any = None
+        self._client_lock = threading.Lock()
+        log.info(f"Configured {self.provider} with model: {self.model_name}")
+    
+    def client(self) -> Any:
+        """The provider's client, importing its SDK the first time."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+    
+    def warm_up(self) -> None:
+        """Import the SDK and build the client ahead of the first chat (blocking)."""
+        self.client()
+    
+    def _build_client(self) -> Any:
+        if self.provider == "openai":
+            from openai import AsyncOpenAI
+            
+            # One client (and connection pool) for the worker's lifetime
+            client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+            log.info(f"Initialized OpenAI with model: {self.model_name}")
+            return client
+        
+        import google.generativeai as genai
+        
+        if settings.GEMINI_API_ENDPOINT:
+            genai.configure(
+                api_key=settings.GOOGLE_API_KEY,
+                transport="rest",
+                client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT}
+            )
+        else:
+            genai.configure(api_key=settings.GOOGLE_API_KEY)
+        model = genai.GenerativeModel(
+            self.model_name,
+            generation_config=genai.GenerationConfig(
+                temperature=settings.TEMPERATURE,
+                max_output_tokens=settings.MAX_TOKENS,
+            )
+        )
+        log.info(f"Initialized Gemini with model: {self.model_name}")
+        return model
+    
+    async def close(self) -> None:
+        """Close the OpenAI client's connections, if one was built."""
+        if self.provider == "openai" and self._client is not None:
+            await self._client.close()
     
     async def generate_response(
         self,
@@ -125,15 +171,15 @@ Be conversational, helpful, and deeply knowledgeable. Support farmers with confi
                 "content": msg.get("content", "")
             })
         
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-
-        response = await client.chat.completions.create(
-            model=self.model_name,
-            messages=formatted_messages,
-            temperature=settings.TEMPERATURE,
-            max_tokens=settings.MAX_TOKENS,
-        )
+        with track_upstream("openai"):
+            response = await self.client().chat.completions.create(
+                model=self.model_name,
+                messages=formatted_messages,
+                temperature=settings.TEMPERATURE,
+                max_tokens=settings.MAX_TOKENS,
+            )
+        if response.usage:
+            count_tokens("openai", self.model_name, response.usage.prompt_tokens, response.usage.completion_tokens)
         
         return response.choices[0].message.content
     
@@ -141,7 +187,7 @@ Be conversational, helpful, and deeply knowledgeable. Support farmers with confi
     # --- THIS IS THE FIXED FUNCTION ---
     # 1. It is now `async def`
     # 2. It builds a proper chat history (`gemini_history`)
-    # 3. It uses `await self.model.generate_content_async`
+    # 3. It uses `await self.client().generate_content_async`
     # ---
     async def _generate_gemini_response(
         self,
@@ -153,13 +199,40 @@ Be conversational, helpful, and deeply knowledgeable. Support farmers with confi
         Generate response using Google Gemini with proper chat history.
         This is the new, corrected version.
         """
+        gemini_history = self._gemini_history(messages, language_instruction, language_code)
+
+        # Call Gemini API asynchronously
+        log.info(f"Sending request to Gemini with {len(gemini_history)} history items.")
+        
+        with track_upstream("gemini"):
+            if settings.GEMINI_API_ENDPOINT:
+                # The SDK's REST transport has no async client; run the blocking call in a thread
+                response = await asyncio.to_thread(self.client().generate_content, gemini_history)
+            else:
+                response = await self.client().generate_content_async(
+                    gemini_history
+                )
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            count_tokens("gemini", self.model_name, usage.prompt_token_count, usage.candidates_token_count)
         
+        log.info("Received response from Gemini.")
+        return response.text
+
+    @classmethod
+    def _gemini_history(
+        cls,
+        messages: List[Dict[str, str]],
+        language_instruction: str,
+        language_code: str = "en"
+    ) -> List[Dict]:
+        """Build the Gemini ``contents`` list: system prompt, a starter reply, then the conversation."""
         gemini_history = []
         
         # Add the system prompt as the first 'user' message
         gemini_history.append({
             'role': 'user',
-            'parts': [self.FARMING_SYSTEM_PROMPT + language_instruction]
+            'parts': [cls.FARMING_SYSTEM_PROMPT + language_instruction]
         })
         
         # Add a "model" response to "set the stage"
@@ -182,18 +255,45 @@ Be conversational, helpful, and deeply knowledgeable. Support farmers with confi
                 'role': role,
                 'parts': [msg.get("content", "")]
             })
+        return gemini_history
 
-        # Call Gemini API asynchronously
-        log.info(f"Sending request to Gemini with {len(gemini_history)} history items.")
-        
-        response = await self.model.generate_content_async(
-            gemini_history
-        )
-        
-        log.info("Received response from Gemini.")
-        return response.text
+
+class AIUnavailableError(Exception):
+    """No usable AI provider (missing API key or unsupported provider)."""
+
+
+# Built by init_ai_service during the app's lifespan
+_ai_service: Optional[AIService] = None
+_ai_error = "AI service is not initialized"
+
+
+def init_ai_service() -> Optional[AIService]:
+    """Create the AI service; logs and returns None if the provider isn't configured."""
+    global _ai_service, _ai_error
+    try:
+        _ai_service = AIService()
+    except ValueError as e:
+        _ai_service = None
+        _ai_error = str(e)
+        log.warning(f"AI chat disabled: {e}")
+    return _ai_service
+
+
+def get_ai_service() -> AIService:
+    """
+    The AI service built at startup.
+    
+    Raises:
+        AIUnavailableError: No provider is configured
+    """
+    if _ai_service is None:
+        raise AIUnavailableError(_ai_error)
+    return _ai_service
 
 
-# Create singleton instance
-ai_service = AIService()
+async def close_ai_service() -> None:
+    global _ai_service
+    if _ai_service is not None:
+        await _ai_service.close()
+        _ai_service = None
 
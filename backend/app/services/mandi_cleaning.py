@@ -0,0 +1,277 @@
+"""
+Columnar cleaning of AGMARKNET price records.
+
+Raw records are read once into column arrays. Each column is dictionary
+encoded first: a daily dump repeats the same few thousand market names,
+prices and dates across ~100k records, so every distinct value is parsed
+or stripped once and the result broadcast back through NumPy integer
+indexing. Validation, de-duplication and top-K selection then run as
+array operations on those codes.
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.logging import log
+
+# Prices above this (Rs/quintal) are treated as data-entry errors
+MAX_VALID_PRICE = 100000
+
+# One stored row per market report; upserts key on this
+UPSERT_KEY = ("state", "district", "market", "commodity", "date")
+
+# One response entry per market
+MARKET_KEY = ("state", "market", "commodity")
+
+# Column order expected by ``PriceColumns.from_tuples``
+COLUMNS = (
+    "state", "district", "market", "commodity", "date",
+    "arrival_date", "min_price", "max_price", "modal_price",
+)
+
+# Sort position for rows without a parsed arrival date (older than any real date)
+UNDATED = -1
+
+
+def parse_arrival_date(value: str) -> Optional[date]:
+    """Parse an AGMARKNET arrival date (dd/mm/yyyy)."""
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_price(value: Any) -> int:
+    """
+    Parse one price such as "2,150" or "2150.00" into whole rupees.
+
+    Returns 0 for missing or unparseable values.
+    """
+    try:
+        return int(float(str(value).replace(",", "").strip()))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def factorize(values: Iterable[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Dictionary-encode a column.
+
+    Returns:
+        (codes, uniques) where ``uniques[codes[i]] == values[i]``; uniques
+        keep first-seen order
+    """
+    index: Dict[Any, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(value, len(index)) for value in values),
+        dtype=np.int64,
+    )
+    return codes, list(index)
+
+
+def map_column(values: Iterable[Any], func: Callable[[Any], Any], dtype=object) -> np.ndarray:
+    """Apply ``func`` to each distinct value once and broadcast the results."""
+    codes, uniques = factorize(values)
+    table = np.empty(len(uniques), dtype=dtype)
+    table[:] = [func(value) for value in uniques]
+    return table[codes]
+
+
+def combine_codes(columns: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Integer code per row, equal exactly for rows that agree on every column.
+
+    Codes are mixed-radix combinations of the per-column codes; they are
+    only re-densified when the next column could overflow int64.
+    """
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    span = 1
+    for column in columns:
+        column_codes, uniques = factorize(column.tolist())
+        if span * len(uniques) >= 2 ** 62:
+            _, codes = np.unique(codes, return_inverse=True)
+            span = int(codes.max()) + 1
+        codes = codes * len(uniques) + column_codes
+        span *= len(uniques)
+    return codes
+
+
+def _strip(value: Any) -> str:
+    return str(value).strip()
+
+
+def _ordinal(value: Optional[date]) -> int:
+    return value.toordinal() if value else UNDATED
+
+
+class PriceColumns:
+    """
+    Mandi price rows held as parallel NumPy arrays.
+
+    Text and date columns are object arrays sharing one Python object per
+    distinct value; prices are int64.
+    """
+
+    def __init__(
+        self,
+        state: np.ndarray,
+        district: np.ndarray,
+        market: np.ndarray,
+        commodity: np.ndarray,
+        date: np.ndarray,
+        arrival_date: np.ndarray,
+        min_price: np.ndarray,
+        max_price: np.ndarray,
+        modal_price: np.ndarray,
+    ):
+        self.state = state
+        self.district = district
+        self.market = market
+        self.commodity = commodity
+        self.date = date  # Arrival date as reported (dd/mm/yyyy)
+        self.arrival_date = arrival_date  # datetime.date, None if unparseable
+        self.min_price = min_price
+        self.max_price = max_price
+        self.modal_price = modal_price
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], commodity: str) -> "PriceColumns":
+        """
+        Parse raw AGMARKNET records, dropping invalid ones.
+
+        Prices are stripped of thousands separators and truncated to whole
+        rupees; missing or implausible min/max fall back to the modal price.
+        Records with no modal price or one above ``MAX_VALID_PRICE`` are dropped.
+        """
+        # The three price columns share most of their distinct strings; parse them together
+        n = len(records)
+        prices = map_column(
+            [record.get(field, "0") for field in ("modal_price", "min_price", "max_price") for record in records],
+            parse_price,
+            np.int64,
+        )
+        modal, min_price, max_price = prices[:n], prices[n:2 * n], prices[2 * n:]
+
+        valid = (modal > 0) & (modal <= MAX_VALID_PRICE)
+        min_price = np.where((min_price > 0) & (min_price <= MAX_VALID_PRICE), min_price, modal)[valid]
+        max_price = np.where((max_price > 0) & (max_price <= MAX_VALID_PRICE), max_price, modal)[valid]
+
+        dropped = len(records) - int(valid.sum())
+        if dropped:
+            log.debug(f"Dropped {dropped} of {len(records)} Mandi records with invalid prices")
+
+        def text(field: str, default: str) -> np.ndarray:
+            return map_column((record.get(field, default) for record in records), _strip)[valid]
+
+        reported = text("arrival_date", "N/A")
+        return cls(
+            state=text("state", ""),
+            district=text("district", ""),
+            market=text("market", "Unknown"),
+            commodity=text("commodity", commodity),
+            date=reported,
+            arrival_date=map_column(reported.tolist(), parse_arrival_date),
+            min_price=min_price,
+            max_price=max_price,
+            modal_price=modal[valid],
+        )
+
+    @classmethod
+    def from_tuples(cls, rows: Sequence[Sequence[Any]]) -> "PriceColumns":
+        """
+        Build columns from row tuples ordered as ``COLUMNS``, e.g. the result
+        of a Core select over those columns of ``mandi_price_cache``.
+        """
+        columns = {}
+        for i, name in enumerate(COLUMNS):
+            if name.endswith("_price"):
+                # NULL min/max become 0 here and fall back to the modal price below
+                columns[name] = np.fromiter((row[i] or 0 for row in rows), dtype=np.int64, count=len(rows))
+            else:
+                columns[name] = np.empty(len(rows), dtype=object)
+                columns[name][:] = [row[i] for row in rows]
+
+        modal = columns["modal_price"]
+        for name in ("min_price", "max_price"):
+            columns[name] = np.where(columns[name] > 0, columns[name], modal)
+        return cls(**columns)
+
+    def __len__(self) -> int:
+        return len(self.modal_price)
+
+    def take(self, index: np.ndarray) -> "PriceColumns":
+        """Rows at the given positions, in that order."""
+        return PriceColumns(**{name: values[index] for name, values in vars(self).items()})
+
+    def dedupe(self, fields: Sequence[str] = UPSERT_KEY) -> "PriceColumns":
+        """Keep the last row for each key, preserving input order."""
+        if not len(self):
+            return self
+        codes = combine_codes([getattr(self, field) for field in fields])
+        _, first_from_end = np.unique(codes[::-1], return_index=True)
+        return self.take(np.sort(len(codes) - 1 - first_from_end))
+
+    def top_latest(self, k: int, fields: Sequence[str] = MARKET_KEY) -> "PriceColumns":
+        """
+        Latest report per key, then the ``k`` highest modal prices.
+
+        Uses a partial sort (``argpartition``) so only the selected rows
+        are fully ordered.
+        """
+        if not len(self):
+            return self
+
+        # Newest first, undated rows last, ties in input order
+        days = map_column(self.arrival_date.tolist(), _ordinal, np.int64)
+        order = np.lexsort((np.arange(len(self)), -days))
+
+        codes = combine_codes([getattr(self, field) for field in fields])
+        _, first = np.unique(codes[order], return_index=True)
+        latest = order[first]
+
+        modal = self.modal_price[latest]
+        if len(latest) > k:
+            selected = np.argpartition(-modal, k - 1)[:k]
+        else:
+            selected = np.arange(len(latest))
+        selected = selected[np.argsort(-modal[selected], kind="stable")]
+        return self.take(latest[selected])
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Row dicts in the shape ``upsert_prices`` and ``to_response`` expect."""
+        return [
+            {
+                "state": state,
+                "district": district,
+                "market": market,
+                "commodity": commodity,
+                "min_price": min_price,
+                "max_price": max_price,
+                "modal_price": modal_price,
+                "date": reported,
+                "arrival_date": arrival_date,
+            }
+            for state, district, market, commodity, min_price, max_price, modal_price, reported, arrival_date
+            in zip(
+                self.state.tolist(),
+                self.district.tolist(),
+                self.market.tolist(),
+                self.commodity.tolist(),
+                self.min_price.tolist(),
+                self.max_price.tolist(),
+                self.modal_price.tolist(),
+                self.date.tolist(),
+                self.arrival_date.tolist(),
+            )
+        ]
+
+
+def clean_records(records: List[Dict[str, Any]], commodity: str) -> PriceColumns:
+    """
+    Parse raw AGMARKNET records into price columns, one row per market report.
+
+    See ``PriceColumns.from_records`` for the validation rules; duplicates of
+    the upsert key keep the last record.
+    """
+    return PriceColumns.from_records(records, commodity).dedupe()
@@ -0,0 +1,423 @@
+"""
+Nearest-best-market recommendations over a geo-catalog of mandis.
+
+Market coordinates from ``mandi_market_locations`` are projected onto the
+unit sphere and held in a static KD-tree whose nodes each cover one
+contiguous slice of the (reordered) points. A query ranks markets by net
+realizable price, ``modal_price - cost_per_km * distance``: every node gets
+an upper bound on the net price of anything inside it (best price in the
+node minus the transport cost to the nearest point of its bounding box),
+and a best-first search stops as soon as no remaining node can beat the
+current top K. Bounds for all nodes are computed in one vectorized step,
+so only the few leaves that can matter are ever scanned.
+"""
+import csv
+import heapq
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.logging import log
+from ..models.mandi_market_location import MandiMarketLocation
+from ..models.mandi_price import MandiPriceCache
+from .mandi_names import commodity_index, normalize_name
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Points per KD-tree leaf; leaves are scanned with NumPy
+LEAF_SIZE = 64
+
+# Only prices reported in this many days count towards a recommendation
+PRICE_LOOKBACK_DAYS = 14
+
+# The catalog changes only when markets are geocoded; reload it this often
+CATALOG_RELOAD_SECONDS = 3600
+
+# Gujarat district headquarters, used for markets without their own
+# coordinates; AGMARKNET's spellings are listed as aliases
+GUJARAT_DISTRICTS = [
+    (("ahmedabad",), (23.0225, 72.5714)),
+    (("amreli",), (21.6032, 71.2221)),
+    (("anand",), (22.5645, 72.9289)),
+    (("aravalli", "arvalli"), (23.4627, 73.2985)),
+    (("banaskantha", "banaskanth"), (24.1725, 72.4381)),
+    (("bharuch",), (21.7051, 72.9959)),
+    (("bhavnagar",), (21.7645, 72.1519)),
+    (("botad",), (22.1693, 71.6668)),
+    (("chhota udaipur", "chhotaudepur"), (22.3048, 74.0120)),
+    (("dahod",), (22.8354, 74.2531)),
+    (("dang", "dangs", "the dangs"), (20.7578, 73.6866)),
+    (("devbhumi dwarka",), (22.2020, 69.6550)),
+    (("gandhinagar",), (23.2156, 72.6369)),
+    (("gir somnath",), (20.9159, 70.3629)),
+    (("jamnagar",), (22.4707, 70.0577)),
+    (("junagadh", "junagarh"), (21.5222, 70.4579)),
+    (("kheda",), (22.6916, 72.8634)),
+    (("kutch", "kachchh"), (23.2420, 69.6669)),
+    (("mahisagar",), (23.1286, 73.6100)),
+    (("mehsana", "mahesana"), (23.5880, 72.3693)),
+    (("morbi",), (22.8173, 70.8370)),
+    (("narmada",), (21.8716, 73.5030)),
+    (("navsari",), (20.9467, 72.9520)),
+    (("panchmahal", "panchmahals"), (22.7788, 73.6143)),
+    (("patan",), (23.8493, 72.1266)),
+    (("porbandar",), (21.6417, 69.6293)),
+    (("rajkot",), (22.3039, 70.8022)),
+    (("sabarkantha",), (23.5986, 72.9663)),
+    (("surat",), (21.1702, 72.8311)),
+    (("surendranagar",), (22.7201, 71.6495)),
+    (("tapi",), (21.1107, 73.3931)),
+    (("vadodara", "vadodara baroda", "baroda"), (22.3072, 73.1812)),
+    (("valsad",), (20.5992, 72.9342)),
+]
+
+# Normalized (state, district) -> (latitude, longitude)
+DISTRICT_CENTROIDS: Dict[Tuple[str, str], Tuple[float, float]] = {
+    ("gujarat", name): coords
+    for names, coords in GUJARAT_DISTRICTS
+    for name in names
+}
+
+
+def to_unit_vectors(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """(n, 3) points on the unit sphere for latitudes/longitudes in degrees."""
+    lat = np.radians(latitude)
+    lon = np.radians(longitude)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance for straight-line (chord) distances on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+class KDTree:
+    """
+    Static KD-tree over 3-D points.
+
+    ``points`` are stored reordered so node ``i`` covers
+    ``points[lo[i]:hi[i]]``; ``order`` maps those positions back to the
+    input order. Children are always numbered after their parent.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self.order = np.arange(len(points))
+        lo: List[int] = []
+        hi: List[int] = []
+        left: List[int] = []
+        right: List[int] = []
+
+        def build(start: int, end: int) -> int:
+            node = len(lo)
+            lo.append(start)
+            hi.append(end)
+            left.append(-1)
+            right.append(-1)
+            if end - start > leaf_size:
+                members = self.order[start:end]
+                coords = points[members]
+                dim = int(np.argmax(np.ptp(coords, axis=0)))
+                mid = (start + end) // 2
+                self.order[start:end] = members[np.argpartition(coords[:, dim], mid - start)]
+                left[node] = build(start, mid)
+                right[node] = build(mid, end)
+            return node
+
+        if len(points):
+            build(0, len(points))
+        self.points = points[self.order]
+        self.lo = np.array(lo, dtype=np.int64)
+        self.hi = np.array(hi, dtype=np.int64)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        # Plain tuples for the search loop, where NumPy scalar access is slow
+        self.nodes = list(zip(lo, hi, left, right))
+        self.box_min = np.array([self.points[s:e].min(axis=0) for s, e in zip(lo, hi)]).reshape(-1, 3)
+        self.box_max = np.array([self.points[s:e].max(axis=0) for s, e in zip(lo, hi)]).reshape(-1, 3)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def node_maxima(self, values: np.ndarray) -> np.ndarray:
+        """Maximum of ``values`` (in tree order) within each node."""
+        maxima = np.full(len(self.lo), -np.inf)
+        if not len(self):
+            return maxima
+        leaves = np.flatnonzero(self.left < 0)
+        # Leaves partition the points into consecutive slices
+        by_start = leaves[np.argsort(self.lo[leaves])]
+        maxima[by_start] = np.maximum.reduceat(values, self.lo[by_start])
+        for node in range(len(self.lo) - 1, -1, -1):
+            if self.left[node] >= 0:
+                maxima[node] = max(maxima[self.left[node]], maxima[self.right[node]])
+        return maxima
+
+    def distance_lower_bounds(self, query: np.ndarray) -> np.ndarray:
+        """Great-circle km from ``query`` to the nearest point of each node's bounding box."""
+        gap = np.maximum(0.0, np.maximum(self.box_min - query, query - self.box_max))
+        return chord_to_km(np.sqrt((gap * gap).sum(axis=1)))
+
+    def top_net(
+        self,
+        query: np.ndarray,
+        values: np.ndarray,
+        value_maxima: np.ndarray,
+        cost_per_km: float,
+        k: int,
+        max_km: Optional[float] = None
+    ) -> List[Tuple[float, int, float]]:
+        """
+        The ``k`` points with the highest ``value - cost_per_km * distance``.
+
+        Args:
+            query: Unit vector of the origin
+            values: Value per point in tree order; -inf excludes a point
+            value_maxima: ``node_maxima(values)``
+            cost_per_km: Cost per great-circle km
+            k: Number of results
+            max_km: Ignore points further than this
+
+        Returns:
+            (net value, tree position, distance km) tuples, best first
+        """
+        if not len(self):
+            return []
+        near = self.distance_lower_bounds(query)
+        bounds = value_maxima - cost_per_km * near
+        if max_km is not None:
+            bounds[near > max_km] = -np.inf
+
+        bounds = bounds.tolist()
+        best: List[Tuple[float, int, float]] = []  # Min-heap of the current top k
+        frontier = [(-bounds[0], 0)]
+        while frontier:
+            negative_bound, node = heapq.heappop(frontier)
+            if negative_bound == math.inf or (len(best) == k and -negative_bound <= best[0][0]):
+                break
+            start, end, left, right = self.nodes[node]
+            if left >= 0:
+                for child in (left, right):
+                    if bounds[child] > -math.inf:
+                        heapq.heappush(frontier, (-bounds[child], child))
+                continue
+
+            diff = self.points[start:end] - query
+            distance = chord_to_km(np.sqrt((diff * diff).sum(axis=1)))
+            net = values[start:end] - cost_per_km * distance
+            if max_km is not None:
+                net[distance > max_km] = -np.inf
+            floor = best[0][0] if len(best) == k else -np.inf
+            candidates = np.flatnonzero(net > floor)
+            for offset, value, km in zip(candidates.tolist(), net[candidates].tolist(), distance[candidates].tolist()):
+                entry = (value, start + offset, km)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+        return sorted(best, reverse=True)
+
+
+class PriceSnapshot:
+    """Latest modal price per catalog market for one commodity, in tree order."""
+
+    def __init__(self, prices: np.ndarray, dates: List[Any], maxima: np.ndarray, unlocated: int):
+        self.prices = prices
+        self.dates = dates
+        self.maxima = maxima
+        self.unlocated = unlocated  # Markets with prices but no coordinates
+        self.loaded_at = time.monotonic()
+
+
+class MandiGeoService:
+    """Geo-catalog of markets and net-price recommendations."""
+
+    def __init__(self):
+        self._tree: Optional[KDTree] = None
+        self._markets: List[Tuple[str, str, str]] = []  # (state, district, market) in tree order
+        self._precision: List[str] = []
+        self._positions: Dict[Tuple[str, str, str], int] = {}
+        self._catalog_loaded_at: Optional[float] = None
+        self._snapshots: Dict[str, PriceSnapshot] = {}
+
+    async def _load_catalog(self, db: AsyncSession) -> KDTree:
+        """Build the KD-tree from ``mandi_market_locations`` when missing or old."""
+        if self._tree is not None and time.monotonic() - self._catalog_loaded_at < CATALOG_RELOAD_SECONDS:
+            return self._tree
+
+        table = MandiMarketLocation
+        result = await db.execute(
+            select(table.state, table.district, table.market, table.latitude, table.longitude, table.precision)
+        )
+        rows = result.all()
+        latitude = np.array([row[3] for row in rows], dtype=np.float64)
+        longitude = np.array([row[4] for row in rows], dtype=np.float64)
+        tree = KDTree(to_unit_vectors(latitude, longitude).reshape(-1, 3))
+
+        self._markets = [tuple(rows[i][:3]) for i in tree.order.tolist()]
+        self._precision = [rows[i][5] for i in tree.order.tolist()]
+        self._positions = {key: position for position, key in enumerate(self._markets)}
+        self._snapshots = {}
+        self._tree = tree
+        self._catalog_loaded_at = time.monotonic()
+        log.info(f"Loaded Mandi geo-catalog with {len(tree)} markets")
+        return tree
+
+    async def _load_prices(self, db: AsyncSession, tree: KDTree, commodity: str) -> PriceSnapshot:
+        """Latest price per catalog market, cached for MANDI_NEAREST_CACHE_SECONDS."""
+        snapshot = self._snapshots.get(commodity)
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < settings.MANDI_NEAREST_CACHE_SECONDS:
+            return snapshot
+
+        base = MandiPriceCache
+        since = datetime.now(timezone.utc).date() - timedelta(days=PRICE_LOOKBACK_DAYS)
+        result = await db.execute(
+            select(base.state, base.district, base.market, base.modal_price, base.arrival_date)
+            .where(base.commodity == commodity, base.arrival_date >= since)
+            .order_by(base.state, base.district, base.market, base.arrival_date.desc())
+            .distinct(base.state, base.district, base.market)
+        )
+
+        prices = np.full(len(tree), -np.inf)
+        dates: List[Any] = [None] * len(tree)
+        unlocated = 0
+        for state, district, market, modal_price, arrival_date in result.all():
+            position = self._positions.get((state, district, market))
+            if position is None:
+                unlocated += 1
+                continue
+            prices[position] = modal_price
+            dates[position] = arrival_date
+
+        snapshot = PriceSnapshot(prices, dates, tree.node_maxima(prices), unlocated)
+        self._snapshots[commodity] = snapshot
+        return snapshot
+
+    async def nearest_best(
+        self,
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        commodity: str,
+        cost_per_km: float,
+        k: int = 10,
+        max_km: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Top-K markets by net realizable price for a farmer at (latitude, longitude).
+
+        Args:
+            db: Database session
+            latitude: Farmer's latitude in degrees
+            longitude: Farmer's longitude in degrees
+            commodity: Commodity name or alias
+            cost_per_km: Transport cost in Rs per quintal per km (great-circle)
+            k: Number of markets to return
+            max_km: Skip markets further than this
+        """
+        commodity = commodity_index.canonical(commodity)
+        tree = await self._load_catalog(db)
+        snapshot = await self._load_prices(db, tree, commodity)
+
+        query = to_unit_vectors(np.array([latitude]), np.array([longitude]))[0]
+        ranked = tree.top_net(query, snapshot.prices, snapshot.maxima, cost_per_km, k, max_km)
+
+        markets = []
+        for net, position, distance in ranked:
+            state, district, market = self._markets[position]
+            arrival_date = snapshot.dates[position]
+            markets.append({
+                "state": state,
+                "district": district,
+                "market": market,
+                "modal_price": float(snapshot.prices[position]),
+                "arrival_date": arrival_date.isoformat() if arrival_date else None,
+                "distance_km": round(distance, 1),
+                "transport_cost": round(cost_per_km * distance, 2),
+                "net_price": round(net, 2),
+                "location_precision": self._precision[position],
+            })
+        return {
+            "commodity": commodity,
+            "origin": {"latitude": latitude, "longitude": longitude},
+            "cost_per_km": cost_per_km,
+            "markets": markets,
+            "markets_without_location": snapshot.unlocated,
+        }
+
+    async def geocode_markets(self, db: AsyncSession, csv_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Fill ``mandi_market_locations`` for the markets seen in stored prices.
+
+        Coordinates come from ``csv_path`` (columns state, district, market,
+        latitude, longitude) when given, overriding earlier entries; markets
+        not in the file fall back to their district headquarters if known.
+        The caller commits.
+
+        Returns:
+            Counts of markets located per precision and of those skipped
+        """
+        exact: Dict[Tuple[str, str, str], Tuple[float, float]] = {}
+        if csv_path:
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                for record in csv.DictReader(f):
+                    key = tuple(normalize_name(record[field]) for field in ("state", "district", "market"))
+                    exact[key] = (float(record["latitude"]), float(record["longitude"]))
+
+        base = MandiPriceCache
+        markets = await db.execute(select(base.state, base.district, base.market).distinct())
+        located = await db.execute(
+            select(MandiMarketLocation.state, MandiMarketLocation.district, MandiMarketLocation.market)
+        )
+        existing = set(located.all())
+
+        rows = []
+        counts = {"market": 0, "district": 0, "skipped": 0}
+        for state, district, market in markets.all():
+            coords = exact.get((normalize_name(state), normalize_name(district), normalize_name(market)))
+            precision = "market"
+            if coords is None:
+                if (state, district, market) in existing:
+                    continue
+                coords = DISTRICT_CENTROIDS.get((normalize_name(state), normalize_name(district)))
+                precision = "district"
+            if coords is None:
+                counts["skipped"] += 1
+                continue
+            counts[precision] += 1
+            rows.append({
+                "state": state,
+                "district": district,
+                "market": market,
+                "latitude": coords[0],
+                "longitude": coords[1],
+                "precision": precision,
+            })
+
+        for start in range(0, len(rows), 2000):
+            stmt = pg_insert(MandiMarketLocation).values(rows[start:start + 2000])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["state", "district", "market"],
+                set_={
+                    "latitude": stmt.excluded.latitude,
+                    "longitude": stmt.excluded.longitude,
+                    "precision": stmt.excluded.precision,
+                    "updated_at": func.now(),
+                }
+            )
+            await db.execute(stmt)
+
+        self._catalog_loaded_at = None
+        self._tree = None
+        log.info(f"Geocoded Mandi markets: {counts}")
+        return counts
+
+
+# Create singleton instance
+mandi_geo = MandiGeoService()
@@ -0,0 +1,179 @@
+"""
+Full-sync ingestion of the AGMARKNET daily price dataset.
+
+Pages through the whole resource by ``offset`` with bounded concurrency,
+parses and upserts each window of pages as it arrives, and checkpoints the
+next offset after every window so an interrupted run resumes where it
+stopped. Runs are slotted every MANDI_SYNC_INTERVAL_HOURS from 00:00 UTC;
+one completed run per slot keeps the synced rows fresh for the cache.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, select
+
+from ..core.config import settings
+from ..core.logging import log
+from ..db.base import AsyncSessionLocal, engine
+from ..models.ingest_checkpoint import IngestCheckpoint
+from .mandi_cleaning import clean_records
+from .mandi_service import AGMARKNET_BASE_URL, mandi_service
+from .resilience import agmarknet_upstream, BACKGROUND
+
+JOB_NAME = "agmarknet_full"
+
+# Session-level advisory lock so only one worker syncs at a time
+SYNC_LOCK_KEY = 72_031_001
+
+
+def sync_slot(moment: datetime) -> datetime:
+    """Start of the MANDI_SYNC_INTERVAL_HOURS slot containing ``moment``."""
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    interval = timedelta(hours=settings.MANDI_SYNC_INTERVAL_HOURS)
+    return midnight + (moment - midnight) // interval * interval
+
+
+class AgmarknetIngestor:
+    """Pages the AGMARKNET resource into the local price store."""
+
+    async def run(self, restart: bool = False) -> Optional[IngestCheckpoint]:
+        """
+        Run or resume the full sync for the current slot.
+
+        Args:
+            restart: Ignore any checkpoint and start again from offset 0
+
+        Returns:
+            The final checkpoint, or None if another worker holds the sync lock
+        """
+        if not settings.DATA_GOV_IN_API_KEY:
+            log.warning("DATA_GOV_IN_API_KEY is not configured, skipping Mandi sync")
+            return None
+
+        async with engine.connect() as lock_conn:
+            locked = await lock_conn.scalar(select(func.pg_try_advisory_lock(SYNC_LOCK_KEY)))
+            if not locked:
+                log.info("Mandi sync already running in another worker")
+                return None
+            try:
+                return await self._run_locked(restart)
+            finally:
+                await lock_conn.execute(select(func.pg_advisory_unlock(SYNC_LOCK_KEY)))
+
+    async def _run_locked(self, restart: bool) -> IngestCheckpoint:
+        slot = sync_slot(datetime.now(timezone.utc))
+        checkpoint = await self._load_checkpoint(slot, restart)
+        if checkpoint.status == "completed":
+            log.info(f"Mandi sync for {slot.isoformat()} already completed ({checkpoint.records_ingested} records)")
+            return checkpoint
+
+        page_size = settings.MANDI_SYNC_PAGE_SIZE
+        window = page_size * settings.MANDI_SYNC_CONCURRENCY
+        semaphore = asyncio.Semaphore(settings.MANDI_SYNC_CONCURRENCY)
+        log.info(f"Mandi sync for {slot.isoformat()} starting at offset {checkpoint.next_offset}")
+
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                if checkpoint.total is None:
+                    first = await self._fetch_page(client, 0, 1)
+                    checkpoint.total = int(first.get("total") or 0)
+                    await self._save_checkpoint(checkpoint)
+
+                while checkpoint.next_offset < checkpoint.total:
+                    start = checkpoint.next_offset
+                    end = min(start + window, checkpoint.total)
+
+                    async def fetch(offset: int) -> List[Dict[str, Any]]:
+                        async with semaphore:
+                            page = await self._fetch_page(client, offset, page_size)
+                        return page.get("records", [])
+
+                    pages = await asyncio.gather(*(
+                        fetch(offset) for offset in range(start, end, page_size)
+                    ))
+
+                    # Parse and store this window before fetching the next one
+                    rows = clean_records([r for page in pages for r in page], commodity="")
+                    if rows:
+                        async with AsyncSessionLocal() as db:
+                            await mandi_service.upsert_prices(db, rows.to_rows())
+                            await db.commit()
+
+                    checkpoint.next_offset = end
+                    checkpoint.records_ingested += len(rows)
+                    await self._save_checkpoint(checkpoint)
+                    log.info(f"Mandi sync progress: {end}/{checkpoint.total} records")
+
+            checkpoint.status = "completed"
+            checkpoint.error = None
+            await self._save_checkpoint(checkpoint)
+            log.info(f"Mandi sync for {slot.isoformat()} completed: {checkpoint.records_ingested} rows stored")
+            return checkpoint
+
+        except Exception as e:
+            checkpoint.status = "failed"
+            checkpoint.error = str(e)[:500]
+            await self._save_checkpoint(checkpoint)
+            log.error(f"Mandi sync failed at offset {checkpoint.next_offset}: {e}")
+            raise
+
+    async def _fetch_page(self, client: httpx.AsyncClient, offset: int, limit: int) -> Dict[str, Any]:
+        params = {
+            "api-key": settings.DATA_GOV_IN_API_KEY,
+            "format": "json",
+            "limit": limit,
+            "offset": offset,
+        }
+        response = await agmarknet_upstream.call(
+            lambda: client.get(AGMARKNET_BASE_URL, params=params),
+            priority=BACKGROUND
+        )
+        return response.json()
+
+    async def _load_checkpoint(self, slot: datetime, restart: bool) -> IngestCheckpoint:
+        async with AsyncSessionLocal() as db:
+            checkpoint = await db.get(IngestCheckpoint, JOB_NAME)
+            # A checkpoint started before this slot belongs to an earlier run
+            if checkpoint is None or checkpoint.started_at < slot or restart:
+                if checkpoint is None:
+                    checkpoint = IngestCheckpoint(job=JOB_NAME)
+                    db.add(checkpoint)
+                checkpoint.run_date = slot.date()
+                checkpoint.status = "running"
+                checkpoint.next_offset = 0
+                checkpoint.total = None
+                checkpoint.records_ingested = 0
+                checkpoint.error = None
+                checkpoint.started_at = datetime.now(timezone.utc)
+            elif checkpoint.status == "failed":
+                checkpoint.status = "running"
+            await db.commit()
+            await db.refresh(checkpoint)
+            return checkpoint
+
+    async def _save_checkpoint(self, checkpoint: IngestCheckpoint) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.merge(checkpoint)
+            await db.commit()
+
+    async def status(self) -> Optional[Dict[str, Any]]:
+        """Current checkpoint as a dict, for health reporting."""
+        async with AsyncSessionLocal() as db:
+            checkpoint = await db.get(IngestCheckpoint, JOB_NAME)
+            if checkpoint is None:
+                return None
+            return {
+                "run_date": checkpoint.run_date.isoformat(),
+                "started_at": checkpoint.started_at.isoformat(),
+                "status": checkpoint.status,
+                "next_offset": checkpoint.next_offset,
+                "total": checkpoint.total,
+                "records_ingested": checkpoint.records_ingested,
+                "updated_at": checkpoint.updated_at.isoformat(),
+            }
+
+
+# Create singleton instance
+agmarknet_ingestor = AgmarknetIngestor()
@@ -0,0 +1,334 @@
+"""
+Canonical Mandi commodity and market names.
+
+User input such as "wheat", "Gehun" or "ઘઉં" is resolved to the name
+AGMARKNET uses ("Wheat") before any cache lookup or upstream call, so
+every spelling shares one cache key and one upstream request.
+
+Each canonical name carries aliases in English (including common
+transliterations), Hindi and Gujarati. Exact alias matches are a dict
+lookup; anything else goes through a trigram index and is substituted
+only when it is near-identical to an alias. AGMARKNET has many names
+that differ by a word ("Onion Green", "Rajkot(Veg)") and short names
+that share trigrams with unrelated ones (Ginger vs Gingelly), so looser
+matches pass through unchanged and are only offered as suggestions.
+"""
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+# Canonical AGMARKNET commodity -> aliases per language.
+# The first entry of each list is the display label in that language.
+COMMODITY_ALIASES: Dict[str, Dict[str, List[str]]] = {
+    "Wheat": {
+        "en": ["Wheat", "gehun", "gehu", "gahu", "ghau"],
+        "hi": ["गेहूं", "गेहूँ"],
+        "gu": ["ઘઉં"],
+    },
+    "Cotton": {
+        "en": ["Cotton", "kapas", "kapas cotton", "kapaas"],
+        "hi": ["कपास"],
+        "gu": ["કપાસ"],
+    },
+    "Groundnut": {
+        "en": ["Groundnut", "peanut", "moongfali", "mungfali", "singdana", "magfali"],
+        "hi": ["मूंगफली", "मूँगफली"],
+        "gu": ["મગફળી", "શીંગ"],
+    },
+    "Cummin Seed(Jeera)": {
+        "en": ["Cumin", "cumin seed", "jeera", "jira", "jeeru", "jiru"],
+        "hi": ["जीरा"],
+        "gu": ["જીરું", "જીરૂ"],
+    },
+    "Onion": {
+        "en": ["Onion", "pyaz", "pyaaz", "kanda", "dungri"],
+        "hi": ["प्याज", "प्याज़"],
+        "gu": ["ડુંગળી", "કાંદા"],
+    },
+    "Potato": {
+        "en": ["Potato", "aloo", "alu", "bateta"],
+        "hi": ["आलू"],
+        "gu": ["બટાકા", "બટાટા"],
+    },
+    "Tomato": {
+        "en": ["Tomato", "tamatar", "tameta"],
+        "hi": ["टमाटर"],
+        "gu": ["ટામેટાં", "ટમેટા"],
+    },
+    "Garlic": {
+        "en": ["Garlic", "lahsun", "lasan"],
+        "hi": ["लहसुन"],
+        "gu": ["લસણ"],
+    },
+    "Castor Seed": {
+        "en": ["Castor", "castor seed", "arandi", "erandi", "divela"],
+        "hi": ["अरंडी", "एरंड"],
+        "gu": ["એરંડા", "દિવેલા"],
+    },
+    "Mustard": {
+        "en": ["Mustard", "sarson", "rai", "rayda"],
+        "hi": ["सरसों", "राई"],
+        "gu": ["રાયડો", "રાઈ"],
+    },
+    "Sesamum(Sesame,Gingelly,Til)": {
+        "en": ["Sesame", "sesamum", "til", "gingelly", "tal"],
+        "hi": ["तिल"],
+        "gu": ["તલ"],
+    },
+    "Soyabean": {
+        "en": ["Soybean", "soyabean", "soya"],
+        "hi": ["सोयाबीन"],
+        "gu": ["સોયાબીન"],
+    },
+    "Bajra(Pearl Millet/Cumbu)": {
+        "en": ["Bajra", "pearl millet", "bajri"],
+        "hi": ["बाजरा"],
+        "gu": ["બાજરી"],
+    },
+    "Jowar(Sorghum)": {
+        "en": ["Jowar", "sorghum", "juvar"],
+        "hi": ["ज्वार"],
+        "gu": ["જુવાર"],
+    },
+    "Maize": {
+        "en": ["Maize", "corn", "makka", "makai"],
+        "hi": ["मक्का"],
+        "gu": ["મકાઈ"],
+    },
+    "Paddy(Dhan)(Common)": {
+        "en": ["Paddy", "dhan", "dangar"],
+        "hi": ["धान"],
+        "gu": ["ડાંગર"],
+    },
+    "Rice": {
+        "en": ["Rice", "chawal", "chokha"],
+        "hi": ["चावल"],
+        "gu": ["ચોખા"],
+    },
+    "Bengal Gram(Gram)(Whole)": {
+        "en": ["Gram", "bengal gram", "chana", "chickpea", "chana dal"],
+        "hi": ["चना"],
+        "gu": ["ચણા"],
+    },
+    "Arhar (Tur/Red Gram)(Whole)": {
+        "en": ["Tur", "arhar", "toor", "red gram", "pigeon pea"],
+        "hi": ["अरहर", "तुअर"],
+        "gu": ["તુવેર"],
+    },
+    "Green Gram (Moong)(Whole)": {
+        "en": ["Moong", "green gram", "mung", "mag"],
+        "hi": ["मूंग"],
+        "gu": ["મગ"],
+    },
+    "Black Gram (Urd Beans)(Whole)": {
+        "en": ["Urad", "black gram", "urd", "adad"],
+        "hi": ["उड़द", "उरद"],
+        "gu": ["અડદ"],
+    },
+    "Green Chilli": {
+        "en": ["Green Chilli", "chilli", "mirchi", "marcha"],
+        "hi": ["हरी मिर्च", "मिर्च"],
+        "gu": ["લીલા મરચાં", "મરચાં"],
+    },
+    "Banana": {
+        "en": ["Banana", "kela", "kela fruit"],
+        "hi": ["केला"],
+        "gu": ["કેળા"],
+    },
+    "Isabgul (Psyllium)": {
+        "en": ["Isabgol", "isabgul", "psyllium"],
+        "hi": ["ईसबगोल"],
+        "gu": ["ઇસબગુલ"],
+    },
+    "Coriander Seed": {
+        "en": ["Coriander", "coriander seed", "dhania", "dhana"],
+        "hi": ["धनिया"],
+        "gu": ["ધાણા"],
+    },
+    "Guar Seed(Cluster Beans Seed)": {
+        "en": ["Guar", "guar seed", "cluster bean", "guvar"],
+        "hi": ["ग्वार"],
+        "gu": ["ગુવાર"],
+    },
+}
+
+# Canonical AGMARKNET market (APMC) -> aliases, for the main Gujarat yards
+MARKET_ALIASES: Dict[str, Dict[str, List[str]]] = {
+    "Rajkot": {"en": ["Rajkot"], "hi": ["राजकोट"], "gu": ["રાજકોટ"]},
+    "Gondal": {"en": ["Gondal"], "hi": ["गोंडल"], "gu": ["ગોંડલ"]},
+    "Jamnagar": {"en": ["Jamnagar"], "hi": ["जामनगर"], "gu": ["જામનગર"]},
+    "Junagadh": {"en": ["Junagadh", "junagarh"], "hi": ["जूनागढ़"], "gu": ["જૂનાગઢ"]},
+    "Amreli": {"en": ["Amreli"], "hi": ["अमरेली"], "gu": ["અમરેલી"]},
+    "Bhavnagar": {"en": ["Bhavnagar"], "hi": ["भावनगर"], "gu": ["ભાવનગર"]},
+    "Morbi": {"en": ["Morbi", "morvi"], "hi": ["मोरबी"], "gu": ["મોરબી"]},
+    "Jasdan": {"en": ["Jasdan"], "hi": ["जसदण"], "gu": ["જસદણ"]},
+    "Dhoraji": {"en": ["Dhoraji"], "hi": ["धोराजी"], "gu": ["ધોરાજી"]},
+    "Upleta": {"en": ["Upleta"], "hi": ["उपलेटा"], "gu": ["ઉપલેટા"]},
+    "Porbandar": {"en": ["Porbandar"], "hi": ["पोरबंदर"], "gu": ["પોરબંદર"]},
+    "Botad": {"en": ["Botad"], "hi": ["बोटाद"], "gu": ["બોટાદ"]},
+    "Unjha": {"en": ["Unjha"], "hi": ["ऊंझा"], "gu": ["ઊંઝા"]},
+    "Mehsana": {"en": ["Mehsana", "mahesana"], "hi": ["मेहसाणा"], "gu": ["મહેસાણા"]},
+    "Patan": {"en": ["Patan"], "hi": ["पाटन"], "gu": ["પાટણ"]},
+    "Palanpur": {"en": ["Palanpur"], "hi": ["पालनपुर"], "gu": ["પાલનપુર"]},
+    "Deesa": {"en": ["Deesa", "disa"], "hi": ["डीसा"], "gu": ["ડીસા"]},
+    "Himatnagar": {"en": ["Himatnagar"], "hi": ["हिम्मतनगर"], "gu": ["હિંમતનગર"]},
+    "Ahmedabad": {"en": ["Ahmedabad", "amdavad"], "hi": ["अहमदाबाद"], "gu": ["અમદાવાદ"]},
+    "Vadodara": {"en": ["Vadodara", "baroda"], "hi": ["वडोदरा"], "gu": ["વડોદરા"]},
+    "Surat": {"en": ["Surat"], "hi": ["सूरत"], "gu": ["સુરત"]},
+    "Anand": {"en": ["Anand"], "hi": ["आणंद"], "gu": ["આણંદ"]},
+    "Bharuch": {"en": ["Bharuch"], "hi": ["भरूच"], "gu": ["ભરૂચ"]},
+    "Savarkundla": {"en": ["Savarkundla"], "hi": ["सावरकुंडला"], "gu": ["સાવરકુંડલા"]},
+    "Mahuva(Station Road)": {"en": ["Mahuva"], "hi": ["महुवा"], "gu": ["મહુવા"]},
+}
+
+
+def normalize_name(text: str) -> str:
+    """
+    Lower-case, NFC-normalize and reduce punctuation to single spaces.
+
+    Letters, digits and combining marks are kept, so Devanagari and
+    Gujarati vowel signs survive.
+    """
+    text = unicodedata.normalize("NFC", text).casefold()
+    kept = "".join(
+        ch if unicodedata.category(ch)[0] in "LMN" else " "
+        for ch in text
+    )
+    return " ".join(kept.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized name, padded like pg_trgm."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Resolves free-text names to canonical ones.
+
+    Exact (normalized) alias matches are a dict lookup; otherwise aliases
+    sharing trigrams with the input are scored by Jaccard similarity of
+    their trigram sets.
+    """
+
+    def __init__(
+        self,
+        aliases: Dict[str, Dict[str, List[str]]],
+        threshold: float,
+        suggest_threshold: float
+    ):
+        """
+        Args:
+            aliases: Canonical name -> language -> alias list
+            threshold: Minimum trigram similarity to substitute a fuzzy match
+            suggest_threshold: Minimum trigram similarity to suggest one
+        """
+        self.threshold = threshold
+        self.suggest_threshold = suggest_threshold
+        self.labels: Dict[str, Dict[str, str]] = {}
+        self._exact: Dict[str, str] = {}
+        # Parallel lists indexed by alias id
+        self._alias_text: List[str] = []
+        self._alias_canonical: List[str] = []
+        self._alias_trigrams: List[Set[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+
+        for canonical, by_language in aliases.items():
+            self.labels[canonical] = {
+                language: names[0] for language, names in by_language.items() if names
+            }
+            names = [canonical] + [name for names in by_language.values() for name in names]
+            for name in names:
+                self._add_alias(canonical, normalize_name(name))
+
+    def _add_alias(self, canonical: str, alias: str) -> None:
+        if not alias or alias in self._exact:
+            return
+        self._exact[alias] = canonical
+        alias_id = len(self._alias_text)
+        grams = trigrams(alias)
+        self._alias_text.append(alias)
+        self._alias_canonical.append(canonical)
+        self._alias_trigrams.append(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(alias_id)
+
+    def _scored(self, query: str) -> List[Tuple[float, int]]:
+        """(similarity, alias id) for every alias sharing a trigram, best first."""
+        grams = trigrams(query)
+        shared = Counter(
+            alias_id for gram in grams for alias_id in self._postings.get(gram, ())
+        )
+        scored = [
+            (count / (len(grams) + len(self._alias_trigrams[alias_id]) - count), alias_id)
+            for alias_id, count in shared.items()
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored
+
+    def resolve(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Canonical name for ``text`` and the match score (1.0 for exact).
+
+        Returns None when nothing clears the similarity threshold.
+        """
+        query = normalize_name(text)
+        if not query:
+            return None
+        if query in self._exact:
+            return self._exact[query], 1.0
+        scored = self._scored(query)
+        if scored and scored[0][0] >= self.threshold:
+            score, alias_id = scored[0]
+            return self._alias_canonical[alias_id], round(score, 3)
+        return None
+
+    def canonical(self, text: str) -> str:
+        """Canonical name if ``text`` resolves, otherwise ``text`` stripped."""
+        match = self.resolve(text)
+        return match[0] if match else text.strip()
+
+    def suggest(self, text: str, limit: int = 10, language: str = "en") -> List[Dict[str, object]]:
+        """
+        Ranked suggestions for a partial or misspelled name.
+
+        Aliases starting with the input rank first, then fuzzy matches;
+        each canonical name appears once. An empty input lists everything.
+        """
+        query = normalize_name(text)
+        ranked: List[Tuple[str, str, float]] = []
+        if not query:
+            ranked = [(canonical, canonical, 1.0) for canonical in self.labels]
+        else:
+            for alias, canonical in self._exact.items():
+                if alias.startswith(query):
+                    ranked.append((canonical, alias, 1.0))
+            ranked.sort(key=lambda item: len(item[1]))
+            for score, alias_id in self._scored(query):
+                if score < self.suggest_threshold:
+                    break
+                ranked.append((self._alias_canonical[alias_id], self._alias_text[alias_id], round(score, 3)))
+
+        suggestions = []
+        seen = set()
+        for canonical, alias, score in ranked:
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            labels = self.labels[canonical]
+            suggestions.append({
+                "name": canonical,
+                "label": labels.get(language) or labels.get("en") or canonical,
+                "matched": alias,
+                "score": score,
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+
+# Singleton indexes; market suggestions are held to a stricter threshold
+# since yard names are short and many share a town's name
+commodity_index = NameIndex(COMMODITY_ALIASES, threshold=0.85, suggest_threshold=0.15)
+market_index = NameIndex(MARKET_ALIASES, threshold=0.85, suggest_threshold=0.25)
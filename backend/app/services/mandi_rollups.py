@@ -0,0 +1,257 @@
+"""
+Daily Mandi price rollups and price trends.
+
+``mandi_market_daily`` holds one row per (commodity, state, market, arrival
+date) and ``mandi_state_daily`` one per (commodity, state, arrival date).
+Both are maintained incrementally: every upsert into ``mandi_price_cache``
+recomputes only the rollup keys its rows touch, straight from the base table.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.logging import log
+from ..models.mandi_price import MandiPriceCache
+from ..models.mandi_rollup import MandiMarketDaily, MandiStateDaily
+from .mandi_names import commodity_index, market_index
+
+# Week-over-week compares against the latest price at least this many days back...
+WOW_LAG_DAYS = 7
+# ...but not older than this, so a long reporting gap doesn't pass as a weekly change
+WOW_MAX_LAG_DAYS = 13
+
+# Changes within this band (percent) are reported as flat
+FLAT_BAND_PCT = 1.0
+
+
+def moving_averages(series: List[Tuple[date, float]], window: int) -> List[Optional[float]]:
+    """
+    Trailing moving average over calendar days.
+
+    Each point averages the values reported in the ``window`` days ending on
+    its own date; days without reports are skipped rather than treated as zero.
+    """
+    result = []
+    start = 0
+    total = 0.0
+    for end, (day, value) in enumerate(series):
+        total += value
+        while series[start][0] <= day - timedelta(days=window):
+            total -= series[start][1]
+            start += 1
+        result.append(round(total / (end - start + 1), 2))
+    return result
+
+
+def week_over_week(series: List[Tuple[date, float]]) -> List[Optional[float]]:
+    """
+    Percent change against the latest value reported 7-13 days earlier.
+
+    None when nothing was reported in that range.
+    """
+    result = []
+    prev = 0
+    for day, value in series:
+        # Advance to the last point on or before day - WOW_LAG_DAYS
+        while prev + 1 < len(series) and series[prev + 1][0] <= day - timedelta(days=WOW_LAG_DAYS):
+            prev += 1
+        base_day, base_value = series[prev]
+        if (day - base_day).days < WOW_LAG_DAYS or (day - base_day).days > WOW_MAX_LAG_DAYS or not base_value:
+            result.append(None)
+        else:
+            result.append(round((value - base_value) / base_value * 100, 2))
+    return result
+
+
+def trend_direction(change_pct: Optional[float]) -> str:
+    """up, down or flat for a percent change; unknown without one."""
+    if change_pct is None:
+        return "unknown"
+    if change_pct > FLAT_BAND_PCT:
+        return "up"
+    if change_pct < -FLAT_BAND_PCT:
+        return "down"
+    return "flat"
+
+
+class MandiRollupService:
+    """Maintains the daily rollup tables and answers trend queries from them."""
+
+    async def refresh_for_rows(self, db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Recompute the rollup rows touched by a batch of price rows.
+
+        Rows without a parsed arrival date don't belong to any day and are
+        ignored. The caller commits.
+        """
+        market_keys: Set[Tuple[str, str, str, date]] = {
+            (row["commodity"], row["state"], row["market"], row["arrival_date"])
+            for row in rows
+            if row.get("arrival_date")
+        }
+        if not market_keys:
+            return
+        await self.refresh(db, market_keys)
+
+    async def refresh(
+        self,
+        db: AsyncSession,
+        market_keys: Optional[Set[Tuple[str, str, str, date]]] = None
+    ) -> None:
+        """
+        Recompute rollups from ``mandi_price_cache``.
+
+        Args:
+            db: Database session
+            market_keys: (commodity, state, market, day) keys to recompute;
+                None rebuilds every key (backfill only)
+        """
+        base = MandiPriceCache
+        market_query = select(
+            base.commodity,
+            base.state,
+            base.market,
+            base.arrival_date,
+            func.min(base.min_price),
+            func.max(base.max_price),
+            func.avg(base.modal_price),
+            func.count(),
+        ).where(base.arrival_date.isnot(None)).group_by(
+            base.commodity, base.state, base.market, base.arrival_date
+        )
+        if market_keys is not None:
+            market_query = market_query.where(
+                tuple_(base.commodity, base.state, base.market, base.arrival_date).in_(list(market_keys))
+            )
+
+        stmt = pg_insert(MandiMarketDaily).from_select(
+            ["commodity", "state", "market", "day", "min_price", "max_price", "modal_price", "reports"],
+            market_query
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["commodity", "state", "market", "day"],
+            set_={
+                "min_price": stmt.excluded.min_price,
+                "max_price": stmt.excluded.max_price,
+                "modal_price": stmt.excluded.modal_price,
+                "reports": stmt.excluded.reports,
+                "updated_at": func.now(),
+            }
+        )
+        await db.execute(stmt)
+
+        daily = MandiMarketDaily
+        state_query = select(
+            daily.commodity,
+            daily.state,
+            daily.day,
+            func.avg(daily.modal_price),
+            func.min(daily.modal_price),
+            func.max(daily.modal_price),
+            func.count(),
+        ).group_by(daily.commodity, daily.state, daily.day)
+        if market_keys is not None:
+            state_keys = list({(commodity, state, day) for commodity, state, _, day in market_keys})
+            state_query = state_query.where(
+                tuple_(daily.commodity, daily.state, daily.day).in_(state_keys)
+            )
+
+        stmt = pg_insert(MandiStateDaily).from_select(
+            ["commodity", "state", "day", "avg_modal_price", "min_modal_price", "max_modal_price", "markets"],
+            state_query
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["commodity", "state", "day"],
+            set_={
+                "avg_modal_price": stmt.excluded.avg_modal_price,
+                "min_modal_price": stmt.excluded.min_modal_price,
+                "max_modal_price": stmt.excluded.max_modal_price,
+                "markets": stmt.excluded.markets,
+                "updated_at": func.now(),
+            }
+        )
+        await db.execute(stmt)
+
+        scope = "all keys" if market_keys is None else f"{len(market_keys)} market-days"
+        log.info(f"Refreshed Mandi rollups for {scope}")
+
+    async def get_trend(
+        self,
+        db: AsyncSession,
+        commodity: str,
+        state: Optional[str] = None,
+        market: Optional[str] = None,
+        days: int = 30,
+        window: int = 7,
+    ) -> Dict[str, Any]:
+        """
+        Daily price series with moving average and week-over-week change.
+
+        With ``market`` the series is that market's daily modal price;
+        otherwise it is the state-wide daily average.
+
+        Args:
+            db: Database session
+            commodity: Commodity name or alias
+            state: State; required unless ``market`` is given
+            market: Market name or alias; narrows the series to one market
+            days: Number of calendar days to return, ending today
+            window: Moving-average window in days
+        """
+        commodity = commodity_index.canonical(commodity)
+        market = market_index.canonical(market) if market else None
+        today = datetime.now(timezone.utc).date()
+        start = today - timedelta(days=days - 1)
+        # Extra history so the first returned points have full context
+        lookback = start - timedelta(days=max(window, WOW_MAX_LAG_DAYS))
+
+        if market:
+            table = MandiMarketDaily
+            if state:
+                query = select(table.day, table.modal_price).where(table.state == state)
+            else:
+                # The same market name can exist in several states; average them per day
+                query = select(table.day, func.avg(table.modal_price)).group_by(table.day)
+            query = query.where(table.commodity == commodity, table.market == market)
+        else:
+            table = MandiStateDaily
+            query = select(table.day, table.avg_modal_price).where(
+                table.commodity == commodity,
+                table.state == state,
+            )
+
+        query = query.where(table.day >= lookback, table.day <= today).order_by(table.day)
+        result = await db.execute(query)
+        series = [(day, float(value)) for day, value in result.all()]
+
+        averages = moving_averages(series, window)
+        changes = week_over_week(series)
+        points = [
+            {
+                "date": day.isoformat(),
+                "price": round(value, 2),
+                "moving_avg": avg,
+                "wow_change_pct": change,
+            }
+            for (day, value), avg, change in zip(series, averages, changes)
+            if day >= start
+        ]
+
+        latest = points[-1] if points else None
+        return {
+            "commodity": commodity,
+            "state": state,
+            "market": market,
+            "scope": "market" if market else "state",
+            "window_days": window,
+            "series": points,
+            "latest": latest,
+            "direction": trend_direction(latest["wow_change_pct"] if latest else None),
+        }
+
+
+# Create singleton instance
+mandi_rollups = MandiRollupService()
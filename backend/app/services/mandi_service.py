@@ -0,0 +1,602 @@
+"""
+Mandi price service backed by the data.gov.in AGMARKNET API.
+
+Prices are read through the ``mandi_price_cache`` table: fresh rows are
+served directly, stale or missing ones trigger one coalesced upstream
+refresh that is bulk-upserted back into the table.
+"""
+import asyncio
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.logging import log
+from ..db.base import AsyncSessionLocal
+from ..models.mandi_price import MandiPriceCache
+from .mandi_cleaning import COLUMNS, PriceColumns, UPSERT_KEY, clean_records
+from .mandi_names import commodity_index, market_index
+from .mandi_rollups import mandi_rollups
+from .price_alerts import price_alerts
+from .resilience import agmarknet_upstream, negative_cache, CircuitOpenError, QuotaExhaustedError
+
+# data.gov.in AGMARKNET endpoint (the official one unless overridden)
+AGMARKNET_BASE_URL = settings.AGMARKNET_API_URL
+
+# Region name meaning "no state filter"
+ALL_INDIA = "india"
+
+# Upstream page size for a single-state query and for an all-India one
+STATE_PAGE_SIZE = 50
+ALL_INDIA_PAGE_SIZE = 30
+
+# Number of markets returned per commodity
+TOP_MARKETS = 20
+
+# Rows per INSERT statement, keeping bind parameters under asyncpg's limit
+UPSERT_CHUNK = 2000
+
+# Columns the query API can sort on
+SORT_COLUMNS = {
+    "arrival_date": MandiPriceCache.arrival_date,
+    "modal_price": MandiPriceCache.modal_price,
+    "min_price": MandiPriceCache.min_price,
+    "max_price": MandiPriceCache.max_price,
+}
+
+
+class MandiUnavailableError(Exception):
+    """Raised when prices can't be fetched and nothing is stored to fall back on."""
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded for the requested sort."""
+
+
+def resolve_regions(region: Optional[str] = None) -> List[Optional[str]]:
+    """
+    Region preference list as state filters in priority order.
+
+    Args:
+        region: Comma-separated override from the request, e.g.
+            "Maharashtra,India"; defaults to ``MANDI_REGION_PREFERENCE``
+
+    Returns:
+        State names, with None standing for all of India
+    """
+    names = region.split(",") if region else settings.MANDI_REGION_PREFERENCE
+    regions: List[Optional[str]] = []
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        state = None if name.lower() == ALL_INDIA else name
+        if state not in regions:
+            regions.append(state)
+    return regions or [None]
+
+
+def to_response(rows: PriceColumns) -> List[Dict[str, Any]]:
+    """
+    Format price rows for the API: latest report per market, highest modal
+    price first, top ``TOP_MARKETS`` only.
+    """
+    prices = []
+    for row in rows.top_latest(TOP_MARKETS).to_rows():
+        display_market = row["market"]
+        if row["district"] and row["district"].lower() not in row["market"].lower():
+            display_market = f"{row['market']}, {row['district']}"
+
+        prices.append({
+            "id": f"{row['market']}-{row['commodity']}-{row['date']}",
+            "market": display_market,
+            "commodity": row["commodity"],
+            "min_price": row["min_price"],
+            "max_price": row["max_price"],
+            "modal_price": row["modal_price"],
+            "date": row["date"],
+        })
+    return prices
+
+
+def encode_cursor(sort_by: str, value: Any, row_id: uuid.UUID) -> str:
+    """Opaque keyset cursor: the sort column, its value and the row id of the last item."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, value, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, uuid.UUID]:
+    """Inverse of ``encode_cursor``; the cursor must belong to the same sort column."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort != sort_by:
+            raise ValueError(f"cursor was issued for sort_by={cursor_sort}")
+        if sort_by == "arrival_date":
+            value = date.fromisoformat(value)
+        elif not isinstance(value, int):
+            raise ValueError("price cursor value must be an integer")
+        return value, uuid.UUID(row_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}") from e
+
+
+def _error_detail(error: BaseException) -> str:
+    """Client-facing message for a failed refresh."""
+    if isinstance(error, MandiUnavailableError):
+        return "Add DATA_GOV_IN_API_KEY to .env"
+    if isinstance(error, QuotaExhaustedError):
+        return "Mandi price lookups are over quota. Please try again later."
+    if isinstance(error, CircuitOpenError):
+        return "Mandi price service is temporarily unavailable. Please try again later."
+    if isinstance(error, httpx.TimeoutException):
+        return "Request timeout. Please try again."
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"API unavailable: {error.response.status_code}"
+    return f"Processing error: {error}"
+
+
+def _row_dict(row: MandiPriceCache) -> Dict[str, Any]:
+    return {
+        "state": row.state,
+        "district": row.district,
+        "market": row.market,
+        "commodity": row.commodity,
+        "min_price": row.min_price,
+        "max_price": row.max_price,
+        "modal_price": row.modal_price,
+        "date": row.date,
+        "arrival_date": row.arrival_date,
+    }
+
+
+class MandiService:
+    """Read-through access to Mandi prices."""
+
+    def __init__(self):
+        """Initialize mandi service."""
+        # Refreshes in flight, keyed by lower-cased commodity and region list
+        self._inflight: Dict[Tuple[str, Tuple[Optional[str], ...]], asyncio.Task] = {}
+
+    async def get_prices(
+        self,
+        db: AsyncSession,
+        commodity: str,
+        regions: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get prices for a commodity, refreshing from upstream if the cache is stale.
+
+        Args:
+            db: Database session
+            commodity: Commodity name as passed by the client; aliases
+                resolve to the canonical AGMARKNET name
+            regions: State filters in priority order, None meaning all
+                India (see ``resolve_regions``); defaults to the deployment's
+                preference
+
+        Returns:
+            Formatted price list (see ``to_response``)
+
+        Raises:
+            MandiUnavailableError: Upstream failed and nothing is stored
+            CircuitOpenError / httpx.HTTPError: Propagated when no stale
+                rows exist to fall back on (QuotaExhaustedError, raised when
+                the data.gov.in quota is used up, is a CircuitOpenError)
+        """
+        regions = regions or resolve_regions()
+        commodity = commodity_index.canonical(commodity)
+        rows = await self._read_cache(db, commodity, regions, fresh_after=self._freshness_cutoff())
+        if rows:
+            log.info(f"Serving {len(rows)} cached Mandi rows for {commodity}")
+            return to_response(rows)
+
+        try:
+            rows = await self._refresh_coalesced(commodity, regions)
+        except (CircuitOpenError, httpx.HTTPError) as e:
+            stale = await self._read_cache(db, commodity, regions)
+            if stale:
+                log.warning(f"Upstream failed ({e!r}); serving {len(stale)} stale rows for {commodity}")
+                return to_response(stale)
+            raise
+
+        if not rows:
+            log.warning(f"No Mandi data found for commodity: {commodity}")
+        return to_response(rows)
+
+    async def get_prices_batch(
+        self,
+        db: AsyncSession,
+        commodities: List[str],
+        regions: Optional[List[Optional[str]]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get prices for several commodities at once.
+
+        Fresh cached commodities are served from a single query per region;
+        the misses are refreshed from upstream concurrently, at most
+        ``MANDI_BATCH_CONCURRENCY`` at a time. A failure only affects its own
+        commodity, which falls back to stale rows when there are any.
+
+        Args:
+            db: Database session
+            commodities: Commodity names as passed by the client
+            regions: As for ``get_prices``
+
+        Returns:
+            Per-commodity result keyed by the name as given, in request order:
+            ``commodity`` (canonical name), ``status`` (cached, refreshed,
+            stale or error), ``prices`` and, for errors, ``detail``. Names
+            resolving to the same commodity are answered once, under the
+            first spelling.
+        """
+        regions = regions or resolve_regions()
+        # Canonical name -> the first spelling given for it
+        given: Dict[str, str] = {}
+        for commodity in commodities:
+            given.setdefault(commodity_index.canonical(commodity), commodity.strip())
+
+        cached = await self._read_cache_many(db, list(given), regions, self._freshness_cutoff())
+        results: Dict[str, Dict[str, Any]] = {
+            name: {"status": "cached", "prices": to_response(rows)}
+            for name, rows in cached.items()
+        }
+        misses = [name for name in given if name not in cached]
+        log.info(f"Mandi batch: {len(cached)} cached, {len(misses)} to refresh")
+
+        semaphore = asyncio.Semaphore(settings.MANDI_BATCH_CONCURRENCY)
+
+        async def refresh(commodity: str) -> PriceColumns:
+            async with semaphore:
+                return await self._refresh_coalesced(commodity, regions)
+
+        refreshed = await asyncio.gather(
+            *(refresh(commodity) for commodity in misses),
+            return_exceptions=True
+        )
+
+        failed = [name for name, outcome in zip(misses, refreshed) if isinstance(outcome, BaseException)]
+        stale = await self._read_cache_many(db, failed, regions) if failed else {}
+
+        for commodity, outcome in zip(misses, refreshed):
+            if not isinstance(outcome, BaseException):
+                results[commodity] = {"status": "refreshed", "prices": to_response(outcome)}
+                continue
+            log.warning(f"Mandi batch refresh for {commodity} failed: {outcome!r}")
+            rows = stale.get(commodity)
+            if rows:
+                results[commodity] = {"status": "stale", "prices": to_response(rows)}
+            else:
+                results[commodity] = {"status": "error", "prices": [], "detail": _error_detail(outcome)}
+
+        return {
+            spelling: {"commodity": name, **results[name]}
+            for name, spelling in given.items()
+        }
+
+    async def query_prices(
+        self,
+        db: AsyncSession,
+        state: Optional[str] = None,
+        district: Optional[str] = None,
+        market: Optional[str] = None,
+        commodities: Optional[List[str]] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        sort_by: str = "arrival_date",
+        descending: bool = True,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Filtered, keyset-paginated query over locally stored prices.
+
+        Commodity and market names are resolved to their canonical spelling
+        first; filters then match stored values exactly so they can use the
+        composite indexes on ``mandi_price_cache``. Rows are ordered by ``sort_by`` with
+        the row id as tie-breaker; rows without a value in the sort column are
+        skipped. Nothing is fetched from upstream.
+
+        Args:
+            db: Database session
+            state, district, market: Exact-match filters
+            commodities: Commodity names; any of them matches
+            date_from, date_to: Inclusive arrival-date range
+            sort_by: One of ``SORT_COLUMNS``
+            descending: Sort direction
+            limit: Page size
+            cursor: ``next_cursor`` from the previous page
+
+        Returns:
+            Dict with ``items`` and ``next_cursor`` (None on the last page)
+
+        Raises:
+            InvalidCursorError: The cursor is malformed or from another sort
+        """
+        sort_col = SORT_COLUMNS[sort_by]
+        query = select(MandiPriceCache).where(sort_col.isnot(None))
+
+        if state:
+            query = query.where(MandiPriceCache.state == state)
+        if district:
+            query = query.where(MandiPriceCache.district == district)
+        if market:
+            query = query.where(MandiPriceCache.market == market_index.canonical(market))
+        if commodities:
+            query = query.where(MandiPriceCache.commodity.in_(
+                [commodity_index.canonical(commodity) for commodity in commodities]
+            ))
+        if date_from:
+            query = query.where(MandiPriceCache.arrival_date >= date_from)
+        if date_to:
+            query = query.where(MandiPriceCache.arrival_date <= date_to)
+
+        if cursor:
+            value, row_id = decode_cursor(cursor, sort_by)
+            position = tuple_(sort_col, MandiPriceCache.id)
+            query = query.where(
+                position < tuple_(value, row_id) if descending else position > tuple_(value, row_id)
+            )
+
+        if descending:
+            query = query.order_by(sort_col.desc(), MandiPriceCache.id.desc())
+        else:
+            query = query.order_by(sort_col.asc(), MandiPriceCache.id.asc())
+
+        # One extra row tells us whether another page exists
+        result = await db.execute(query.limit(limit + 1))
+        rows = result.scalars().all()
+        page = rows[:limit]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(sort_by, getattr(last, sort_by), last.id)
+
+        items = []
+        for row in page:
+            item = _row_dict(row)
+            item["id"] = str(row.id)
+            item["arrival_date"] = row.arrival_date.isoformat() if row.arrival_date else None
+            item["fetched_at"] = row.fetched_at.isoformat()
+            items.append(item)
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _freshness_cutoff() -> datetime:
+        """Oldest fetch time still served without a refresh."""
+        ttl = timedelta(minutes=settings.MANDI_CACHE_TTL_MINUTES)
+        if settings.MANDI_SYNC_ENABLED:
+            # Rows written by the full sync stay fresh until the next sync is due
+            ttl += timedelta(hours=settings.MANDI_SYNC_INTERVAL_HOURS)
+        return datetime.now(timezone.utc) - ttl
+
+    async def _read_cache(
+        self,
+        db: AsyncSession,
+        commodity: str,
+        regions: List[Optional[str]],
+        fresh_after: Optional[datetime] = None
+    ) -> PriceColumns:
+        """Stored rows for the first region that has any."""
+        found = await self._read_cache_many(db, [commodity], regions, fresh_after)
+        return found.get(commodity, PriceColumns.from_tuples([]))
+
+    async def _read_cache_many(
+        self,
+        db: AsyncSession,
+        commodities: List[str],
+        regions: List[Optional[str]],
+        fresh_after: Optional[datetime] = None
+    ) -> Dict[str, PriceColumns]:
+        """
+        Stored rows for several commodities, each from the first region that has any.
+
+        Issues one query per region for the commodities still unresolved,
+        reading only the latest report per market (all ``to_response``
+        keeps), so a fallback after an outage doesn't load the commodity's
+        whole history.
+
+        Args:
+            commodities: Canonical commodity names, matched exactly
+
+        Returns:
+            Columns keyed by commodity; commodities with no rows are absent
+        """
+        base = MandiPriceCache
+        columns = [getattr(base, name) for name in COLUMNS]
+        commodity_position = COLUMNS.index("commodity")
+        market_key = (base.commodity, base.state, base.district, base.market)
+        pending = set(commodities)
+        found: Dict[str, PriceColumns] = {}
+
+        for state in regions:
+            if not pending:
+                break
+            query = (
+                select(*columns)
+                .where(base.commodity.in_(pending))
+                .order_by(*market_key, base.arrival_date.desc().nulls_last())
+                .distinct(*market_key)
+            )
+            if state:
+                query = query.where(base.state == state)
+            if fresh_after:
+                query = query.where(base.fetched_at >= fresh_after)
+            result = await db.execute(query)
+
+            grouped: Dict[str, List[Any]] = {}
+            for row in result.all():
+                grouped.setdefault(row[commodity_position], []).append(row)
+            for key, rows in grouped.items():
+                found[key] = PriceColumns.from_tuples(rows)
+            pending -= grouped.keys()
+
+        return found
+
+    async def _refresh_coalesced(
+        self,
+        commodity: str,
+        regions: List[Optional[str]]
+    ) -> PriceColumns:
+        """
+        Refresh a commodity, sharing one upstream fetch among concurrent callers.
+
+        The fetch runs in its own task, so a caller that goes away (client
+        disconnect) cancels only its own wait, not the refresh the others
+        are waiting on.
+        """
+        key = (commodity.strip().lower(), tuple(regions))
+        task = self._inflight.get(key)
+        if task is not None:
+            log.info(f"Joining in-flight Mandi refresh for {commodity}")
+        else:
+            task = asyncio.create_task(self.refresh(commodity, regions), name=f"mandi_refresh:{key[0]}")
+            self._inflight[key] = task
+
+            def done(t: asyncio.Task):
+                del self._inflight[key]
+                # Mark retrieved so a failure nobody is left to await isn't logged by asyncio
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    async def refresh(self, commodity: str, regions: List[Optional[str]]) -> PriceColumns:
+        """Fetch a commodity from upstream and upsert it into the cache."""
+        records = await self.fetch_upstream(commodity, regions)
+        rows = clean_records(records, commodity)
+        if rows:
+            async with AsyncSessionLocal() as db:
+                await self.upsert_prices(db, rows.to_rows())
+                await db.commit()
+        return rows
+
+    async def fetch_upstream(self, commodity: str, regions: List[Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Fetch raw records for the highest-priority region that has data.
+
+        All regions are requested concurrently and awaited in priority order;
+        once one returns records the lower-priority requests still running are
+        cancelled. A failed region is skipped in favour of the next one, and
+        its error is raised only if no region has data.
+        """
+        if not settings.DATA_GOV_IN_API_KEY:
+            raise MandiUnavailableError("DATA_GOV_IN_API_KEY is not configured")
+
+        async with httpx.AsyncClient(timeout=15.0) as client:
+            tasks = [
+                asyncio.create_task(self._fetch_region(client, commodity, state))
+                for state in regions
+            ]
+            first_error: Optional[Exception] = None
+            try:
+                for state, task in zip(regions, tasks):
+                    try:
+                        records = await task
+                    except (CircuitOpenError, httpx.HTTPError) as e:
+                        log.warning(f"Mandi fetch for {commodity} in {state or 'all India'} failed: {e!r}")
+                        first_error = first_error or e
+                        continue
+                    if records:
+                        return records
+            finally:
+                pending = [task for task in tasks if not task.done()]
+                if pending:
+                    log.info(f"Cancelling {len(pending)} lower-priority Mandi region fetches")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        if first_error:
+            raise first_error
+        return []
+
+    async def _fetch_region(
+        self,
+        client: httpx.AsyncClient,
+        commodity: str,
+        state: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Fetch the first page of records for one region."""
+        params = {
+            "api-key": settings.DATA_GOV_IN_API_KEY,
+            "format": "json",
+            "limit": STATE_PAGE_SIZE if state else ALL_INDIA_PAGE_SIZE,
+            "offset": 0,
+            "filters[commodity]": commodity,
+        }
+        if state:
+            params["filters[state]"] = state
+
+        log.info(f"Fetching Mandi data for {commodity} in {state or 'all India'}...")
+        records = await self._fetch_records(client, params)
+        log.info(f"Found {len(records)} {state or 'all-India'} records for {commodity}")
+        return records
+
+    async def _fetch_records(self, client: httpx.AsyncClient, params: Dict) -> List[Dict]:
+        """
+        Fetch AGMARKNET records through the upstream circuit breaker.
+
+        Empty answers are negatively cached so repeated lookups for a commodity
+        with no data don't hit data.gov.in again until the entry expires.
+        """
+        cache_key = ("agmarknet", params.get("filters[state]"), params.get("filters[commodity]"))
+        if cache_key in negative_cache:
+            log.info(f"Negative cache hit for {cache_key[2]} ({cache_key[1] or 'India'})")
+            return []
+
+        response = await agmarknet_upstream.call(
+            lambda: client.get(AGMARKNET_BASE_URL, params=params)
+        )
+        records = response.json().get("records", [])
+        if not records:
+            negative_cache.set(cache_key)
+        return records
+
+    async def upsert_prices(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """
+        Bulk upsert price rows keyed on (state, district, market, commodity, date).
+
+        Each chunk is checked against price alerts before it is written, and
+        the daily rollups for the market-days it touches are recomputed in the
+        same transaction. The caller commits.
+        """
+        # ON CONFLICT can't touch the same row twice in one statement
+        unique = {tuple(row[k] for k in UPSERT_KEY): row for row in rows}
+        values = [{**row, "fetched_at": func.now()} for row in unique.values()]
+
+        for start in range(0, len(values), UPSERT_CHUNK):
+            chunk = values[start:start + UPSERT_CHUNK]
+            await price_alerts.evaluate(db, chunk)
+            stmt = pg_insert(MandiPriceCache).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_mandi_price_report",
+                set_={
+                    "min_price": stmt.excluded.min_price,
+                    "max_price": stmt.excluded.max_price,
+                    "modal_price": stmt.excluded.modal_price,
+                    "arrival_date": stmt.excluded.arrival_date,
+                    "fetched_at": func.now(),
+                    "updated_at": func.now(),
+                }
+            )
+            await db.execute(stmt)
+            await mandi_rollups.refresh_for_rows(db, chunk)
+        log.info(f"Upserted {len(values)} Mandi price rows")
+
+
+# Create singleton instance
+mandi_service = MandiService()
@@ -0,0 +1,346 @@
+"""
+Mandi price-threshold alerts, evaluated as prices are stored.
+
+Active subscriptions are held in memory as one ``ThresholdIndex`` per
+(commodity, market): two lists of thresholds kept sorted with ``bisect``.
+A batch of new prices only looks up the markets it contains, and for each
+one a price move from ``old`` to ``new`` bisects straight to the
+thresholds in between, so the cost is independent of how many
+subscriptions exist elsewhere.
+
+``old`` is the market's latest stored daily price, read in the caller's
+transaction, so every worker compares against the same history and a
+rolled-back write leaves nothing behind. Fired alerts are appended to
+``price_alert_events``, which clients poll; a unique constraint on
+(subscription, arrival date, direction) drops the duplicates that
+concurrent writers of the same report would otherwise fire.
+"""
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.logging import log
+from ..models.mandi_rollup import MandiMarketDaily
+from ..models.price_alert import PriceAlertEvent, PriceAlertSubscription
+from .mandi_names import commodity_index, market_index
+
+ABOVE = "above"
+BELOW = "below"
+
+# Entries are (threshold, subscription id); these ids sort before/after every real one
+_FIRST = float("-inf")
+_LAST = float("inf")
+
+
+class ThresholdIndex:
+    """Sorted thresholds for one (commodity, market)."""
+
+    def __init__(self):
+        self.above: List[Tuple[float, int]] = []
+        self.below: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below)
+
+    def add(self, subscription_id: int, direction: str, threshold: float) -> None:
+        entries = self.above if direction == ABOVE else self.below
+        i = bisect_left(entries, (threshold, subscription_id))
+        if i == len(entries) or entries[i] != (threshold, subscription_id):
+            entries.insert(i, (threshold, subscription_id))
+
+    def remove(self, subscription_id: int, direction: str, threshold: float) -> None:
+        entries = self.above if direction == ABOVE else self.below
+        i = bisect_left(entries, (threshold, subscription_id))
+        if i < len(entries) and entries[i] == (threshold, subscription_id):
+            del entries[i]
+
+    def crossed(self, old: Optional[float], new: float) -> List[Tuple[int, str, float]]:
+        """
+        Subscriptions whose threshold lies between two consecutive prices.
+
+        ``above`` fires for thresholds in (old, new] on a rise and ``below``
+        for thresholds in [new, old) on a fall. Without an earlier price every
+        threshold the new price already satisfies fires.
+
+        Returns:
+            (subscription id, direction, threshold) tuples
+        """
+        above: List[Tuple[float, int]] = []
+        below: List[Tuple[float, int]] = []
+        if old is None or new > old:
+            lo = 0 if old is None else bisect_right(self.above, (old, _LAST))
+            above = self.above[lo:bisect_right(self.above, (new, _LAST))]
+        if old is None or new < old:
+            hi = len(self.below) if old is None else bisect_left(self.below, (old, _FIRST))
+            below = self.below[bisect_left(self.below, (new, _FIRST)):hi]
+        return (
+            [(sub_id, ABOVE, threshold) for threshold, sub_id in above]
+            + [(sub_id, BELOW, threshold) for threshold, sub_id in below]
+        )
+
+
+def _latest_prices(rows: Iterable[Dict[str, Any]], keys: Dict[Tuple[str, str], Any]) -> Dict[Tuple[str, str], Tuple[date, float, str]]:
+    """
+    Latest arrival date per watched (commodity, market) in a batch.
+
+    Returns:
+        key -> (day, mean modal price reported that day, state of the first such report)
+    """
+    latest: Dict[Tuple[str, str], List[Any]] = {}
+    for row in rows:
+        day = row.get("arrival_date")
+        key = (row["commodity"], row["market"])
+        if day is None or key not in keys:
+            continue
+        current = latest.get(key)
+        if current is None or day > current[0]:
+            latest[key] = [day, row["modal_price"], 1, row["state"]]
+        elif day == current[0]:
+            current[1] += row["modal_price"]
+            current[2] += 1
+    return {key: (day, total / count, state) for key, (day, total, count, state) in latest.items()}
+
+
+def _subscription_dict(subscription: PriceAlertSubscription) -> Dict[str, Any]:
+    return {
+        "id": subscription.id,
+        "user_id": subscription.user_id,
+        "commodity": subscription.commodity,
+        "market": subscription.market,
+        "direction": subscription.direction,
+        "threshold": subscription.threshold,
+        "is_active": subscription.is_active,
+        "created_at": subscription.created_at.isoformat() if subscription.created_at else None,
+    }
+
+
+def _event_dict(event: PriceAlertEvent) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "subscription_id": event.subscription_id,
+        "commodity": event.commodity,
+        "market": event.market,
+        "state": event.state,
+        "direction": event.direction,
+        "threshold": event.threshold,
+        "previous_price": event.previous_price,
+        "price": event.price,
+        "arrival_date": event.arrival_date.isoformat() if event.arrival_date else None,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+class PriceAlertService:
+    """
+    Holds the in-memory threshold indexes and records fired alerts.
+
+    Each worker keeps its own copy, reloaded from the database every
+    PRICE_ALERT_RELOAD_SECONDS so subscriptions made through another
+    worker are picked up.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], ThresholdIndex] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self, db: AsyncSession) -> None:
+        """(Re)build the indexes from active subscriptions when missing or stale."""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < settings.PRICE_ALERT_RELOAD_SECONDS:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < settings.PRICE_ALERT_RELOAD_SECONDS:
+                return
+            result = await db.execute(
+                select(
+                    PriceAlertSubscription.id,
+                    PriceAlertSubscription.commodity,
+                    PriceAlertSubscription.market,
+                    PriceAlertSubscription.direction,
+                    PriceAlertSubscription.threshold,
+                ).where(PriceAlertSubscription.is_active.is_(True))
+            )
+            indexes: Dict[Tuple[str, str], ThresholdIndex] = {}
+            for sub_id, commodity, market, direction, threshold in result.all():
+                key = (commodity, market)
+                index = indexes.get(key)
+                if index is None:
+                    index = indexes[key] = ThresholdIndex()
+                index.add(sub_id, direction, threshold)
+            self._indexes = indexes
+            self._loaded_at = time.monotonic()
+            log.info(f"Loaded price alert indexes for {len(indexes)} markets")
+
+    async def _stored_prices(
+        self,
+        db: AsyncSession,
+        keys: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Tuple[date, float]]:
+        """Latest stored day and modal price per (commodity, market), as seen by ``db``'s transaction."""
+        daily = MandiMarketDaily
+        # Latest day per (commodity, market), averaged across states that share the market name
+        result = await db.execute(
+            select(daily.commodity, daily.market, daily.day, func.avg(daily.modal_price))
+            .where(tuple_(daily.commodity, daily.market).in_(keys))
+            .group_by(daily.commodity, daily.market, daily.day)
+            .order_by(daily.commodity, daily.market, daily.day.desc())
+            .distinct(daily.commodity, daily.market)
+        )
+        return {(commodity, market): (day, float(price)) for commodity, market, day, price in result.all()}
+
+    async def evaluate(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+        """
+        Check a batch of price rows against the thresholds they could cross.
+
+        Must run in the transaction that stores the rows, before they are
+        written, so each market is compared with its previously stored
+        price. Reports older than the latest stored day are ignored; a
+        same-day re-report is compared with that day's stored price. The
+        caller commits.
+
+        Returns:
+            Number of alerts recorded
+        """
+        await self._ensure_loaded(db)
+        if not self._indexes:
+            return 0
+
+        latest = _latest_prices(rows, self._indexes)
+        if not latest:
+            return 0
+        stored = await self._stored_prices(db, list(latest))
+
+        events = []
+        for key, (day, price, state) in latest.items():
+            index = self._indexes.get(key)
+            last_day, last_price = stored.get(key, (None, None))
+            if index is None or (last_day is not None and day < last_day):
+                continue
+            for sub_id, direction, threshold in index.crossed(last_price, price):
+                events.append({
+                    "subscription_id": sub_id,
+                    "commodity": key[0],
+                    "market": key[1],
+                    "state": state,
+                    "direction": direction,
+                    "threshold": threshold,
+                    "previous_price": last_price,
+                    "price": price,
+                    "arrival_date": day,
+                })
+
+        if not events:
+            return 0
+
+        # user_id is denormalised onto events so clients can poll by user
+        owners = await db.execute(
+            select(PriceAlertSubscription.id, PriceAlertSubscription.user_id).where(
+                PriceAlertSubscription.id.in_({event["subscription_id"] for event in events})
+            )
+        )
+        user_ids = dict(owners.all())
+        events = [
+            {**event, "user_id": user_ids[event["subscription_id"]]}
+            for event in events
+            if event["subscription_id"] in user_ids
+        ]
+        if not events:
+            return 0
+        # Another worker storing the same report may already have recorded the crossing
+        result = await db.execute(
+            pg_insert(PriceAlertEvent)
+            .values(events)
+            .on_conflict_do_nothing(constraint="uq_price_alert_event_crossing")
+            .returning(PriceAlertEvent.id)
+        )
+        fired = len(result.all())
+        if fired:
+            log.info(f"Fired {fired} Mandi price alerts")
+        return fired
+
+    async def subscribe(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        commodity: str,
+        market: str,
+        direction: str,
+        threshold: float
+    ) -> Dict[str, Any]:
+        """Create a subscription; commodity and market may be aliases."""
+        await self._ensure_loaded(db)
+        subscription = PriceAlertSubscription(
+            user_id=user_id,
+            commodity=commodity_index.canonical(commodity),
+            market=market_index.canonical(market),
+            direction=direction,
+            threshold=threshold,
+            is_active=True,
+        )
+        db.add(subscription)
+        await db.commit()
+        await db.refresh(subscription)
+
+        key = (subscription.commodity, subscription.market)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = ThresholdIndex()
+        index.add(subscription.id, subscription.direction, subscription.threshold)
+        return _subscription_dict(subscription)
+
+    async def unsubscribe(self, db: AsyncSession, user_id: str, subscription_id: int) -> bool:
+        """Deactivate a user's subscription; False if it doesn't exist."""
+        subscription = await db.get(PriceAlertSubscription, subscription_id)
+        if subscription is None or subscription.user_id != user_id or not subscription.is_active:
+            return False
+        subscription.is_active = False
+        await db.commit()
+
+        index = self._indexes.get((subscription.commodity, subscription.market))
+        if index is not None:
+            index.remove(subscription.id, subscription.direction, subscription.threshold)
+        return True
+
+    async def list_subscriptions(self, db: AsyncSession, user_id: str) -> List[Dict[str, Any]]:
+        """A user's active subscriptions, newest first."""
+        result = await db.execute(
+            select(PriceAlertSubscription)
+            .where(PriceAlertSubscription.user_id == user_id, PriceAlertSubscription.is_active.is_(True))
+            .order_by(PriceAlertSubscription.id.desc())
+        )
+        return [_subscription_dict(subscription) for subscription in result.scalars()]
+
+    async def list_events(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        after_id: int = 0,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        A user's fired alerts after ``after_id``, oldest first.
+
+        Pass the returned ``last_id`` back as ``after_id`` to poll for new ones.
+        """
+        result = await db.execute(
+            select(PriceAlertEvent)
+            .where(PriceAlertEvent.user_id == user_id, PriceAlertEvent.id > after_id)
+            .order_by(PriceAlertEvent.id)
+            .limit(limit)
+        )
+        events = [_event_dict(event) for event in result.scalars()]
+        return {
+            "events": events,
+            "last_id": events[-1]["id"] if events else after_id,
+        }
+
+
+# Create singleton instance
+price_alerts = PriceAlertService()
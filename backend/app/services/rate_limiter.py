@@ -0,0 +1,191 @@
+"""
+Per-client API rate limiting with GCRA (generic cell rate algorithm).
+
+Each (route class, client) pair has a "theoretical arrival time" (TAT): the
+moment its bucket would be empty again at the steady rate. A request is
+allowed when it arrives no more than ``burst`` intervals before the TAT,
+which then moves one interval later. This needs a single number per key,
+so in Redis the check-and-update is one atomic Lua script using the Redis
+server clock, and limits hold across all uvicorn workers. If Redis is
+disabled or unreachable, the same algorithm runs in process (per worker).
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+import redis.asyncio as aioredis
+from starlette.routing import Match
+from starlette.types import Scope
+
+from ..core.config import settings
+from ..core.logging import log
+
+# Route classes, each with its own per-minute limit
+CHAT = "chat"
+UPSTREAM = "upstream"
+CATALOG = "catalog"
+
+# Seconds to skip Redis after it fails, before trying it again
+REDIS_RETRY_SECONDS = 30.0
+
+# Upper bound on keys tracked by the in-process fallback
+MAX_LOCAL_KEYS = 10000
+
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+if now < tat - tolerance then
+    return {0, tostring(tat - tolerance - now), '0'}
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0', tostring(math.floor((tolerance + interval - (new_tat - now)) / interval))}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int  # Requests per minute for the route class
+    remaining: int  # Requests that could be made right now
+    retry_after: float  # Seconds until the next request is allowed; 0 if allowed
+
+
+def limit_class(name: str) -> Callable[[Callable], Callable]:
+    """Put an endpoint in route class ``name``; unmarked endpoints are catalog."""
+    def mark(endpoint: Callable) -> Callable:
+        endpoint.rate_limit_class = name
+        return endpoint
+    return mark
+
+
+# (method, path) -> endpoint the router dispatches it to
+_endpoints: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+
+
+def matched_endpoint(scope: Scope) -> Optional[Callable]:
+    """Endpoint the app's router will call for a request, without calling it."""
+    key = (scope["method"], scope["path"])
+    if key in _endpoints:
+        _endpoints.move_to_end(key)
+        return _endpoints[key]
+    endpoint = None
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            endpoint = child_scope.get("endpoint")
+            break
+        if match == Match.PARTIAL and endpoint is None:
+            # Path matches but the method doesn't; the router answers 405
+            endpoint = child_scope.get("endpoint")
+    _endpoints[key] = endpoint
+    while len(_endpoints) > MAX_LOCAL_KEYS:
+        _endpoints.popitem(last=False)
+    return endpoint
+
+
+def route_class(scope: Scope) -> Optional[str]:
+    """
+    Route class for a request; None for paths that aren't limited.
+
+    chat calls the LLM, upstream may call data.gov.in or OpenWeather, and
+    catalog covers the rest of the API (served from our own database).
+    Endpoints are marked with ``limit_class``; classifying by the matched
+    endpoint rather than the path keeps an endpoint's limit wherever its
+    router is mounted.
+    """
+    prefix = settings.API_V1_PREFIX
+    path = scope["path"]
+    if not path.startswith(prefix) or path == f"{prefix}/health":
+        return None
+    return getattr(matched_endpoint(scope), "rate_limit_class", CATALOG)
+
+
+def class_limit(name: str) -> int:
+    """Requests per minute allowed for a route class."""
+    return {
+        CHAT: settings.RATE_LIMIT_PER_MINUTE,
+        UPSTREAM: settings.RATE_LIMIT_UPSTREAM_PER_MINUTE,
+        CATALOG: settings.RATE_LIMIT_CATALOG_PER_MINUTE,
+    }[name]
+
+
+class LocalGCRA:
+    """In-process GCRA, used when Redis isn't available."""
+
+    def __init__(self, max_keys: int = MAX_LOCAL_KEYS):
+        self.max_keys = max_keys
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def check(self, key: str, interval: float, tolerance: float) -> Tuple[bool, float, int]:
+        """Returns (allowed, retry_after, remaining), as the Lua script does."""
+        now = time.monotonic()
+        tat = max(self._tat.get(key, now), now)
+        if now < tat - tolerance:
+            return False, tat - tolerance - now, 0
+        new_tat = tat + interval
+        self._tat[key] = new_tat
+        self._tat.move_to_end(key)
+        while len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+        return True, 0.0, math.floor((tolerance + interval - (new_tat - now)) / interval)
+
+
+class RateLimiter:
+    """GCRA limiter backed by Redis, falling back to ``LocalGCRA``."""
+
+    def __init__(self):
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+        self._local = LocalGCRA()
+
+    def _client(self):
+        """Redis client and registered script, created on first use."""
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                settings.REDIS_URL,
+                socket_connect_timeout=0.2,
+                socket_timeout=0.2,
+            )
+            self._script = self._redis.register_script(GCRA_SCRIPT)
+        return self._script
+
+    async def check(self, name: str, client: str) -> RateLimitResult:
+        """
+        Count one request from ``client`` against route class ``name``.
+
+        Args:
+            name: Route class (chat, upstream, catalog)
+            client: Client identity, e.g. its IP address
+        """
+        limit = class_limit(name)
+        interval = 60.0 / limit
+        tolerance = interval * settings.RATE_LIMIT_BURST
+        key = f"ratelimit:{name}:{client}"
+
+        if settings.REDIS_ENABLED and time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, retry_after, remaining = await self._client()(keys=[key], args=[interval, tolerance])
+                return RateLimitResult(bool(allowed), limit, int(remaining), float(retry_after))
+            except Exception as e:
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+                log.warning(f"Redis rate limiter unavailable ({e!r}); limiting per process for {REDIS_RETRY_SECONDS:.0f}s")
+
+        allowed, retry_after, remaining = self._local.check(key, interval, tolerance)
+        return RateLimitResult(allowed, limit, remaining, retry_after)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+# Create singleton instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,666 @@
+"""
+Resilience primitives for calls to upstream APIs.
+
+Provides a per-upstream circuit breaker, a retry budget for jittered retries,
+a prioritized token-bucket quota scheduler and a small TTL cache used for
+negative caching of "no data" answers.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+import httpx
+import redis.asyncio as aioredis
+
+from ..core.config import settings
+from ..core.logging import log
+from ..core.metrics import upstream_errors, upstream_request_seconds
+from ..core.profiling import record_upstream
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit for {name} is open, retry in {retry_after:.0f}s")
+
+
+class QuotaExhaustedError(CircuitOpenError):
+    """
+    Raised when an upstream call can't get quota in time.
+
+    A CircuitOpenError subclass, so callers that fail fast on an open
+    circuit (stale fallback, 503 with Retry-After) treat it the same way.
+    """
+
+    def __init__(self, name: str, retry_after: float, reason: str):
+        self.name = name
+        self.retry_after = retry_after
+        self.reason = reason
+        Exception.__init__(self, f"Quota for {name} exhausted ({reason}), retry in {retry_after:.0f}s")
+
+
+# Call priorities for QuotaScheduler; lower is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that opens on error or latency thresholds.
+
+    - closed: calls pass through; outcomes are tracked in a rolling window
+    - open: calls fail fast until the recovery timeout has elapsed
+    - half_open: a limited number of trial calls decide whether to close again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        window_size: int = 20,
+        slow_call_seconds: float = 5.0,
+        slow_call_ratio: float = 0.5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_ratio = slow_call_ratio
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # Each entry is (failed, slow) for one completed call
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.recovery_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._half_open_calls = 0
+            log.info(f"Circuit {self.name} half-open, probing upstream")
+
+        if self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will allow a trial call."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self, elapsed: float) -> None:
+        """Record a completed call."""
+        slow = elapsed >= self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            if slow:
+                self._trip()
+            else:
+                self._close()
+            return
+        self._window.append((False, slow))
+        self._evaluate()
+
+    def record_abandoned(self) -> None:
+        """Record a call cancelled before it completed, freeing its half-open probe slot."""
+        if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+        self._window.append((True, False))
+        self._evaluate()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current breaker state for health reporting."""
+        return {
+            "state": self.state,
+            "failures": sum(1 for failed, _ in self._window if failed),
+            "calls": len(self._window),
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+    def _evaluate(self) -> None:
+        failures = sum(1 for failed, _ in self._window if failed)
+        if failures >= self.failure_threshold:
+            self._trip()
+            return
+        if len(self._window) >= self.failure_threshold:
+            slow = sum(1 for _, is_slow in self._window if is_slow)
+            if slow / len(self._window) >= self.slow_call_ratio:
+                self._trip()
+
+    def _trip(self) -> None:
+        if self.state != self.OPEN:
+            log.warning(f"Circuit {self.name} opened for {self.recovery_timeout:.0f}s")
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+
+    def _close(self) -> None:
+        log.info(f"Circuit {self.name} closed, upstream recovered")
+        self.state = self.CLOSED
+        self._window.clear()
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent requests.
+
+    Retries are only allowed while retries in the last ``window`` seconds stay
+    below ``min_retries + ratio * requests``, so an outage cannot multiply
+    upstream load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_acquire_retry(self) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        allowed = self.min_retries + self.ratio * len(self._requests)
+        if len(self._retries) < allowed:
+            self._retries.append(now)
+            return True
+        return False
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+
+# Seconds to skip Redis after it fails, before trying it again
+REDIS_RETRY_SECONDS = 30.0
+
+# Count one call unless today's count has reached the cap (ARGV[1], 0 = none)
+DAILY_RESERVE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if limit > 0 and used >= limit then
+    return {0, used}
+end
+used = redis.call('INCR', KEYS[1])
+if used == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return {1, used}
+"""
+
+
+class DailyCounter:
+    """
+    Calls made today (UTC), shared by every process through Redis.
+
+    The count lives under one Redis key per day, so it survives restarts
+    and is shared by all workers and the sync CLI. While Redis is disabled
+    or unreachable, counting continues in process from the last count
+    Redis reported.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+        self._day = datetime.now(timezone.utc).date()
+        self._used = 0  # Last count seen in Redis, or the local count while it's down
+
+    def _key(self) -> str:
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+        return f"quota:{self.name}:{today.isoformat()}"
+
+    def _client(self):
+        """Redis client, or None while Redis is disabled or recently failed."""
+        if not settings.REDIS_ENABLED or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                settings.REDIS_URL,
+                socket_connect_timeout=0.2,
+                socket_timeout=0.2,
+            )
+            self._script = self._redis.register_script(DAILY_RESERVE_SCRIPT)
+        return self._redis
+
+    def _redis_failed(self, e: Exception) -> None:
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        log.warning(
+            f"Redis unavailable for the {self.name} daily quota ({e!r}); "
+            f"counting per process for {REDIS_RETRY_SECONDS:.0f}s"
+        )
+
+    async def reserve(self, limit: int) -> Optional[str]:
+        """
+        Count one call if today's count is below ``limit`` (0 = no cap).
+
+        Returns:
+            The day's key, to pass to ``release``; None if the cap is reached
+        """
+        key = self._key()
+        if self._client() is not None:
+            try:
+                allowed, used = await self._script(keys=[key], args=[limit, 2 * 86400])
+                self._used = int(used)
+                return key if allowed else None
+            except Exception as e:
+                self._redis_failed(e)
+        if limit and self._used >= limit:
+            return None
+        self._used += 1
+        return key
+
+    async def release(self, key: str) -> None:
+        """Give back a call reserved under ``key`` that was never made."""
+        if self._client() is not None:
+            try:
+                self._used = max(0, int(await self._redis.decr(key)))
+                return
+            except Exception as e:
+                self._redis_failed(e)
+        if key == self._key():
+            self._used = max(0, self._used - 1)
+
+    async def used(self) -> int:
+        """Calls counted today."""
+        key = self._key()
+        if self._client() is not None:
+            try:
+                self._used = int(await self._redis.get(key) or 0)
+            except Exception as e:
+                self._redis_failed(e)
+        return self._used
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+class QuotaScheduler:
+    """
+    Token bucket with a daily cap and prioritized waiting.
+
+    Tokens refill at ``rate`` per second up to ``burst``; each upstream
+    attempt takes one. When none is available callers queue, interactive
+    ahead of background, and are granted tokens as they refill. Interactive
+    callers give up after ``max_wait`` seconds so they can fall back to
+    stored data; background callers wait as long as it takes. Background
+    calls also stop once ``daily_limit * (1 - background_reserve)`` tokens
+    have been used today (UTC), leaving the rest of the daily quota for
+    interactive traffic.
+
+    The daily count is shared through Redis (see ``DailyCounter``); the
+    token bucket is per process, so with several workers divide ``rate``
+    and ``burst`` between them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        daily_limit: int = 0,
+        background_reserve: float = 0.0,
+        max_wait: float = 2.0,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.daily_limit = daily_limit  # 0 = no daily cap
+        self.background_reserve = background_reserve
+        self.max_wait = max_wait
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.daily = DailyCounter(name)
+        self.granted = {priority: 0 for priority in PRIORITY_NAMES}
+        self.rejected = {priority: 0 for priority in PRIORITY_NAMES}
+        # Heap of [priority, sequence, future]; cancelled or timed-out entries are skipped
+        self._waiters: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        """
+        Take one token, waiting behind higher-priority callers if needed.
+
+        Raises:
+            QuotaExhaustedError: The daily budget for this priority is used
+                up, or an interactive caller waited longer than ``max_wait``
+        """
+        limit = self.daily_limit
+        if limit and priority != INTERACTIVE:
+            limit = int(self.daily_limit * (1 - self.background_reserve))
+        # Today's call is counted up front, and given back if no token is granted
+        reservation = await self.daily.reserve(limit)
+        if reservation is None:
+            self.rejected[priority] += 1
+            raise QuotaExhaustedError(self.name, self._seconds_to_reset(), "daily quota")
+        try:
+            await self._acquire_token(priority)
+        except BaseException:
+            await self.daily.release(reservation)
+            raise
+
+    async def _acquire_token(self, priority: int) -> None:
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._take(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._sequence), future])
+        self._dispatch()
+        try:
+            if priority == INTERACTIVE:
+                await asyncio.wait_for(future, self.max_wait)
+            else:
+                await future
+        except asyncio.TimeoutError:
+            self.rejected[priority] += 1
+            raise QuotaExhaustedError(self.name, self._wait_estimate(), "rate limit") from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Granted just before the caller was cancelled; give the token back
+                self._refund(priority)
+            raise
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Current quota state for health reporting."""
+        self._refill()
+        used_today = await self.daily.used()
+        waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                waiting[PRIORITY_NAMES[priority]] += 1
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "daily_limit": self.daily_limit or None,
+            "used_today": used_today,
+            "remaining_today": max(0, self.daily_limit - used_today) if self.daily_limit else None,
+            "resets_in": round(self._seconds_to_reset()),
+            "waiting": waiting,
+            "granted": {PRIORITY_NAMES[p]: count for p, count in self.granted.items()},
+            "rejected": {PRIORITY_NAMES[p]: count for p, count in self.rejected.items()},
+        }
+
+    async def close(self) -> None:
+        await self.daily.close()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _seconds_to_reset(self) -> float:
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return (midnight - now).total_seconds()
+
+    def _take(self, priority: int) -> None:
+        self._tokens -= 1
+        self.granted[priority] += 1
+
+    def _refund(self, priority: int) -> None:
+        self._tokens = min(self.burst, self._tokens + 1)
+        self.granted[priority] -= 1
+        self._dispatch()
+
+    def _wait_estimate(self) -> float:
+        """Seconds until every current waiter could be served."""
+        waiting = sum(1 for _, _, future in self._waiters if not future.done())
+        return max(0.0, (waiting + 1 - self._tokens) / self.rate)
+
+    def _dispatch(self) -> None:
+        """Grant tokens to waiters in priority order, then wake up when the next token is due."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                break
+            heapq.heappop(self._waiters)
+            self._take(priority)
+            future.set_result(None)
+
+        if self._waiters and self._timer is None:
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and LRU eviction."""
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any = True) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+
+class Upstream:
+    """Circuit breaker, retry budget and optional quota for one upstream API."""
+
+    def __init__(self, name: str, quota: Optional[QuotaScheduler] = None):
+        self.name = name
+        self.quota = quota
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS,
+            recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS,
+        )
+        self.retry_budget = RetryBudget(ratio=settings.RETRY_BUDGET_RATIO)
+        # Set from a 429's Retry-After; new calls fail fast until then
+        self._throttled_until = 0.0
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[httpx.Response]],
+        priority: int = INTERACTIVE
+    ) -> httpx.Response:
+        """
+        Run an upstream request through the breaker with jittered retries.
+
+        A 429 with Retry-After doesn't count against the breaker. It pauses
+        the upstream for that long instead: new calls raise
+        CircuitOpenError until it has passed, and the call that got the 429
+        waits it out and retries only if it is at most
+        UPSTREAM_MAX_RETRY_AFTER_SECONDS.
+
+        Args:
+            func: Zero-argument coroutine factory performing one attempt
+            priority: INTERACTIVE or BACKGROUND, for the quota scheduler;
+                every attempt, including retries, takes one token
+
+        Returns:
+            The successful response
+
+        Raises:
+            CircuitOpenError: If the circuit is open or the upstream asked
+                us to back off
+            QuotaExhaustedError: If no quota is available in time
+            httpx.HTTPError: If the final attempt fails
+        """
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            throttled = self._throttled_until - time.monotonic()
+            # A retry after a 429 has already waited out its Retry-After
+            if throttled > 0 and attempt == 0:
+                raise CircuitOpenError(self.name, throttled)
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(self.name, self.breaker.retry_after())
+            if self.quota is not None:
+                try:
+                    await self.quota.acquire(priority)
+                except BaseException:
+                    self.breaker.record_abandoned()
+                    raise
+
+            started = time.monotonic()
+            try:
+                response = await func()
+                response.raise_for_status()
+            except asyncio.CancelledError:
+                # Speculative requests get cancelled; that says nothing about upstream health
+                self.breaker.record_abandoned()
+                elapsed = time.monotonic() - started
+                upstream_request_seconds.labels(self.name, "cancelled").observe(elapsed)
+                record_upstream(self.name, elapsed, "cancelled")
+                raise
+            except Exception as e:
+                elapsed = time.monotonic() - started
+                upstream_request_seconds.labels(self.name, "error").observe(elapsed)
+                record_upstream(self.name, elapsed, "error")
+                upstream_errors.labels(self.name, _error_kind(e)).inc()
+                retry_after = _rate_limit_delay(e)
+                if retry_after is not None:
+                    # Rate limited: the upstream is up and said when to come back
+                    self.breaker.record_success(elapsed)
+                    self._throttled_until = max(self._throttled_until, time.monotonic() + retry_after)
+                    if (
+                        retry_after > settings.UPSTREAM_MAX_RETRY_AFTER_SECONDS
+                        or attempt >= settings.UPSTREAM_MAX_RETRIES
+                        or not self.retry_budget.try_acquire_retry()
+                    ):
+                        raise
+                    attempt += 1
+                    log.warning(f"{self.name} rate limited us, retry {attempt} in {retry_after:.2f}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+                if not _is_upstream_fault(e):
+                    # 4xx answers mean the upstream is healthy
+                    self.breaker.record_success(time.monotonic() - started)
+                    raise
+                self.breaker.record_failure()
+                if attempt >= settings.UPSTREAM_MAX_RETRIES or not self.retry_budget.try_acquire_retry():
+                    raise
+                attempt += 1
+                # Full jitter exponential backoff
+                delay = random.uniform(0, settings.UPSTREAM_RETRY_BASE_DELAY * (2 ** attempt))
+                log.warning(f"{self.name} request failed ({e!r}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            elapsed = time.monotonic() - started
+            upstream_request_seconds.labels(self.name, "ok").observe(elapsed)
+            record_upstream(self.name, elapsed, "ok")
+            self.breaker.record_success(elapsed)
+            return response
+
+
+def _error_kind(exc: BaseException) -> str:
+    """Low-cardinality label for an upstream error: the HTTP status or exception class."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return str(exc.response.status_code)
+    return type(exc).__name__
+
+
+def _rate_limit_delay(exc: Exception) -> Optional[float]:
+    """Seconds from a 429's Retry-After header (delta-seconds or HTTP date), or None."""
+    if not isinstance(exc, httpx.HTTPStatusError) or exc.response.status_code != 429:
+        return None
+    value = exc.response.headers.get("Retry-After")
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def _is_upstream_fault(exc: Exception) -> bool:
+    """Whether an exception should count against the upstream's health."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+# Per-upstream singletons
+openweather_upstream = Upstream("openweather")
+agmarknet_upstream = Upstream(
+    "agmarknet",
+    quota=QuotaScheduler(
+        "agmarknet",
+        rate=settings.AGMARKNET_RATE_PER_SECOND,
+        burst=settings.AGMARKNET_BURST,
+        daily_limit=settings.AGMARKNET_DAILY_QUOTA,
+        background_reserve=settings.AGMARKNET_BACKGROUND_RESERVE,
+        max_wait=settings.AGMARKNET_QUOTA_MAX_WAIT_SECONDS,
+    ),
+)
+
+# "No data" answers, keyed by (upstream, query)
+negative_cache = TTLCache(ttl=settings.NEGATIVE_CACHE_TTL_SECONDS)
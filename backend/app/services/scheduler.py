@@ -0,0 +1,69 @@
+"""
+In-process scheduling for periodic maintenance jobs and background work.
+"""
+import asyncio
+from typing import Awaitable, Callable, Coroutine, Dict, Set
+
+from ..core.logging import log
+
+_periodic: Dict[str, asyncio.Task] = {}
+_background: Set[asyncio.Task] = set()
+
+
+def start_periodic(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], Awaitable[object]],
+    initial_delay: float = 0.0
+) -> None:
+    """
+    Run ``func`` every ``interval_seconds`` until shutdown.
+
+    Failures are logged and the job keeps its schedule. Starting a job that
+    is already running is a no-op.
+    """
+    if name in _periodic and not _periodic[name].done():
+        return
+
+    async def loop():
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Periodic job {name} failed: {e}", exc_info=True)
+            await asyncio.sleep(interval_seconds)
+
+    _periodic[name] = asyncio.create_task(loop(), name=f"periodic:{name}")
+    log.info(f"Scheduled periodic job {name} every {interval_seconds:.0f}s")
+
+
+def spawn_background(coro: Coroutine, name: str = "background") -> asyncio.Task:
+    """
+    Run a coroutine off the request path, keeping a reference until it ends.
+
+    Exceptions are logged rather than propagated.
+    """
+    task = asyncio.create_task(coro, name=name)
+    _background.add(task)
+
+    def done(t: asyncio.Task):
+        _background.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            log.error(f"Background task {name} failed: {t.exception()}")
+
+    task.add_done_callback(done)
+    return task
+
+
+async def stop_all() -> None:
+    """Cancel periodic jobs and wait briefly for background work to finish."""
+    for task in _periodic.values():
+        task.cancel()
+    await asyncio.gather(*_periodic.values(), return_exceptions=True)
+    _periodic.clear()
+
+    if _background:
+        await asyncio.wait(list(_background), timeout=5)
@@ -2,11 +2,15 @@
 Weather service for fetching weather data.
 """
 import httpx
+from collections import Counter
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo
 from ..core.config import settings
 from ..core.logging import log
 from ..schemas.weather import WeatherAlertResponse
+from .resilience import openweather_upstream, negative_cache, CircuitOpenError
+from .weather_store import weather_store
 
 
 class WeatherService:
@@ -32,28 +36,28 @@ class WeatherService:
             return self._get_mock_weather(location)
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/weather",
-                    params={
-                        "q": location,
-                        "appid": self.api_key,
-                        "units": "metric"
-                    },
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    "location": data["name"],
-                    "temperature": data["main"]["temp"],
-                    "feels_like": data["main"]["feels_like"],
-                    "humidity": data["main"]["humidity"],
-                    "wind_speed": data["wind"]["speed"],
-                    "description": data["weather"][0]["description"],
-                    "icon": data["weather"][0]["icon"],
-                }
+            data = await self._fetch("weather", location, {"q": location})
+            if data is None:
+                return self._get_mock_weather(location)
+            
+            weather_store.record(location, "current", [{
+                "observed_at": datetime.fromtimestamp(data["dt"], tz=timezone.utc),
+                "temperature": data["main"]["temp"],
+                "humidity": data["main"]["humidity"],
+                "wind_speed": data["wind"]["speed"],
+                "rain": data.get("rain", {}).get("1h", 0),
+                "description": data["weather"][0]["description"],
+            }])
+            
+            return {
+                "location": data["name"],
+                "temperature": data["main"]["temp"],
+                "feels_like": data["main"]["feels_like"],
+                "humidity": data["main"]["humidity"],
+                "wind_speed": data["wind"]["speed"],
+                "description": data["weather"][0]["description"],
+                "icon": data["weather"][0]["icon"],
+            }
         except Exception as e:
             log.error(f"Error fetching weather data: {e}")
             return self._get_mock_weather(location)
@@ -73,38 +77,175 @@ class WeatherService:
             log.warning("Weather API key not configured, returning mock forecast")
             return self._get_mock_forecast(location, days)
         
+        forecasts = await self.fetch_forecast(location, days)
+        if forecasts is None:
+            return self._get_mock_forecast(location, days)
+        return forecasts
+    
+    async def fetch_forecast(self, location: str, days: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get a real forecast for a location, without the mock fallback.
+        
+        Args:
+            location: Location string
+            days: Number of days to forecast
+            
+        Returns:
+            List of forecast data, or None if the API key is missing or the
+            upstream call failed
+        """
+        if not self.api_key:
+            return None
+        
         try:
+            data = await self._fetch(
+                "forecast",
+                location,
+                {"q": location, "cnt": days * 8}  # 8 forecasts per day (3-hour intervals)
+            )
+            if data is None:
+                return None
+            
+            # dt_txt is UTC; days are bucketed in the location's own time zone
+            offset = data.get("city", {}).get("timezone")
+            zone = timezone(timedelta(seconds=offset)) if offset is not None else self._default_zone()
+            
+            # Process forecast data
+            forecasts = []
+            for item in data.get("list", [])[:days * 8]:
+                forecasts.append({
+                    "datetime": item["dt_txt"],
+                    "local_date": datetime.fromtimestamp(item["dt"], tz=zone).date().isoformat(),
+                    "temperature": item["main"]["temp"],
+                    "humidity": item["main"]["humidity"],
+                    "wind_speed": item["wind"]["speed"],
+                    "description": item["weather"][0]["description"],
+                    "rain": item.get("rain", {}).get("3h", 0),
+                })
+            
+            weather_store.record(location, "forecast", [
+                {**point, "observed_at": datetime.fromtimestamp(item["dt"], tz=timezone.utc)}
+                for point, item in zip(forecasts, data.get("list", []))
+            ])
+            
+            return forecasts
+            
+        except Exception as e:
+            log.error(f"Error fetching forecast data: {e}")
+            return None
+    
+    @staticmethod
+    def summarize_daily(forecast: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Roll three-hourly forecast points up into one summary per day.
+        
+        Days are the location's local calendar days (each point's
+        ``local_date``), not UTC ones.
+        
+        Args:
+            forecast: Forecast points as returned by get_weather_forecast
+        
+        Returns:
+            Per-day min/max temperature, total rain, max wind, mean humidity
+            and the most frequent description, in date order
+        """
+        days: Dict[str, Dict[str, Any]] = {}
+        for point in forecast:
+            date = point["local_date"]
+            day = days.get(date)
+            if day is None:
+                day = days[date] = {
+                    "date": date,
+                    "temp_min": point["temperature"],
+                    "temp_max": point["temperature"],
+                    "rain_total": 0.0,
+                    "wind_max": point["wind_speed"],
+                    "_humidity": 0.0,
+                    "_points": 0,
+                    "_descriptions": Counter(),
+                }
+            day["temp_min"] = min(day["temp_min"], point["temperature"])
+            day["temp_max"] = max(day["temp_max"], point["temperature"])
+            day["rain_total"] += point.get("rain", 0) or 0
+            day["wind_max"] = max(day["wind_max"], point["wind_speed"])
+            day["_humidity"] += point["humidity"]
+            day["_points"] += 1
+            day["_descriptions"][point["description"]] += 1
+        
+        summaries = []
+        for day in days.values():
+            summaries.append({
+                "date": day["date"],
+                "temp_min": day["temp_min"],
+                "temp_max": day["temp_max"],
+                "rain_total": round(day["rain_total"], 2),
+                "wind_max": day["wind_max"],
+                "humidity_avg": round(day["_humidity"] / day["_points"], 1),
+                "description": day["_descriptions"].most_common(1)[0][0],
+            })
+        return summaries
+    
+    @staticmethod
+    def _default_zone() -> tzinfo:
+        """Zone for local days when OpenWeather doesn't report the location's offset."""
+        return ZoneInfo(settings.WEATHER_TIMEZONE)
+    
+    @staticmethod
+    def to_columnar(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """
+        Convert a list of uniform dicts into parallel arrays keyed by field.
+        
+        Keys are sent once instead of once per row, which shrinks forecast
+        payloads considerably for low-bandwidth clients.
+        """
+        if not rows:
+            return {}
+        return {key: [row.get(key) for row in rows] for key in rows[0]}
+    
+    async def _fetch(
+        self,
+        endpoint: str,
+        location: str,
+        params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch an OpenWeather endpoint through the upstream circuit breaker.
+        
+        Args:
+            endpoint: OpenWeather endpoint name (weather, forecast)
+            location: Location string, used for negative caching
+            params: Endpoint-specific query parameters
+            
+        Returns:
+            Decoded JSON, or None when the location is unknown or the
+            circuit is open and the caller should fall back to mock data
+        """
+        cache_key = ("openweather", endpoint, location.strip().lower())
+        if cache_key in negative_cache:
+            log.debug(f"Negative cache hit for {endpoint} {location}")
+            return None
+        
+        async def attempt() -> httpx.Response:
             async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/forecast",
-                    params={
-                        "q": location,
-                        "appid": self.api_key,
-                        "units": "metric",
-                        "cnt": days * 8  # 8 forecasts per day (3-hour intervals)
-                    },
+                return await client.get(
+                    f"{self.base_url}/{endpoint}",
+                    params={**params, "appid": self.api_key, "units": "metric"},
                     timeout=10.0
                 )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Process forecast data
-                forecasts = []
-                for item in data.get("list", [])[:days * 8]:
-                    forecasts.append({
-                        "datetime": item["dt_txt"],
-                        "temperature": item["main"]["temp"],
-                        "humidity": item["main"]["humidity"],
-                        "wind_speed": item["wind"]["speed"],
-                        "description": item["weather"][0]["description"],
-                        "rain": item.get("rain", {}).get("3h", 0),
-                    })
-                
-                return forecasts
-                
-        except Exception as e:
-            log.error(f"Error fetching forecast data: {e}")
-            return self._get_mock_forecast(location, days)
+        
+        try:
+            response = await openweather_upstream.call(attempt)
+        except CircuitOpenError as e:
+            log.warning(f"{e}; serving fallback weather for {location}")
+            return None
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                log.warning(f"No weather data for location {location}")
+                negative_cache.set(cache_key)
+                return None
+            raise
+        
+        return response.json()
     
     async def generate_weather_alerts(
         self,
@@ -243,9 +384,12 @@ class WeatherService:
     def _get_mock_forecast(self, location: str, days: int) -> List[Dict[str, Any]]:
         """Get mock forecast data."""
         forecasts = []
+        now = datetime.now(timezone.utc)
         for i in range(days * 8):
+            moment = now + timedelta(hours=i * 3)
             forecasts.append({
-                "datetime": (datetime.utcnow() + timedelta(hours=i * 3)).isoformat(),
+                "datetime": moment.replace(tzinfo=None).isoformat(),
+                "local_date": moment.astimezone(self._default_zone()).date().isoformat(),
                 "temperature": 28 + (i % 8),
                 "humidity": 60 + (i % 20),
                 "wind_speed": 10 + (i % 10),
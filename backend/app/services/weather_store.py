@@ -0,0 +1,387 @@
+"""
+Time-series store for weather observations and forecasts.
+
+Raw points fetched by the weather service are kept for a recent window in
+monthly partitions, then downsampled to hourly and daily rollups so storage
+per location stays bounded:
+
+- raw points: ``WEATHER_RAW_RETENTION_DAYS``
+- hourly rollups: ``WEATHER_HOURLY_RETENTION_DAYS``
+- daily rollups: ``WEATHER_DAILY_RETENTION_DAYS``
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.logging import log
+from ..db.base import AsyncSessionLocal, engine
+from ..models.weather_observation import WeatherObservation, WeatherObservationRollup
+from .scheduler import spawn_background
+
+RAW_TABLE = WeatherObservation.__tablename__
+ROLLUP_TABLE = WeatherObservationRollup.__tablename__
+
+# Lock key shared by all workers so only one downsamples at a time
+DOWNSAMPLE_LOCK_KEY = 72_028_001
+
+AGGREGATE_FIELDS = ("temp_min", "temp_max", "temp_avg", "humidity_avg", "wind_max", "rain_total")
+
+
+def canonical_location(location: str) -> str:
+    """Normalize a location string, e.g. " New  Delhi , IN" -> "new delhi,in"."""
+    parts = [" ".join(part.split()).lower() for part in location.split(",")]
+    return ",".join(part for part in parts if part)
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"{RAW_TABLE}_p{month:%Y%m}"
+
+
+class WeatherStore:
+    """Writes, downsamples and queries weather observations."""
+
+    def __init__(self):
+        """Initialize weather store."""
+        self._partitions: Set[str] = set()
+
+    def record(self, location: str, kind: str, points: List[Dict[str, Any]]) -> None:
+        """
+        Store fetched points in the background.
+
+        Args:
+            location: Location string as requested
+            kind: "current" or "forecast"
+            points: Dicts with observed_at, temperature, humidity,
+                wind_speed, rain and description
+        """
+        if not settings.WEATHER_STORE_ENABLED or not points:
+            return
+        spawn_background(
+            self.save(canonical_location(location), kind, points),
+            name="weather_store.save"
+        )
+
+    async def save(self, location: str, kind: str, points: List[Dict[str, Any]]) -> None:
+        """Upsert points for one location; later fetches overwrite earlier ones."""
+        rows = [
+            {
+                "location": location,
+                "kind": kind,
+                "observed_at": point["observed_at"],
+                "temperature": point.get("temperature"),
+                "humidity": point.get("humidity"),
+                "wind_speed": point.get("wind_speed"),
+                "rain": point.get("rain"),
+                "description": point.get("description"),
+            }
+            for point in points
+        ]
+        for month in {_month_start(row["observed_at"]) for row in rows}:
+            await self._ensure_partition(month)
+
+        stmt = pg_insert(WeatherObservation).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["location", "kind", "observed_at"],
+            set_={
+                "temperature": stmt.excluded.temperature,
+                "humidity": stmt.excluded.humidity,
+                "wind_speed": stmt.excluded.wind_speed,
+                "rain": stmt.excluded.rain,
+                "description": stmt.excluded.description,
+                "fetched_at": func.now(),
+            }
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+        log.debug(f"Stored {len(rows)} {kind} weather points for {location}")
+
+    async def _ensure_partition(self, month: datetime) -> None:
+        name = _partition_name(month)
+        if name in self._partitions:
+            return
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {RAW_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            ))
+        self._partitions.add(name)
+
+    async def downsample(self) -> None:
+        """
+        Roll raw points up to hourly and hourly to daily, then enforce retention.
+
+        Only complete buckets older than each tier's window are rolled up, so
+        repeated runs are idempotent. Safe to run from every worker; a
+        Postgres advisory lock lets one of them do the work.
+        """
+        now = datetime.now(timezone.utc)
+        raw_cutoff = (now - timedelta(days=settings.WEATHER_RAW_RETENTION_DAYS)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        hourly_cutoff = (now - timedelta(days=settings.WEATHER_HOURLY_RETENTION_DAYS)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        daily_cutoff = now - timedelta(days=settings.WEATHER_DAILY_RETENTION_DAYS)
+
+        async with engine.begin() as conn:
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": DOWNSAMPLE_LOCK_KEY}
+            )
+            if not locked:
+                log.debug("Weather downsampling already running in another worker")
+                return
+
+            rolled_hours = await conn.execute(text(f"""
+                INSERT INTO {ROLLUP_TABLE} AS r
+                    (location, kind, resolution, bucket, temp_min, temp_max, temp_avg,
+                     humidity_avg, wind_max, rain_total, samples, updated_at)
+                SELECT location, kind, 'hour', date_trunc('hour', observed_at),
+                       min(temperature), max(temperature), avg(temperature),
+                       avg(humidity), max(wind_speed),
+                       CASE WHEN kind = 'current' THEN max(rain) ELSE sum(rain) END,
+                       count(*), now()
+                FROM {RAW_TABLE}
+                WHERE observed_at < :cutoff
+                GROUP BY location, kind, date_trunc('hour', observed_at)
+                ON CONFLICT (location, kind, resolution, bucket) DO UPDATE SET
+                    temp_min = LEAST(r.temp_min, EXCLUDED.temp_min),
+                    temp_max = GREATEST(r.temp_max, EXCLUDED.temp_max),
+                    temp_avg = (r.temp_avg * r.samples + EXCLUDED.temp_avg * EXCLUDED.samples)
+                               / (r.samples + EXCLUDED.samples),
+                    humidity_avg = (r.humidity_avg * r.samples + EXCLUDED.humidity_avg * EXCLUDED.samples)
+                                   / (r.samples + EXCLUDED.samples),
+                    wind_max = GREATEST(r.wind_max, EXCLUDED.wind_max),
+                    rain_total = CASE WHEN r.kind = 'current'
+                                      THEN GREATEST(r.rain_total, EXCLUDED.rain_total)
+                                      ELSE COALESCE(r.rain_total, 0) + COALESCE(EXCLUDED.rain_total, 0) END,
+                    samples = r.samples + EXCLUDED.samples,
+                    updated_at = now()
+            """), {"cutoff": raw_cutoff})
+
+            dropped = await self._drop_partitions_before(conn, raw_cutoff)
+            await conn.execute(
+                text(f"DELETE FROM {RAW_TABLE} WHERE observed_at < :cutoff"), {"cutoff": raw_cutoff}
+            )
+
+            rolled_days = await conn.execute(text(f"""
+                INSERT INTO {ROLLUP_TABLE} AS r
+                    (location, kind, resolution, bucket, temp_min, temp_max, temp_avg,
+                     humidity_avg, wind_max, rain_total, samples, updated_at)
+                SELECT location, kind, 'day', date_trunc('day', bucket),
+                       min(temp_min), max(temp_max),
+                       sum(temp_avg * samples) / sum(samples),
+                       sum(humidity_avg * samples) / sum(samples),
+                       max(wind_max), sum(rain_total), sum(samples), now()
+                FROM {ROLLUP_TABLE}
+                WHERE resolution = 'hour' AND bucket < :cutoff
+                GROUP BY location, kind, date_trunc('day', bucket)
+                ON CONFLICT (location, kind, resolution, bucket) DO UPDATE SET
+                    temp_min = LEAST(r.temp_min, EXCLUDED.temp_min),
+                    temp_max = GREATEST(r.temp_max, EXCLUDED.temp_max),
+                    temp_avg = (r.temp_avg * r.samples + EXCLUDED.temp_avg * EXCLUDED.samples)
+                               / (r.samples + EXCLUDED.samples),
+                    humidity_avg = (r.humidity_avg * r.samples + EXCLUDED.humidity_avg * EXCLUDED.samples)
+                                   / (r.samples + EXCLUDED.samples),
+                    wind_max = GREATEST(r.wind_max, EXCLUDED.wind_max),
+                    rain_total = COALESCE(r.rain_total, 0) + COALESCE(EXCLUDED.rain_total, 0),
+                    samples = r.samples + EXCLUDED.samples,
+                    updated_at = now()
+            """), {"cutoff": hourly_cutoff})
+            await conn.execute(
+                text(f"DELETE FROM {ROLLUP_TABLE} WHERE resolution = 'hour' AND bucket < :cutoff"),
+                {"cutoff": hourly_cutoff}
+            )
+            await conn.execute(
+                text(f"DELETE FROM {ROLLUP_TABLE} WHERE resolution = 'day' AND bucket < :cutoff"),
+                {"cutoff": daily_cutoff}
+            )
+
+        log.info(
+            f"Weather downsampling: {rolled_hours.rowcount} hourly and {rolled_days.rowcount} daily "
+            f"buckets updated, {dropped} raw partitions dropped"
+        )
+
+    async def _drop_partitions_before(self, conn, cutoff: datetime) -> int:
+        """Drop monthly raw partitions that end before ``cutoff``."""
+        result = await conn.execute(text("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :parent
+        """), {"parent": RAW_TABLE})
+        dropped = 0
+        for (name,) in result.all():
+            try:
+                month = datetime.strptime(name[-6:], "%Y%m").replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            if _next_month(month) <= cutoff:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                self._partitions.discard(name)
+                dropped += 1
+        return dropped
+
+    async def query(
+        self,
+        db: AsyncSession,
+        location: str,
+        start: datetime,
+        end: datetime,
+        kind: str = "current",
+        resolution: str = "auto"
+    ) -> Dict[str, Any]:
+        """
+        Query stored weather for a location and time range.
+
+        Args:
+            db: Database session
+            location: Location string (canonicalized before lookup)
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            kind: "current" for observations, "forecast" for forecast points
+            resolution: raw, hour, day or auto (picked from the range span)
+
+        Returns:
+            Dict with the resolved resolution and the list of points
+        """
+        location = canonical_location(location)
+        if resolution == "auto":
+            span = end - start
+            if span <= timedelta(days=2):
+                resolution = "raw"
+            elif span <= timedelta(days=31):
+                resolution = "hour"
+            else:
+                resolution = "day"
+
+        if resolution == "raw":
+            result = await db.execute(
+                select(WeatherObservation)
+                .where(
+                    WeatherObservation.location == location,
+                    WeatherObservation.kind == kind,
+                    WeatherObservation.observed_at >= start,
+                    WeatherObservation.observed_at < end,
+                )
+                .order_by(WeatherObservation.observed_at)
+            )
+            points = [
+                {
+                    "time": row.observed_at.isoformat(),
+                    "temperature": row.temperature,
+                    "humidity": row.humidity,
+                    "wind_speed": row.wind_speed,
+                    "rain": row.rain,
+                    "description": row.description,
+                }
+                for row in result.scalars().all()
+            ]
+            return {"location": location, "kind": kind, "resolution": resolution, "points": points}
+
+        # Each tier only holds data the next-finer tier no longer has, so the
+        # answer is the merge of rollups plus raw points aggregated on the fly.
+        buckets: Dict[datetime, Dict[str, Any]] = {}
+        tiers = ["hour"] if resolution == "hour" else ["hour", "day"]
+        for tier in tiers:
+            result = await db.execute(
+                select(WeatherObservationRollup).where(
+                    WeatherObservationRollup.location == location,
+                    WeatherObservationRollup.kind == kind,
+                    WeatherObservationRollup.resolution == tier,
+                    WeatherObservationRollup.bucket >= _truncate(start, tier),
+                    WeatherObservationRollup.bucket < end,
+                )
+            )
+            for row in result.scalars().all():
+                aggregate = {field: getattr(row, field) for field in AGGREGATE_FIELDS}
+                aggregate["samples"] = row.samples
+                _merge_bucket(buckets, _truncate(row.bucket, resolution), aggregate)
+
+        raw_hour = func.date_trunc("hour", WeatherObservation.observed_at)
+        result = await db.execute(
+            select(
+                raw_hour.label("bucket"),
+                func.min(WeatherObservation.temperature).label("temp_min"),
+                func.max(WeatherObservation.temperature).label("temp_max"),
+                func.avg(WeatherObservation.temperature).label("temp_avg"),
+                func.avg(WeatherObservation.humidity).label("humidity_avg"),
+                func.max(WeatherObservation.wind_speed).label("wind_max"),
+                (func.max(WeatherObservation.rain) if kind == "current"
+                 else func.sum(WeatherObservation.rain)).label("rain_total"),
+                func.count().label("samples"),
+            )
+            .where(and_(
+                WeatherObservation.location == location,
+                WeatherObservation.kind == kind,
+                WeatherObservation.observed_at >= _truncate(start, resolution),
+                WeatherObservation.observed_at < end,
+            ))
+            .group_by(raw_hour)
+        )
+        for row in result.mappings().all():
+            aggregate = {field: _as_float(row[field]) for field in AGGREGATE_FIELDS}
+            aggregate["samples"] = row["samples"]
+            _merge_bucket(buckets, _truncate(row["bucket"], resolution), aggregate)
+
+        points = [
+            {"time": bucket.isoformat(), **{k: _round(v) for k, v in aggregate.items()}}
+            for bucket, aggregate in sorted(buckets.items())
+        ]
+        return {"location": location, "kind": kind, "resolution": resolution, "points": points}
+
+
+def _truncate(moment: datetime, resolution: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _as_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _round(value: Any) -> Any:
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def _merge_bucket(buckets: Dict[datetime, Dict[str, Any]], bucket: datetime, new: Dict[str, Any]) -> None:
+    """Fold one aggregate into the bucket map, weighting averages by sample count."""
+    current = buckets.get(bucket)
+    if current is None:
+        buckets[bucket] = dict(new)
+        return
+
+    def pick(fn, a, b):
+        values = [v for v in (a, b) if v is not None]
+        return fn(values) if values else None
+
+    def weighted(a, b):
+        if a is None or b is None:
+            return a if b is None else b
+        return (a * current["samples"] + b * new["samples"]) / (current["samples"] + new["samples"])
+
+    current["temp_min"] = pick(min, current["temp_min"], new["temp_min"])
+    current["temp_max"] = pick(max, current["temp_max"], new["temp_max"])
+    current["temp_avg"] = weighted(current["temp_avg"], new["temp_avg"])
+    current["humidity_avg"] = weighted(current["humidity_avg"], new["humidity_avg"])
+    current["wind_max"] = pick(max, current["wind_max"], new["wind_max"])
+    current["rain_total"] = pick(sum, current["rain_total"], new["rain_total"])
+    current["samples"] += new["samples"]
+
+
+# Create singleton instance
+weather_store = WeatherStore()
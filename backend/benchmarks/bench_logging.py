@@ -0,0 +1,98 @@
+"""
+Benchmark: latency a log call adds to request handling.
+
+Runs many concurrent asyncio "requests", each logging a few lines between
+short awaits, and reports p50/p99 of the time spent inside the log calls.
+Compares the old setup (file written synchronously by the caller, with
+rotation and zip compression on the calling thread), loguru's own
+``enqueue=True`` and the queued JSON sink from ``app.core.logging``. A small
+rotation size makes rotations and compressions happen during the run, as
+they do on a busy server.
+
+Usage (from backend/, with .env configured like the other scripts):
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging 500 20
+"""
+import asyncio
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from loguru import logger
+
+from app.core.logging import LogWriter, _patch_record, _json_format, request_id_var
+
+TASKS = 200
+LINES_PER_TASK = 25
+ROTATION = "1 MB"
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+
+async def fake_request(number: int, lines: int, timings: List[float]):
+    request_id_var.set(f"req-{number}")
+    for line in range(lines):
+        started = time.perf_counter()
+        logger.bind(commodity="Cotton", market="Rajkot").info(f"request {number} step {line}: fetched 100 records")
+        timings.append(time.perf_counter() - started)
+        await asyncio.sleep(0)
+
+
+async def run(tasks: int, lines: int) -> List[float]:
+    timings: List[float] = []
+    await asyncio.gather(*(fake_request(number, lines, timings) for number in range(tasks)))
+    return timings
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def measure(label: str, tasks: int, lines: int, directory: Path, queued: bool = False, **sink_options):
+    path = directory / f"{label.split()[0]}.log"
+    logger.remove()
+    logger.configure(patcher=None)
+    writer = None
+    if queued:
+        # Same wiring as app.core.logging.setup_logging
+        file_logger = copy.deepcopy(logger)
+        file_logger.add(path, format="{message}", level=0, rotation=ROTATION, compression="zip")
+        writer = LogWriter(max_lines=1_000_000)
+        logger.add(writer.sink(file_logger.opt(raw=True).info), **sink_options)
+        writer.start()
+    else:
+        logger.add(path, rotation=ROTATION, compression="zip", **sink_options)
+    logger.configure(patcher=_patch_record)
+
+    started = time.perf_counter()
+    timings = asyncio.run(run(tasks, lines))
+    elapsed = time.perf_counter() - started
+    # Throughput counts only the callers; queued lines are written afterwards
+    if writer is not None:
+        writer.stop(timeout=60)
+    logger.remove()
+
+    print(
+        f"{label:<24} | {percentile(timings, 0.5) * 1e6:>7.1f}us | {percentile(timings, 0.99) * 1e6:>7.1f}us | "
+        f"{max(timings) * 1e3:>7.2f}ms | {len(timings) / elapsed:>8,.0f}/s"
+    )
+
+
+def main(tasks: int, lines: int):
+    print(f"{tasks} concurrent tasks x {lines} log lines")
+    print(f"{'sink':<24} | {'p50':>9} | {'p99':>9} | {'max':>9} | throughput")
+    print("-" * 72)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        measure("sync text (old)", tasks, lines, directory, format=TEXT_FORMAT)
+        measure("sync json", tasks, lines, directory, format=_json_format)
+        measure("loguru enqueue json", tasks, lines, directory, format=_json_format, enqueue=True)
+        measure("queued json (new)", tasks, lines, directory, queued=True, format=_json_format)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [TASKS, LINES_PER_TASK][len(args):]))
@@ -0,0 +1,158 @@
+"""
+Benchmark: Mandi record cleaning, per-record loop vs. columnar NumPy.
+
+Generates synthetic AGMARKNET records and times the two stages every
+ingest goes through: cleaning (parse, validate, dedupe on the upsert key)
+and response building (latest report per market, top 20 by modal price).
+The legacy implementation is kept here as the baseline; both sides start
+from what they get in production (raw records for cleaning, the cache
+read's output for the top-K stage) and end with row dicts.
+
+Usage (from backend/, with .env configured like the other scripts):
+    python -m benchmarks.bench_mandi_cleaning
+    python -m benchmarks.bench_mandi_cleaning 10000 100000
+"""
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from app.services.mandi_cleaning import COLUMNS, PriceColumns, clean_records
+
+SIZES = [10_000, 100_000, 1_000_000]
+MAX_VALID_PRICE = 100000
+TOP_MARKETS = 20
+
+
+def make_records(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Synthetic records with the formatting quirks seen upstream."""
+    rng = random.Random(seed)
+    states = [f"State {i}" for i in range(30)]
+    commodities = [f"Commodity {i}" for i in range(300)]
+    days = [(date(2026, 10, 1) + timedelta(days=i)).strftime("%d/%m/%Y") for i in range(7)]
+
+    records = []
+    for i in range(n):
+        modal = rng.randint(500, 12000)
+        if i % 50 == 0:
+            modal_str = "NA"
+        elif i % 7 == 0:
+            modal_str = f"{modal:,}"
+        else:
+            modal_str = f"{modal}.00" if i % 3 else str(modal)
+        market = rng.randrange(3000)
+        records.append({
+            "state": states[market % 30],
+            "district": f" District {market % 700} ",
+            "market": f"Market {market}",
+            "commodity": rng.choice(commodities),
+            "min_price": str(modal - rng.randint(0, 300)) if i % 11 else "0",
+            "max_price": str(modal + rng.randint(0, 300)),
+            "modal_price": modal_str,
+            "arrival_date": rng.choice(days),
+        })
+    # Some exact re-reports, as pages overlap between sync windows
+    records.extend(records[:n // 50])
+    return records
+
+
+def legacy_clean(records: List[Dict[str, Any]], commodity: str) -> List[Dict[str, Any]]:
+    """The per-record loop this module replaced, plus the dict dedupe done at upsert."""
+    rows = []
+    for record in records:
+        try:
+            modal_str = str(record.get("modal_price", "0")).replace(",", "").strip()
+            min_str = str(record.get("min_price", "0")).replace(",", "").strip()
+            max_str = str(record.get("max_price", "0")).replace(",", "").strip()
+
+            modal = int(float(modal_str)) if modal_str and modal_str != "0" else 0
+            min_price = int(float(min_str)) if min_str and min_str != "0" else modal
+            max_price = int(float(max_str)) if max_str and max_str != "0" else modal
+
+            if modal == 0 or modal > MAX_VALID_PRICE:
+                continue
+
+            arrival = str(record.get("arrival_date", "N/A")).strip()
+            try:
+                arrival_date = datetime.strptime(arrival, "%d/%m/%Y").date()
+            except ValueError:
+                arrival_date = None
+            rows.append({
+                "state": str(record.get("state", "")).strip(),
+                "district": str(record.get("district", "")).strip(),
+                "market": str(record.get("market", "Unknown")).strip(),
+                "commodity": str(record.get("commodity", commodity)).strip(),
+                "min_price": min_price,
+                "max_price": max_price,
+                "modal_price": modal,
+                "date": arrival,
+                "arrival_date": arrival_date,
+            })
+        except Exception:
+            continue
+    key = ("state", "district", "market", "commodity", "date")
+    return list({tuple(row[k] for k in key): row for row in rows}.values())
+
+
+def legacy_top(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Full sort, f-string keyed dedupe, full sort again, slice."""
+    latest = sorted(rows, key=lambda r: r.get("arrival_date") or date.min, reverse=True)
+    seen = set()
+    prices = []
+    for row in latest:
+        market_key = f"{row['state']}-{row['market']}-{row['commodity']}"
+        if market_key in seen:
+            continue
+        seen.add(market_key)
+        prices.append(row)
+    prices.sort(key=lambda x: x["modal_price"], reverse=True)
+    return prices[:TOP_MARKETS]
+
+
+def columnar_clean(records: List[Dict[str, Any]], commodity: str) -> List[Dict[str, Any]]:
+    """Cleaning plus the row dicts the upsert takes, as the ingest does it."""
+    return clean_records(records, commodity).to_rows()
+
+
+def columnar_top(rows: List[tuple]) -> List[Dict[str, Any]]:
+    """From result tuples, as the cache read returns them, to the top-K rows."""
+    return PriceColumns.from_tuples(rows).top_latest(TOP_MARKETS).to_rows()
+
+
+def canonical(rows: List[Dict[str, Any]]) -> List[tuple]:
+    return sorted(tuple(sorted(row.items())) for row in rows)
+
+
+def best_of(func, *args, repeat: int = 3):
+    """Fastest of ``repeat`` runs, in seconds, and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(sizes: List[int]):
+    print(f"{'records':>10} | {'stage':<6} | {'legacy':>9} | {'columnar':>9} | speedup")
+    print("-" * 54)
+    for n in sizes:
+        records = make_records(n)
+        repeat = 3 if n <= 100_000 else 1
+
+        legacy_s, legacy_rows = best_of(legacy_clean, records, "", repeat=repeat)
+        columnar_s, rows = best_of(columnar_clean, records, "", repeat=repeat)
+        assert canonical(legacy_rows) == canonical(rows), "cleaned rows differ"
+        print(f"{n:>10,} | {'clean':<6} | {legacy_s * 1000:>7.0f}ms | {columnar_s * 1000:>7.0f}ms | {legacy_s / columnar_s:.1f}x")
+
+        legacy_s, legacy_top_rows = best_of(legacy_top, rows, repeat=repeat)
+        tuples = [tuple(row[name] for name in COLUMNS) for row in rows]
+        columnar_s, top_rows = best_of(columnar_top, tuples, repeat=repeat)
+        assert [r["modal_price"] for r in legacy_top_rows] == [r["modal_price"] for r in top_rows], "top-K differs"
+        print(f"{n:>10,} | {'top-K':<6} | {legacy_s * 1000:>7.0f}ms | {columnar_s * 1000:>7.0f}ms | {legacy_s / columnar_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
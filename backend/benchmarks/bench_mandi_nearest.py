@@ -0,0 +1,69 @@
+"""
+Benchmark: nearest-best-market queries, KD-tree vs. a full scan.
+
+Places synthetic markets across India, gives most of them a price and
+times top-K queries by net realizable price from random farm locations.
+The baseline computes the net price of every market with NumPy and takes
+the top K; both must return the same markets.
+
+Usage (from backend/, with .env configured like the other scripts):
+    python -m benchmarks.bench_mandi_nearest
+    python -m benchmarks.bench_mandi_nearest 1000 10000
+"""
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.mandi_geo import KDTree, chord_to_km, to_unit_vectors
+
+SIZES = [1_000, 5_000, 50_000]
+QUERIES = 200
+K = 10
+COST_PER_KM = 2.0  # Rs per quintal per km
+
+
+def make_catalog(n: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Market points and prices; about 20% of markets don't report the commodity."""
+    rng = np.random.default_rng(seed)
+    latitude = rng.uniform(8.0, 32.0, n)
+    longitude = rng.uniform(68.0, 90.0, n)
+    prices = rng.uniform(5000, 8000, n)
+    prices[rng.random(n) < 0.2] = -np.inf
+    return to_unit_vectors(latitude, longitude), prices
+
+
+def full_scan(points: np.ndarray, prices: np.ndarray, query: np.ndarray) -> List[int]:
+    diff = points - query
+    net = prices - COST_PER_KM * chord_to_km(np.sqrt((diff * diff).sum(axis=1)))
+    top = np.argpartition(-net, K - 1)[:K]
+    return top[np.argsort(-net[top])].tolist()
+
+
+def main(sizes: List[int]):
+    print(f"{'markets':>8} | {'full scan':>10} | {'kd-tree':>10} | speedup")
+    print("-" * 46)
+    rng = np.random.default_rng(7)
+    for n in sizes:
+        points, prices = make_catalog(n)
+        tree = KDTree(points)
+        tree_prices = prices[tree.order]
+        maxima = tree.node_maxima(tree_prices)
+        queries = to_unit_vectors(rng.uniform(20.0, 24.5, QUERIES), rng.uniform(68.5, 74.5, QUERIES))
+
+        started = time.perf_counter()
+        expected = [full_scan(points, prices, query) for query in queries]
+        scan_s = (time.perf_counter() - started) / QUERIES
+
+        started = time.perf_counter()
+        found = [tree.top_net(query, tree_prices, maxima, COST_PER_KM, K) for query in queries]
+        tree_s = (time.perf_counter() - started) / QUERIES
+
+        for want, got in zip(expected, found):
+            assert want == [int(tree.order[position]) for _, position, _ in got], "results differ"
+        print(f"{n:>8,} | {scan_s * 1000:>8.3f}ms | {tree_s * 1000:>8.3f}ms | {scan_s / tree_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,83 @@
+"""
+Benchmark: per-request cost of the middleware stack.
+
+Calls the app in-process as an ASGI callable (no server, no sockets) with
+GET /health, and the app's router on its own (same routes, no middleware);
+the difference is what the middleware stack adds to every request. Run it
+before and after a middleware change to see what the change costs.
+
+Usage (from backend/, with .env configured like the other scripts):
+    python -m benchmarks.bench_middleware
+    python -m benchmarks.bench_middleware 20000
+"""
+import asyncio
+import statistics
+import sys
+import time
+from typing import Tuple
+
+from app.core.config import settings
+from app.main import app
+
+REQUESTS = 5000
+ROUNDS = 5
+
+
+async def call(asgi_app, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+        "state": {},
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asgi_app(scope, receive, send)
+    return status
+
+
+async def per_request_us(asgi_app, requests: int) -> Tuple[float, float]:
+    """Best and median of ROUNDS mean times per request, in microseconds."""
+    assert await call(asgi_app, "/health") == 200
+    for _ in range(200):
+        await call(asgi_app, "/health")
+    rounds = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(requests):
+            await call(asgi_app, "/health")
+        rounds.append((time.perf_counter() - started) / requests * 1e6)
+    return min(rounds), statistics.median(rounds)
+
+
+async def main(requests: int):
+    bare_min, bare_median = await per_request_us(app.router, requests)
+    full_min, full_median = await per_request_us(app, requests)
+    print(f"GET /health, {requests:,} requests x {ROUNDS} rounds (profiling {settings.PROFILING_ENABLED}, "
+          f"rate limiting {settings.RATE_LIMIT_ENABLED})")
+    print(f"{'app':<22} | {'best':>9} | {'median':>9}")
+    print("-" * 46)
+    print(f"{'router only':<22} | {bare_min:>7.1f}us | {bare_median:>7.1f}us")
+    print(f"{'full stack':<22} | {full_min:>7.1f}us | {full_median:>7.1f}us")
+    print(f"\nMiddleware overhead: {full_min - bare_min:.1f}us per request (best rounds)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS))
@@ -0,0 +1,173 @@
+"""
+Benchmark: cold start of a fresh worker.
+
+Measures two things, each in a new interpreter:
+
+- import time of ``app.main``, with a ``-X importtime`` breakdown by
+  top-level package (the package's own modules, excluding what they pull
+  in from other packages) and the slowest single imports;
+- time to first request: from spawning uvicorn to the first 200 from
+  /health, i.e. interpreter start, imports and the lifespan startup
+  (which connects to DATABASE_URL, so point it at a reachable Postgres).
+
+Results are compared with benchmarks/baselines/startup.json like
+benchmarks.micro; the run exits with status 1 when either figure is more
+than --threshold slower than its baseline, or, with --budget, when the
+first request takes longer than that.
+
+Usage (from backend/, with .env configured like the other scripts):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --top 30 --budget 1.0
+    python -m benchmarks.bench_startup --save      # record new baselines
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "startup.json"
+BACKEND = Path(__file__).resolve().parent.parent
+RUNS = 3
+DEFAULT_THRESHOLD = 0.2
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile() -> List[Tuple[str, float, float]]:
+    """-X importtime rows for ``import app.main``: (module, self seconds, cumulative seconds)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((match[4], int(match[1]) / 1e6, int(match[2]) / 1e6))
+    return rows
+
+
+def import_seconds() -> float:
+    """Wall time of ``import app.main`` without the importtime overhead."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_request_seconds(timeout: float = 30.0) -> float:
+    """Seconds from spawning a uvicorn worker to its first successful /health."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND, env={**os.environ, "LOG_LEVEL": "WARNING"},
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise SystemExit(f"uvicorn exited with code {process.returncode}:\n{process.stderr.read().decode()}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise SystemExit(f"no response from /health within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+
+def by_package(rows: List[Tuple[str, float, float]]) -> Counter:
+    totals: Counter = Counter()
+    for module, self_seconds, _ in rows:
+        totals[module.split(".")[0]] += self_seconds
+    return totals
+
+
+def load_baselines() -> Dict[str, float]:
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text()).get("results", {})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="Packages and imports to list")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--budget", type=float, help="Fail if the first request takes longer (seconds)")
+    parser.add_argument("--save", action="store_true", help="Record the results as the new baselines")
+    args = parser.parse_args()
+
+    rows = import_profile()
+    packages = by_package(rows)
+    total = sum(packages.values())
+    print(f"-X importtime, import app.main: {total * 1000:.0f}ms in {len(rows)} modules (profiler overhead included)")
+    print(f"\n{'package':<28} | {'self':>8} | share")
+    print("-" * 48)
+    for package, seconds in packages.most_common(args.top):
+        print(f"{package:<28} | {seconds * 1000:>6.0f}ms | {seconds / total:>5.1%}")
+    print(f"\n{'slowest imports (cumulative)':<60} | {'time':>8}")
+    print("-" * 72)
+    for module, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{module:<60} | {cumulative * 1000:>6.0f}ms")
+
+    results = {
+        "import_s": round(statistics.median(import_seconds() for _ in range(RUNS)), 3),
+        "first_request_s": round(statistics.median(first_request_seconds() for _ in range(RUNS)), 3),
+    }
+    baselines = load_baselines()
+    failures = []
+    print(f"\n{'startup (median of ' + str(RUNS) + ')':<28} | {'time':>8} | vs baseline")
+    print("-" * 54)
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        if baseline:
+            change = (seconds - baseline) / baseline
+            verdict = f"{change:>+7.1%}"
+            if change > args.threshold:
+                verdict += "  REGRESSION"
+                failures.append(name)
+        else:
+            verdict = "    new"
+        print(f"{name:<28} | {seconds * 1000:>6.0f}ms | {verdict}")
+    if args.budget and results["first_request_s"] > args.budget:
+        print(f"\nFirst request took longer than the {args.budget:.1f}s budget")
+        failures.append("first_request_budget")
+
+    if args.save:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps({
+            "python": sys.version.split()[0],
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "results": results,
+            "packages_ms": {package: round(seconds * 1000, 1) for package, seconds in packages.most_common(args.top)},
+        }, indent=2) + "\n")
+        print(f"\nBaselines saved to {BASELINE_PATH}")
+        return 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
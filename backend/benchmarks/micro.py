@@ -0,0 +1,248 @@
+"""
+Micro-benchmarks for the pure-Python code on the request path, with a
+regression gate.
+
+Covers mandi record cleaning, scheme/tip language mapping, weather alert
+building and Gemini history assembly, on inputs sized like production
+requests. Each case is timed the way pytest-benchmark does it: calibrate
+the iterations per round to about ROUND_SECONDS, run ROUNDS rounds with
+the garbage collector off, and report the per-call min/median/stddev.
+
+Baselines live in benchmarks/baselines/micro.json. A run compares each
+case's min against the baseline and exits with status 1 if any case got
+slower by more than --threshold, so it can gate CI. Baselines are only
+comparable on the same machine; re-record them (--save) when the machine
+changes or a slowdown is intended.
+
+Usage (from backend/, with .env configured like the other scripts):
+    python -m benchmarks.micro                  # compare against baselines
+    python -m benchmarks.micro -k localize      # only cases matching
+    python -m benchmarks.micro --threshold 0.1
+    python -m benchmarks.micro --save           # record new baselines
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from app.api.v1.endpoints.schemes import localize_scheme
+from app.api.v1.endpoints.tips import localize_tip
+from app.models.scheme import Scheme
+from app.models.tip import Tip
+from app.services.ai_service import AIService
+from app.services.mandi_cleaning import clean_records
+from app.services.mandi_service import STATE_PAGE_SIZE
+from app.services.weather_service import weather_service
+from benchmarks.bench_mandi_cleaning import make_records
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+ROUNDS = 15
+ROUND_SECONDS = 0.02
+DEFAULT_THRESHOLD = 0.2
+
+# name -> zero-argument callable; inputs are built once, outside the timing
+CASES: Dict[str, Callable[[], Any]] = {}
+
+
+def case(name: str):
+    def register(setup: Callable[[], Callable[[], Any]]):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def make_schemes(n: int) -> List[Scheme]:
+    """Transient schemes like the seeded ones; every third lacks Gujarati text."""
+    now = datetime.now(timezone.utc)
+    schemes = []
+    for i in range(n):
+        gu = None if i % 3 == 0 else "યોજના"
+        schemes.append(Scheme(
+            id=uuid.uuid4(),
+            name_en=f"Scheme {i}", name_hi=f"योजना {i}", name_gu=gu and f"{gu} {i}",
+            description_en="Financial support for farmers. " * 8, description_hi="किसानों के लिए सहायता। " * 8,
+            description_gu=gu and "ખેડૂતો માટે સહાય. " * 8,
+            eligibility_en="Small and marginal farmers.", eligibility_hi="छोटे किसान।", eligibility_gu=gu,
+            benefits_en="Rs 6000 per year.", benefits_hi="प्रति वर्ष 6000 रुपये।", benefits_gu=gu,
+            application_url="https://example.gov.in/apply", category="subsidy", is_active=True, priority=i,
+            scheme_metadata={"ministry": "Agriculture"}, created_at=now, updated_at=now,
+        ))
+    return schemes
+
+
+def make_tips(n: int) -> List[Tip]:
+    """Transient tips like the seeded ones; every fourth lacks Hindi text."""
+    now = datetime.now(timezone.utc)
+    tips = []
+    for i in range(n):
+        hi = None if i % 4 == 0 else "सुझाव"
+        tips.append(Tip(
+            id=uuid.uuid4(),
+            title_en=f"Tip {i}", title_hi=hi and f"{hi} {i}", title_gu=f"સલાહ {i}",
+            description_en="Water early in the morning. " * 4, description_hi=hi and "सुबह सिंचाई करें। " * 4,
+            description_gu="સવારે પાણી આપો. " * 4,
+            content_en="Drip irrigation saves water. " * 20, content_hi=hi, content_gu="ટપક સિંચાઈ. " * 20,
+            category="irrigation", icon="Droplets", season="summer", is_active=True, priority=i,
+            tip_metadata=None, created_at=now, updated_at=now,
+        ))
+    return tips
+
+
+def make_conversation(n: int) -> List[Dict[str, str]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant",
+         "content": ("When should I irrigate my cotton? " if i % 2 == 0 else "Irrigate every 8-10 days. ") * 6}
+        for i in range(n)
+    ]
+
+
+@case("mandi_clean[state_page]")
+def bench_clean_page():
+    records = make_records(STATE_PAGE_SIZE)
+    return lambda: clean_records(records, "")
+
+
+@case("mandi_clean[sync_batch]")
+def bench_clean_batch():
+    records = make_records(1000)
+    return lambda: clean_records(records, "")
+
+
+@case("localize_scheme[list_gu]")
+def bench_localize_schemes():
+    schemes = make_schemes(20)
+    return lambda: [localize_scheme(s, "gu") for s in schemes]
+
+
+@case("localize_tip[list_hi]")
+def bench_localize_tips():
+    tips = make_tips(50)
+    return lambda: [localize_tip(t, "hi") for t in tips]
+
+
+@case("weather_create_alert")
+def bench_create_alert():
+    return lambda: weather_service._create_alert(
+        location="Rajkot,IN", severity="high", alert_type="rain", icon="CloudRain",
+        temperature=31.5, humidity=82, wind_speed=6.1, rainfall=24.0, language="gu",
+    )
+
+
+@case("gemini_history[20_messages]")
+def bench_gemini_history():
+    messages = make_conversation(20)
+    instruction = "\n\n**CRITICAL RULE:** You MUST respond *only* in the Gujarati language."
+    return lambda: AIService._gemini_history(messages, instruction, "gu")
+
+
+def measure(func: Callable[[], Any]) -> Dict[str, float]:
+    """Per-call timings in microseconds, pytest-benchmark style."""
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - started >= ROUND_SECONDS:
+            break
+        iterations *= 2
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        rounds = []
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            rounds.append((time.perf_counter() - started) / iterations * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "min_us": round(min(rounds), 3),
+        "median_us": round(statistics.median(rounds), 3),
+        "stddev_us": round(statistics.stdev(rounds), 3),
+        "ops": round(1e6 / min(rounds), 1),
+        "iterations": iterations,
+    }
+
+
+def machine_info() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def load_baselines() -> Dict[str, Any]:
+    if not BASELINE_PATH.exists():
+        return {"machine": {}, "results": {}}
+    return json.loads(BASELINE_PATH.read_text())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown of min time against the baseline (0.2 = 20%%)")
+    parser.add_argument("--save", action="store_true", help="Record the results as the new baselines")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.pattern in name]
+    if not names:
+        print(f"No cases match {args.pattern!r}; cases: {', '.join(CASES)}")
+        return 1
+
+    baselines = load_baselines()
+    if baselines["machine"] and baselines["machine"] != machine_info() and not args.save:
+        print(f"note: baselines were recorded on {baselines['machine']}, this is {machine_info()}")
+
+    results = {}
+    regressions = []
+    print(f"{'case':<30} | {'min':>10} | {'median':>10} | {'stddev':>9} | {'ops/s':>10} | vs baseline")
+    print("-" * 94)
+    for name in names:
+        stats = measure(CASES[name]())
+        results[name] = stats
+        baseline = baselines["results"].get(name)
+        if baseline:
+            change = (stats["min_us"] - baseline["min_us"]) / baseline["min_us"]
+            verdict = f"{change:>+7.1%}"
+            if change > args.threshold:
+                verdict += "  REGRESSION"
+                regressions.append(name)
+        else:
+            verdict = "    new"
+        print(
+            f"{name:<30} | {stats['min_us']:>8.1f}us | {stats['median_us']:>8.1f}us | "
+            f"{stats['stddev_us']:>7.1f}us | {stats['ops']:>10,.0f} | {verdict}"
+        )
+
+    if args.save:
+        baselines["machine"] = machine_info()
+        baselines["recorded_at"] = datetime.now().isoformat(timespec="seconds")
+        baselines["results"].update(results)
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, ensure_ascii=False) + "\n")
+        print(f"\nBaselines saved to {BASELINE_PATH}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
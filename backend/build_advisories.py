@@ -0,0 +1,25 @@
+"""
+Script to rebuild crop-weather advisories on demand.
+
+Usage:
+    python build_advisories.py                 # all ADVISORY_DISTRICTS
+    python build_advisories.py Rajkot,IN Surat,IN
+"""
+import asyncio
+import sys
+from app.services.advisory_service import advisory_service
+from app.core.logging import log
+
+
+async def main(locations):
+    """Run the advisory batch pipeline."""
+    try:
+        count = await advisory_service.build_all(locations or None)
+        log.info(f"✅ Built {count} advisories")
+    except Exception as e:
+        log.error(f"❌ Error building advisories: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,4 @@
+"""
+Load tests: scripted user mixes driven against the app with local stand-ins
+for OpenWeather, data.gov.in and the LLM providers. See ``run.py``.
+"""
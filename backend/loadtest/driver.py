@@ -0,0 +1,154 @@
+"""
+Closed-loop asyncio load driver.
+
+Each virtual user plays sessions of its persona back to back until the
+test ends, waiting an exponentially distributed think time between steps.
+Users start evenly over the ramp-up period. Every request's latency and
+outcome is recorded under its endpoint label. While the test runs, the
+app's ``/metrics`` is scraped for the DB pool gauges.
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import httpx
+
+from .scenarios import MIXES, PERSONAS
+
+# Seconds between /metrics scrapes for pool gauges
+POOL_SAMPLE_INTERVAL = 0.5
+
+
+class TestOver(Exception):
+    """Raised inside a session once the test duration has passed."""
+
+
+class Recorder:
+    """Latencies and outcomes by endpoint label."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, label: str, seconds: float, outcome: str) -> None:
+        self.latencies[label].append(seconds)
+        self.statuses[label][outcome] += 1
+
+
+class VirtualUser:
+    def __init__(self, number: int, client: httpx.AsyncClient, recorder: Recorder, deadline: float,
+                 think_time: float, seed: int):
+        self.number = number
+        self.client = client
+        self.recorder = recorder
+        self.deadline = deadline
+        self.think_time = think_time
+        self.rng = random.Random(seed * 100003 + number)
+
+    async def think(self) -> None:
+        if self.think_time > 0:
+            await asyncio.sleep(min(self.rng.expovariate(1 / self.think_time), self.think_time * 5))
+
+    async def get(self, label: str, path: str, **kwargs) -> Any:
+        return await self.request(label, "GET", path, **kwargs)
+
+    async def post(self, label: str, path: str, **kwargs) -> Any:
+        return await self.request(label, "POST", path, **kwargs)
+
+    async def request(self, label: str, method: str, path: str, **kwargs) -> Any:
+        """Time one request; returns the decoded JSON body, or None on failure."""
+        if time.monotonic() >= self.deadline:
+            raise TestOver()
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.add(label, time.monotonic() - started, type(e).__name__)
+            return None
+        self.recorder.add(label, time.monotonic() - started, str(response.status_code))
+        if response.status_code >= 400:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+
+class PoolSampler:
+    """Scrapes the DB pool gauges from the app's Prometheus endpoint."""
+
+    GAUGES = ("db_pool_size", "db_pool_checked_out", "db_pool_overflow")
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.samples: List[Dict[str, float]] = []
+
+    async def run(self, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            try:
+                response = await self.client.get("/metrics", timeout=2.0)
+                sample = {}
+                for line in response.text.splitlines():
+                    name, _, value = line.partition(" ")
+                    if name in self.GAUGES:
+                        sample[name] = float(value)
+                if sample:
+                    self.samples.append(sample)
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(POOL_SAMPLE_INTERVAL)
+
+
+async def run_load(
+    target: str,
+    users: int,
+    duration: float,
+    ramp_up: float,
+    mix: str,
+    think_time: float,
+    seed: int = 1,
+    timeout: float = 30.0,
+) -> Dict[str, Any]:
+    """
+    Run a load test against ``target`` (base URL of the app).
+
+    Returns raw results for ``report.summarize``: latencies and outcomes by
+    endpoint, pool samples and the measured wall-clock window.
+    """
+    weights = MIXES[mix]
+    rng = random.Random(seed)
+    personas = rng.choices(list(weights), weights=list(weights.values()), k=users)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users + 1, max_keepalive_connections=users + 1)
+
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + duration
+        sampler = PoolSampler(client)
+
+        async def play(number: int, persona: str, delay: float):
+            await asyncio.sleep(delay)
+            user = VirtualUser(number, client, recorder, deadline, think_time, seed)
+            session = PERSONAS[persona]
+            try:
+                while True:
+                    await session(user)
+                    await user.think()
+            except TestOver:
+                pass
+
+        await asyncio.gather(
+            sampler.run(deadline),
+            *(play(number, persona, ramp_up * number / users) for number, persona in enumerate(personas)),
+        )
+        elapsed = time.monotonic() - started
+
+    return {
+        "elapsed": elapsed,
+        "personas": {name: personas.count(name) for name in weights},
+        "latencies": dict(recorder.latencies),
+        "statuses": {label: dict(counts) for label, counts in recorder.statuses.items()},
+        "pool_samples": sampler.samples,
+    }
@@ -0,0 +1,179 @@
+"""
+Local stand-ins for the upstream APIs, for load tests.
+
+One server answers the OpenWeather, data.gov.in (AGMARKNET), OpenAI and
+Gemini requests the app makes, with plausible payloads and a configurable
+latency and error rate, so a load test measures our service and not the
+providers (or our API quotas).
+
+Usage (from backend/):
+    python -m loadtest.fake_upstreams --port 9100 --llm-latency 1.5
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Mean latency (seconds) and error rate per upstream; set from the command line
+config: Dict[str, float] = {
+    "weather_latency": 0.08,
+    "datagov_latency": 0.4,
+    "llm_latency": 1.5,
+    "error_rate": 0.0,
+}
+
+MARKETS = [
+    ("Gujarat", "Rajkot", "Rajkot"), ("Gujarat", "Rajkot", "Gondal"), ("Gujarat", "Rajkot", "Jasdan"),
+    ("Gujarat", "Ahmedabad", "Ahmedabad"), ("Gujarat", "Ahmedabad", "Viramgam"), ("Gujarat", "Amreli", "Amreli"),
+    ("Gujarat", "Junagadh", "Junagadh"), ("Gujarat", "Junagadh", "Keshod"), ("Gujarat", "Mehsana", "Unjha"),
+    ("Gujarat", "Banaskantha", "Deesa"), ("Gujarat", "Surat", "Surat"), ("Gujarat", "Vadodara", "Vadodara"),
+    ("Maharashtra", "Nashik", "Lasalgaon"), ("Maharashtra", "Pune", "Pune"), ("Rajasthan", "Kota", "Kota"),
+    ("Madhya Pradesh", "Indore", "Indore"), ("Punjab", "Ludhiana", "Khanna"), ("Uttar Pradesh", "Agra", "Agra"),
+]
+
+BASE_PRICES = {"Wheat": 2400, "Cotton": 7000, "Groundnut": 6200, "Cumin": 24000, "Onion": 1800, "Castor Seed": 6000}
+
+app = FastAPI(title="Fake upstreams")
+
+
+async def simulate(mean: float):
+    """Wait about ``mean`` seconds (log-normal, like real API latencies); maybe fail."""
+    if mean > 0:
+        await asyncio.sleep(mean * random.lognormvariate(-0.08, 0.4))
+    if random.random() < config["error_rate"]:
+        return JSONResponse(status_code=503, content={"message": "simulated upstream failure"})
+    return None
+
+
+# OpenWeather
+
+def _weather_point(city: str, at: datetime) -> Dict[str, Any]:
+    rng = random.Random(f"{city}{at:%Y%m%d%H}")
+    temp = round(rng.uniform(18, 38), 1)
+    return {
+        "dt": int(at.timestamp()),
+        "main": {"temp": temp, "feels_like": temp + 1.5, "temp_min": temp - 2, "temp_max": temp + 2,
+                 "humidity": rng.randint(30, 95)},
+        "wind": {"speed": round(rng.uniform(0.5, 12), 1)},
+        "weather": [{"description": rng.choice(["clear sky", "few clouds", "light rain", "haze"]), "icon": "01d"}],
+        "rain": {"1h": round(rng.uniform(0, 3), 1), "3h": round(rng.uniform(0, 6), 1)},
+    }
+
+
+@app.get("/data/2.5/weather")
+async def openweather_current(q: str = "Delhi,IN"):
+    failure = await simulate(config["weather_latency"])
+    if failure:
+        return failure
+    return {"name": q.split(",")[0], **_weather_point(q, datetime.now(timezone.utc))}
+
+
+@app.get("/data/2.5/forecast")
+async def openweather_forecast(q: str = "Delhi,IN", cnt: int = 40):
+    failure = await simulate(config["weather_latency"])
+    if failure:
+        return failure
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    points = []
+    for i in range(cnt):
+        at = start + timedelta(hours=3 * (i + 1))
+        points.append({**_weather_point(q, at), "dt_txt": at.strftime("%Y-%m-%d %H:%M:%S")})
+    return {"cnt": cnt, "list": points, "city": {"name": q.split(",")[0], "timezone": 19800}}
+
+
+# data.gov.in AGMARKNET
+
+def _mandi_records(commodity: str, state: str, limit: int) -> List[Dict[str, str]]:
+    today = datetime.now().strftime("%d/%m/%Y")
+    base = BASE_PRICES.get(commodity, 3000)
+    records = []
+    for market_state, district, market in MARKETS:
+        if state and market_state != state:
+            continue
+        rng = random.Random(f"{commodity}{market}{today}")
+        modal = round(base * rng.uniform(0.9, 1.1))
+        records.append({
+            "state": market_state, "district": district, "market": market, "commodity": commodity,
+            "variety": "Other", "grade": "FAQ", "arrival_date": today,
+            "min_price": str(round(modal * 0.93)), "max_price": str(round(modal * 1.06)), "modal_price": str(modal),
+        })
+    return records[:limit]
+
+
+@app.get("/resource/{resource_id}")
+async def datagov_resource(request: Request, resource_id: str):
+    failure = await simulate(config["datagov_latency"])
+    if failure:
+        return failure
+    params = request.query_params
+    commodity = params.get("filters[commodity]")
+    limit = int(params.get("limit", 10))
+    if int(params.get("offset", 0)) > 0 or not commodity:
+        records = []
+    else:
+        records = _mandi_records(commodity, params.get("filters[state]", ""), limit)
+    return {"index_name": resource_id, "total": len(records), "count": len(records), "records": records}
+
+
+# LLM providers
+
+def _llm_answer(prompt_chars: int):
+    words = random.randint(60, 180)
+    text = " ".join(random.choice(["Sow", "wheat", "after", "the", "first", "rain;", "irrigate", "weekly."])
+                    for _ in range(words))
+    return text, max(1, prompt_chars // 4), int(words * 1.3)
+
+
+@app.post("/v1/chat/completions")
+async def openai_chat_completions(request: Request):
+    body = await request.json()
+    failure = await simulate(config["llm_latency"])
+    if failure:
+        return failure
+    text, prompt_tokens, completion_tokens = _llm_answer(sum(len(m.get("content", "")) for m in body["messages"]))
+    return {
+        "id": f"chatcmpl-{random.getrandbits(48):x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+@app.post("/v1beta/models/{model_method}")
+async def gemini_generate_content(request: Request, model_method: str):
+    body = await request.json()
+    failure = await simulate(config["llm_latency"])
+    if failure:
+        return failure
+    prompt_chars = sum(len(part.get("text", "")) for content in body.get("contents", []) for part in content["parts"])
+    text, prompt_tokens, completion_tokens = _llm_answer(prompt_chars)
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": 1, "index": 0}],
+        "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens,
+                          "totalTokenCount": prompt_tokens + completion_tokens},
+    }
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for name, default in config.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=default)
+    args = parser.parse_args()
+    config.update({name: getattr(args, name) for name in config})
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Load-test results: summary, console report and run-to-run comparison.
+
+Usage (from backend/), to compare two saved runs:
+    python -m loadtest.report loadtest/results/before.json loadtest/results/after.json
+"""
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+
+def is_error(outcome: str) -> bool:
+    """HTTP 5xx, 429 and transport failures count as errors; other 4xx don't."""
+    return not outcome.isdigit() or outcome == "429" or outcome.startswith("5")
+
+
+def percentile(ordered: List[float], share: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def latency_stats(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    errors = sum(count for outcome, count in statuses.items() if is_error(outcome))
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "rps": round(len(ordered) / elapsed, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+        "outcomes": dict(sorted(statuses.items())),
+    }
+
+
+def pool_stats(samples: List[Dict[str, float]]) -> Optional[Dict[str, Any]]:
+    """Pool use over the run; saturated = every pooled connection checked out."""
+    if not samples:
+        return None
+    checked_out = sorted(sample.get("db_pool_checked_out", 0) for sample in samples)
+    size = max(sample.get("db_pool_size", 0) for sample in samples)
+    return {
+        "samples": len(samples),
+        "size": size,
+        "checked_out_mean": round(sum(checked_out) / len(checked_out), 2),
+        "checked_out_p95": percentile(checked_out, 0.95),
+        "checked_out_max": checked_out[-1],
+        "overflow_max": max(sample.get("db_pool_overflow", 0) for sample in samples),
+        "saturated_share": round(sum(1 for value in checked_out if size and value >= size) / len(checked_out), 3),
+    }
+
+
+def summarize(raw: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    elapsed = raw["elapsed"]
+    all_latencies = [value for values in raw["latencies"].values() for value in values]
+    all_statuses: Dict[str, int] = {}
+    for counts in raw["statuses"].values():
+        for outcome, count in counts.items():
+            all_statuses[outcome] = all_statuses.get(outcome, 0) + count
+    return {
+        "config": config,
+        "elapsed_s": round(elapsed, 2),
+        "personas": raw["personas"],
+        "total": latency_stats(all_latencies, all_statuses, elapsed),
+        "endpoints": {
+            label: latency_stats(raw["latencies"][label], raw["statuses"][label], elapsed)
+            for label in sorted(raw["latencies"])
+        },
+        "db_pool": pool_stats(raw["pool_samples"]),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    config = result["config"]
+    print(f"\n{config['users']} users, mix {config['mix']}, {result['elapsed_s']}s against {config['target']}")
+    print(f"{'endpoint':<30} | {'reqs':>7} | {'rps':>7} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'errors':>7}")
+    print("-" * 92)
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["total"])]
+    for label, stats in rows:
+        print(
+            f"{label:<30} | {stats['requests']:>7} | {stats['rps']:>7.1f} | {stats['p50_ms']:>6.0f}ms | "
+            f"{stats['p95_ms']:>6.0f}ms | {stats['p99_ms']:>6.0f}ms | {stats['error_rate']:>6.1%}"
+        )
+    pool = result["db_pool"]
+    if pool:
+        print(
+            f"\nDB pool (size {pool['size']:.0f}): checked out mean {pool['checked_out_mean']}, "
+            f"p95 {pool['checked_out_p95']:.0f}, max {pool['checked_out_max']:.0f}; "
+            f"overflow max {pool['overflow_max']:.0f}; saturated {pool['saturated_share']:.0%} of samples"
+        )
+    else:
+        print("\nDB pool: no samples (is /metrics reachable?)")
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> None:
+    """Print per-endpoint changes between two saved results."""
+    def change(old: float, new: float) -> str:
+        if not old:
+            return "    n/a"
+        return f"{(new - old) / old:>+7.0%}"
+
+    print(f"{'endpoint':<30} | {'p50':>17} | {'p99':>17} | {'rps':>7} | {'errors':>15}")
+    print("-" * 98)
+    labels = sorted(set(before["endpoints"]) | set(after["endpoints"]))
+    rows = [(label, before["endpoints"].get(label), after["endpoints"].get(label)) for label in labels]
+    rows.append(("TOTAL", before["total"], after["total"]))
+    for label, old, new in rows:
+        if old is None or new is None:
+            print(f"{label:<30} | only in {'after' if old is None else 'before'}")
+            continue
+        print(
+            f"{label:<30} | {new['p50_ms']:>7.0f}ms {change(old['p50_ms'], new['p50_ms'])} | "
+            f"{new['p99_ms']:>7.0f}ms {change(old['p99_ms'], new['p99_ms'])} | "
+            f"{change(old['rps'], new['rps'])} | {old['error_rate']:>6.1%} -> {new['error_rate']:>5.1%}"
+        )
+    for name in ("users", "mix", "duration", "workers"):
+        if before["config"].get(name) != after["config"].get(name):
+            print(f"note: {name} differs ({before['config'].get(name)} vs {after['config'].get(name)})")
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    compare(load(sys.argv[1]), load(sys.argv[2]))
@@ -0,0 +1,177 @@
+"""
+Run a load test and save its results.
+
+By default this starts the fake upstreams and the app (uvicorn, pointed at
+the fakes and at DATABASE_URL from the environment or .env, which should be
+a local, seeded Postgres: ``python seed_db.py``), drives the chosen user
+mix, prints per-endpoint throughput, p50/p95/p99 and error rates plus DB
+pool use, and writes the results as JSON. With --target it only drives an
+app that is already running (and its real upstreams).
+
+With several --workers, /metrics answers from whichever worker takes the
+scrape, so pool figures are for one worker at a time.
+
+Usage (from backend/):
+    python -m loadtest.run --users 50 --duration 60
+    python -m loadtest.run --mix chat --users 20 --llm-latency 3 --baseline loadtest/results/before.json
+    python -m loadtest.run --target http://staging:8000 --users 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from .driver import run_load
+from .report import compare, load, print_report, summarize
+from .scenarios import MIXES
+
+RESULTS_DIR = Path(__file__).parent / "results"
+AGMARKNET_RESOURCE = "9ef84268-d588-465a-a308-a864a43d0070"
+
+
+def app_environment(args) -> dict:
+    """App settings for a run against the fakes; --app-env entries override them."""
+    fakes = f"http://127.0.0.1:{args.fake_port}"
+    env = {
+        "WEATHER_API_KEY": "loadtest",
+        "WEATHER_API_URL": f"{fakes}/data/2.5",
+        "DATA_GOV_IN_API_KEY": "loadtest",
+        "AGMARKNET_API_URL": f"{fakes}/resource/{AGMARKNET_RESOURCE}",
+        "AI_PROVIDER": args.llm,
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"{fakes}/v1",
+        "GOOGLE_API_KEY": "loadtest",
+        "GEMINI_API_ENDPOINT": fakes,
+        "RATE_LIMIT_ENABLED": "False",
+        "MANDI_SYNC_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+    }
+    for entry in args.app_env:
+        name, _, value = entry.partition("=")
+        env[name] = value
+    return env
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{' '.join(process.args)} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise SystemExit(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_stack(args, log_path: Path) -> list:
+    """Start the fake upstreams and the app, logging to ``log_path``; returns the processes to stop."""
+    backend = Path(__file__).resolve().parent.parent
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    log_file = open(log_path, "w")
+    fakes = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.fake_upstreams", "--port", str(args.fake_port),
+         "--weather-latency", str(args.weather_latency), "--datagov-latency", str(args.datagov_latency),
+         "--llm-latency", str(args.llm_latency), "--error-rate", str(args.upstream_error_rate)],
+        cwd=backend,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    processes = [fakes]
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.fake_port}/docs", fakes)
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=backend,
+            env={**os.environ, **app_environment(args)},
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+        )
+        processes.append(app)
+        wait_until_up(f"http://127.0.0.1:{args.app_port}/health", app)
+    except BaseException:
+        stop(processes)
+        raise
+    return processes
+
+
+def stop(processes: list) -> None:
+    for process in reversed(processes):
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Test length in seconds, including ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds over which users start")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default", help="User mix (see scenarios.py)")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between a user's steps (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--target", help="Base URL of a running app; skips starting the app and fakes")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--app-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra app setting, e.g. DB_POOL_SIZE=5 (repeatable)")
+    parser.add_argument("--llm", choices=["openai", "gemini"], default="openai",
+                        help="LLM provider the app uses (gemini goes through the SDK's blocking REST transport)")
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Mean fake LLM latency (s)")
+    parser.add_argument("--weather-latency", type=float, default=0.08, help="Mean fake OpenWeather latency (s)")
+    parser.add_argument("--datagov-latency", type=float, default=0.4, help="Mean fake data.gov.in latency (s)")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="Share of fake upstream calls failing")
+    parser.add_argument("--out", help="Results file (default loadtest/results/<timestamp>.json); "
+                        "app and fake upstream output goes next to it as .log")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    started_at = datetime.now()
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{started_at:%Y%m%d-%H%M%S}.json"
+    log_path = out.with_suffix(".log")
+    target = args.target or f"http://127.0.0.1:{args.app_port}"
+    processes = [] if args.target else start_stack(args, log_path)
+    try:
+        raw = asyncio.run(run_load(
+            target, args.users, args.duration, args.ramp_up, args.mix, args.think_time, seed=args.seed
+        ))
+    finally:
+        stop(processes)
+
+    config = {
+        "target": target,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        **{name: value for name, value in vars(args).items() if name not in ("target", "out", "baseline")},
+    }
+    if args.target:
+        for name in ("workers", "app_env", "llm", "llm_latency", "weather_latency", "datagov_latency",
+                     "upstream_error_rate"):
+            config.pop(name)
+    result = summarize(raw, config)
+    print_report(result)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"\nResults saved to {out}" + ("" if args.target else f" (app log: {log_path})"))
+
+    if args.baseline:
+        print(f"\nCompared with {args.baseline}:")
+        compare(load(args.baseline), result)
+
+
+if __name__ == "__main__":
+    main()
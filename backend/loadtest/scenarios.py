@@ -0,0 +1,103 @@
+"""
+Scripted user sessions and the mixes of users a load test runs.
+
+Each persona is a coroutine that plays one session against the API through
+a ``VirtualUser`` (see ``driver.py``), pausing between steps like a person
+would. A mix says what share of the virtual users play each persona.
+"""
+from typing import Awaitable, Callable, Dict
+
+LANGUAGES = ["en", "en", "hi", "gu"]
+COMMODITIES = ["Wheat", "Cotton", "Groundnut", "Cumin", "Onion", "Castor Seed"]
+MARKETS = ["Rajkot", "Gondal", "Unjha", "Deesa", "Junagadh", "Ahmedabad"]
+LOCATIONS = ["Rajkot,IN", "Ahmedabad,IN", "Surat,IN", "Vadodara,IN", "Junagadh,IN", "Amreli,IN"]
+DISTRICTS = ["Rajkot,IN", "Ahmedabad,IN", "Surat,IN", "Vadodara,IN"]
+QUESTIONS = [
+    "When should I sow wheat in Saurashtra?",
+    "How much water does cotton need in the flowering stage?",
+    "My groundnut leaves have yellow spots, what should I do?",
+    "Which government scheme helps with drip irrigation?",
+    "Is it a good time to sell cumin this week?",
+]
+
+
+async def browser(user):
+    """Reads tips and schemes, opens one scheme, checks the district advisory."""
+    language = user.rng.choice(LANGUAGES)
+    await user.get("GET /tips", "/api/v1/tips/", params={"language": language})
+    await user.think()
+    schemes = await user.get("GET /schemes", "/api/v1/schemes/", params={"language": language})
+    await user.think()
+    if isinstance(schemes, list) and schemes:
+        scheme = user.rng.choice(schemes)
+        await user.get("GET /schemes/{id}", f"/api/v1/schemes/{scheme['id']}", params={"language": language})
+        await user.think()
+    await user.get("GET /advisories/{district}", f"/api/v1/advisories/{user.rng.choice(DISTRICTS)}",
+                   params={"language": language})
+
+
+async def market_watcher(user):
+    """Checks prices for a commodity, its trend at a market and where to sell."""
+    commodity = user.rng.choice(COMMODITIES)
+    await user.get("GET /mandi", "/api/v1/mandi/", params={"commodity": commodity})
+    await user.think()
+    await user.get("GET /mandi/trends", "/api/v1/mandi/trends",
+                   params={"commodity": commodity, "market": user.rng.choice(MARKETS)})
+    await user.think()
+    await user.get("GET /mandi/nearest", "/api/v1/mandi/nearest", params={
+        "lat": round(user.rng.uniform(21.0, 23.5), 3),
+        "lon": round(user.rng.uniform(69.5, 72.5), 3),
+        "commodity": commodity,
+        "cost_per_km": 2,
+    })
+    if user.rng.random() < 0.3:
+        await user.think()
+        await user.get("GET /mandi/batch", "/api/v1/mandi/batch",
+                       params={"commodities": ",".join(user.rng.sample(COMMODITIES, 3))})
+
+
+async def weather_checker(user):
+    """Looks at current weather, the forecast and alerts for a location."""
+    location = user.rng.choice(LOCATIONS)
+    await user.get("GET /weather/current", "/api/v1/weather/current", params={"location": location})
+    await user.think()
+    await user.get("GET /weather/forecast", "/api/v1/weather/forecast",
+                   params={"location": location, "resolution": user.rng.choice(["3h", "daily"])})
+    await user.think()
+    await user.post("POST /weather/alerts", "/api/v1/weather/alerts",
+                    json={"location": location, "language": user.rng.choice(LANGUAGES)})
+
+
+async def chatter(user):
+    """Has a short conversation with the assistant and reopens it."""
+    language = user.rng.choice(LANGUAGES)
+    conversation_id = None
+    for _ in range(user.rng.randint(1, 3)):
+        reply = await user.post("POST /chat/chat", "/api/v1/chat/chat", json={
+            "message": user.rng.choice(QUESTIONS),
+            "conversation_id": conversation_id,
+            "user_id": f"loadtest-{user.number}",
+            "language": language,
+        })
+        if isinstance(reply, dict):
+            conversation_id = reply.get("conversation_id", conversation_id)
+        await user.think()
+    if conversation_id:
+        await user.get("GET /chat/conversations/{id}", f"/api/v1/chat/conversations/{conversation_id}")
+
+
+PERSONAS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "browser": browser,
+    "market_watcher": market_watcher,
+    "weather_checker": weather_checker,
+    "chatter": chatter,
+}
+
+# Share of virtual users playing each persona
+MIXES: Dict[str, Dict[str, float]] = {
+    "default": {"browser": 0.4, "market_watcher": 0.3, "weather_checker": 0.2, "chatter": 0.1},
+    "catalog": {"browser": 1.0},
+    "mandi": {"market_watcher": 1.0},
+    "weather": {"weather_checker": 1.0},
+    "chat": {"chatter": 1.0},
+}
@@ -0,0 +1,17 @@
+"""
+Script to mint signed tokens for request profiling and the admin API.
+
+Usage:
+    python profile_token.py profile [hours]   # value for the X-Profile header
+    python profile_token.py admin [hours]     # value for the X-Admin-Token header
+"""
+import sys
+from app.core.profiling import ADMIN_SCOPE, PROFILE_SCOPE, sign_token
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in (PROFILE_SCOPE, ADMIN_SCOPE):
+        print(__doc__)
+        sys.exit(1)
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    print(sign_token(sys.argv[1], int(hours * 3600)))
@@ -0,0 +1,62 @@
+"""
+Script to run the AGMARKNET full sync on demand.
+
+Usage:
+    python sync_mandi.py             # run or resume the current sync
+    python sync_mandi.py --restart   # start again from offset 0
+    python sync_mandi.py --rebuild-rollups   # backfill daily rollups from stored prices
+    python sync_mandi.py --geocode-markets [markets.csv]   # fill market coordinates
+"""
+import asyncio
+import sys
+from app.db.base import AsyncSessionLocal
+from app.services.mandi_ingest import agmarknet_ingestor
+from app.services.mandi_rollups import mandi_rollups
+from app.services.mandi_geo import mandi_geo
+from app.core.logging import log
+
+
+async def rebuild_rollups():
+    """Recompute every daily rollup from mandi_price_cache."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await mandi_rollups.refresh(db)
+            await db.commit()
+        log.info("✅ Mandi rollups rebuilt")
+    except Exception as e:
+        log.error(f"❌ Error rebuilding Mandi rollups: {e}")
+        raise
+
+
+async def geocode_markets(csv_path=None):
+    """Locate stored markets from a CSV, falling back to district headquarters."""
+    try:
+        async with AsyncSessionLocal() as db:
+            counts = await mandi_geo.geocode_markets(db, csv_path)
+            await db.commit()
+        log.info(f"✅ Mandi markets geocoded: {counts}")
+    except Exception as e:
+        log.error(f"❌ Error geocoding Mandi markets: {e}")
+        raise
+
+
+async def main(restart: bool):
+    """Run the Mandi full sync."""
+    try:
+        checkpoint = await agmarknet_ingestor.run(restart=restart)
+        if checkpoint:
+            log.info(f"✅ Mandi sync {checkpoint.status}: {checkpoint.records_ingested} rows")
+    except Exception as e:
+        log.error(f"❌ Error syncing Mandi prices: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--rebuild-rollups" in args:
+        asyncio.run(rebuild_rollups())
+    elif "--geocode-markets" in args:
+        rest = args[args.index("--geocode-markets") + 1:]
+        asyncio.run(geocode_markets(rest[0] if rest else None))
+    else:
+        asyncio.run(main("--restart" in args))